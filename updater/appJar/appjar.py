@@ -49,7 +49,12 @@ import calendar  # datepicker
 import datetime  # datepicker & image
 import logging  # python's logger
 import inspect  # for logging
+import csv  # table import & export
 from contextlib import contextmanager  # generators
+from bisect import bisect_left, bisect_right, insort  # table filters, text searches & list boxes
+from itertools import compress, repeat, islice  # table filters & import
+from operator import contains, methodcaller  # table filters
+from collections import Counter  # table filters
 try: import argparse   # argument parser
 except ImportError: argparse = None
 
@@ -62,17 +67,19 @@ random = None
 ttk = ThemedStyle = None
 hashlib = None
 ToolTip = None
-nanojpeg = PngImageTk = array = None  # extra image support
+nanojpeg = PngImageTk = imagescale = array = None  # extra image support
+lineindex = None  # file views
 EXTERNAL_DND = None
 INTERNAL_DND = None
 types = None  # used to register dnd functions
 winsound = None
 PlotCanvas = PlotNav = PlotFig = None  # matplotlib
 parseString = TreeItem = TreeNode = None  # AjTree
+lazytree = None  # lazy trees
 # GoogleMap
 base64 = urlencode = urlopen = urlretrieve = quote_plus = json = None
 ConfigParser = codecs = ParsingError = None  # used to parse language files
-Thread = Queue = None
+Thread = Queue = Lock = None
 sqlite3 = None
 turtle = None
 webbrowser = None  # links
@@ -156,17 +163,17 @@ WIDGET_NAMES = Enum(
         "Map", "PieChart", "Properties", "Table", "Plot", "MicroBit",
         "Tree", "DatePicker", "Separator", "Turtle", "Canvas",
         "Menu", "Toolbar", "FlashLabel", "Widget", "RootPage",
-        "ContainerLog", "AnimationID", "ImageCache", "Bindings"],
+        "ContainerLog", "AnimationID", "AnimationFrames", "ImageCache", "ScaledImageCache", "Bindings"],
     containers=[
         "LabelFrame", "Frame", "TabbedFrame", "PanedFrame", "ToggleFrame",
         "FrameStack", "SubFrame", "FrameBox", "FrameLabel", "SubWindow", "Window",
         "ScrollPane", "PagedWindow", "Notebook", "Note", "Tab", "Page", "Pane"],
     excluded=["DatePicker", "SubWindow", "Window", "Toolbar",
         "Note", "Tab", "Page", "Pane", "RootPage", "FlashLabel",
-        "AnimationID", "ImageCache", "TickOptionBox", "Bindings",
+        "AnimationID", "AnimationFrames", "ImageCache", "ScaledImageCache", "TickOptionBox", "Bindings",
         "FileEntry", "DirectoryEntry",
         "FrameBox", "FrameLabel", "ContainerLog", "Menu"],
-    keepers=["Bindings", "ImageCache", "Menu", "Toolbar"]
+    keepers=["Bindings", "ImageCache", "ScaledImageCache", "AnimationFrames", "Menu", "Toolbar"]
 )
 
 
@@ -737,9 +744,40 @@ class gui(object):
         # for configuting event processing
         self.EVENT_SIZE = 1000
         self.EVENT_SPEED = 100
-        self.preloadAnimatedImageId = None
+        # the after id of each animated image still loading its frames
+        self.preloadAnimatedImageIds = {}
         self.processQueueId = None
 
+        # a single after loop drives all animated images
+        self.animationTickerId = None
+        self.animationTickerDue = None
+        # how often to check if a hidden animation can be seen again
+        self.HIDDEN_ANIMATION_SPEED = 250
+
+        # for configuring image scaling
+        self.SCALED_CACHE_SIZE = 16
+        # wait for the window to stop changing size, before scaling the background
+        self.BG_RESIZE_SPEED = 200
+        self.bgResizeId = None
+        self.bgResizeBinding = None
+
+        # for configuring image preloading
+        self.PRELOAD_BATCH = 4
+        self.PRELOAD_SPEED = 10
+        # the after id of each running preloadImages() call, by its results queue
+        self.preloadImagesIds = {}
+
+        # for configuring DB tables, rows are loaded in batches
+        self.DB_BATCH_SIZE = 500
+        self.DB_BATCH_SPEED = 10
+        # how many rows to import from a file at a time, and how often
+        self.FILE_BATCH_SIZE = 5000
+        self.FILE_BATCH_SPEED = 10
+        # a connection to each database, reused by all DB widgets
+        self.dbConnections = {}
+        # nanojpeg isn't thread safe, set by _loadThreading()
+        self.decodeLock = None
+
         # an array to hold any threaded events....
         self.events = []
         self.pollTime = 250
@@ -1034,21 +1072,23 @@ class gui(object):
 
     def _loadThreading(self):
         """ loads threading classes, and sets up queue """
-        global Thread, Queue
+        global Thread, Queue, Lock
         if Thread is None:
             try:
-                from threading import Thread
+                from threading import Thread, Lock
                 import Queue
             except ImportError: # python 3
                 try:
-                    from threading import Thread
+                    from threading import Thread, Lock
                     import queue as Queue
                 except:
-                    Thread = Queue = False
+                    Thread = Queue = Lock = False
                     return
 
             self.eventQueue = Queue.Queue(maxsize=self.EVENT_SIZE)
             self._processEventQueue()
+        if Lock and self.decodeLock is None:
+            self.decodeLock = Lock()
 
     def _loadNanojpeg(self):
         """ loads jpeg support """
@@ -1061,6 +1101,33 @@ class gui(object):
                 nanojpeg = False
                 array = False
 
+    def _loadLineIndex(self):
+        """ loads file view support """
+        global lineindex
+        if lineindex is None:
+            try:
+                from appJar.lib import lineindex
+            except:
+                lineindex = False
+
+    def _loadLazyTree(self):
+        """ loads lazy tree support """
+        global lazytree
+        if lazytree is None:
+            try:
+                from appJar.lib import lazytree
+            except:
+                lazytree = False
+
+    def _loadImagescale(self):
+        """ loads image scaling support """
+        global imagescale
+        if imagescale is None:
+            try:
+                from appJar.lib import imagescale
+            except:
+                imagescale = False
+
     def _loadWinsound(self):
         """ loads winsound support on Windows """
         global winsound
@@ -1287,7 +1354,7 @@ class gui(object):
                     if v == event.widget:
                         self.setLabel(k, event.data)
                         return
-            elif widgType in ["Listbox"]:
+            elif widgType in ["Listbox", "AjListBox"]:
                 for k, v in self.widgetManager.group(WIDGET_NAMES.ListBox).items():
                     if v == event.widget:
                         self.addListItem(k, event.data)
@@ -2121,14 +2188,22 @@ class gui(object):
             self.alive = False
             self.topLevel.after_cancel(self.pollId)
             self.topLevel.after_cancel(self.flashId)
-            if self.preloadAnimatedImageId:
-                self.topLevel.after_cancel(self.preloadAnimatedImageId)
+            for preloadId in self.preloadAnimatedImageIds.values():
+                self.topLevel.after_cancel(preloadId)
+            self.preloadAnimatedImageIds.clear()
             if self.processQueueId:
                 self.topLevel.after_cancel(self.processQueueId)
+            for preloadId in self.preloadImagesIds.values():
+                self.topLevel.after_cancel(preloadId)
+            self.preloadImagesIds.clear()
+            if self.bgResizeId:
+                self.topLevel.after_cancel(self.bgResizeId)
+
+            self._closeDbConnections()
 
             # stop any animations
-            for key in self.widgetManager.group(WIDGET_NAMES.AnimationID):
-                self.topLevel.after_cancel(self.widgetManager.get(WIDGET_NAMES.AnimationID, key))
+            if self.animationTickerId:
+                self.topLevel.after_cancel(self.animationTickerId)
 
             # stop any maps
             for key in self.widgetManager.group(WIDGET_NAMES.Map):
@@ -3864,7 +3939,7 @@ class gui(object):
         gui.trace("SET_WIDGET_FG: %s - %s", widgType, fg)
 
         # only configure these widgets if external
-        if widgType in ["Link", "Spinbox", "AjText", "AjScrolledText", "Button", "Entry", "AutoCompleteEntry"]:
+        if widgType in ["Link", "Spinbox", "AjText", "AjScrolledText", "AjFileView", "Button", "Entry", "AutoCompleteEntry"]:
             if external:
                 try: # entry specific settings
                     if not widget.showingDefault:
@@ -3955,7 +4030,7 @@ class gui(object):
 
         # these have a highlight border to remove
         hideBorders = [ "Text", "AjText",
-            "ScrolledText", "AjScrolledText",
+            "ScrolledText", "AjScrolledText", "AjFileView",
             "Scale", "AjScale",
             "OptionMenu",
             "Entry", "AutoCompleteEntry",
@@ -3965,11 +4040,11 @@ class gui(object):
         # these shouldn't have their BG coloured by default
         noBg = [ "Button",
             "Scale", "AjScale",
-            "Spinbox", "Listbox", "OptionMenu",
+            "Spinbox", "Listbox", "AjListBox", "AjVirtualListBox", "OptionMenu",
             "SplitMeter", "DualMeter", "Meter",
             "Entry", "AutoCompleteEntry",
             "Text", "AjText",
-            "ScrolledText", "AjScrolledText",
+            "ScrolledText", "AjScrolledText", "AjFileView",
             "ToggleFrame"]
 
         # remove the highlight borders
@@ -3990,14 +4065,14 @@ class gui(object):
         if external or tint:
             if widgType in ["Button", "Scale", "AjScale"]:
                 widget.config(activebackground=gui.TINT(widget, bg))
-            elif widgType in ["Entry", "Text", "AjText", "ScrolledText", "AjScrolledText", "AutoCompleteEntry", "Spinbox"]:
+            elif widgType in ["Entry", "Text", "AjText", "ScrolledText", "AjScrolledText", "AjFileView", "AutoCompleteEntry", "Spinbox"]:
                 widget.config(selectbackground=gui.TINT(widget, bg))
                 widget.config(highlightcolor=gui.TINT(widget, bg))
-                if widgType in ["Text", "AjText", "ScrolledText", "AjScrolledText"]:
+                if widgType in ["Text", "AjText", "ScrolledText", "AjScrolledText", "AjFileView"]:
                     widget.config(inactiveselectbackground=gui.TINT(widget, bg))
                 elif widgType == "Spinbox":
                     widget.config(buttonbackground=bg)
-            elif widgType == "Listbox":
+            elif widgType in ["Listbox", "AjListBox", "AjVirtualListBox"]:
                 widget.config(selectbackground=gui.TINT(widget, bg))
             elif widgType == "OptionMenu":
                 widget.config(activebackground=gui.TINT(widget, bg))
@@ -4963,13 +5038,206 @@ class gui(object):
         query = "SELECT DISTINCT tbl_name FROM sqlite_master ORDER BY tbl_name COLLATE NOCASE"
         data = []
 
-        with sqlite3.connect(db) as conn:
-            cursor = conn.cursor()
-            cursor.execute(query)
-            for row in cursor:
-                data.append(row[0])
+        cursor = self._getDbConnection(db).execute(query)
+        for row in cursor:
+            data.append(row[0])
         return data
 
+    def _getDbConnection(self, db):
+        ''' returns a connection to the specified database, connections are kept open & reused '''
+        key = db if db == ":memory:" else os.path.abspath(db)
+        conn = self.dbConnections.get(key)
+        if conn is None:
+            gui.trace("Connecting to DB: %s", key)
+            conn = sqlite3.connect(db)
+            self.dbConnections[key] = conn
+        return conn
+
+    def _closeDbConnections(self):
+        for conn in self.dbConnections.values():
+            try: conn.close()
+            except: pass
+        self.dbConnections = {}
+
+    @staticmethod
+    def _getDbVersion(conn):
+        ''' changes whenever the database is changed, by this or any other connection '''
+        return conn.execute("PRAGMA data_version").fetchone()[0], conn.total_changes
+
+    @staticmethod
+    def _hasDbRowIds(conn, table):
+        ''' views & tables created WITHOUT ROWID have no rowid to page through '''
+        query = "SELECT 1 FROM sqlite_master WHERE type='view' AND name=? COLLATE NOCASE"
+        if conn.execute(query, (table,)).fetchone() is not None:
+            return False
+        try:
+            row = conn.execute('SELECT rowid from ' + table + ' LIMIT 1').fetchone()
+        except sqlite3.OperationalError:
+            return False
+        # some versions of SQLite give views a NULL rowid, rather than an error
+        return row is None or row[0] is not None
+
+    def _getDbHeaders(self, db, table):
+        cursor = self._getDbConnection(db).execute('SELECT * from ' + table + ' LIMIT 0')
+        return [description[0] for description in cursor.description]
+
+    def _loadDbTable(self, grid, replace=False):
+        ''' streams the table's rows from the database, replacing its headers & rows if requested
+            if the table has rowids, each batch is selected after the last rowid loaded,
+            tables without rowids are paged through by their primary key,
+            views are read in one go, and added a batch at a time
+            no cursor is kept open between batches, as it would keep the database locked '''
+        self._stopTableLoad(grid)
+        conn = self._getDbConnection(grid.db)
+        if replace:
+            headers = self._getDbHeaders(grid.db, grid.dbTable)
+            grid.deleteAllRows(deleteHeader=True)
+            grid.addRows([headers], scroll=False)
+
+        grid.dbVersion = self._getDbVersion(conn)
+        if self._hasDbRowIds(conn, grid.dbTable):
+            grid.dbRows = {}
+            grid.dbLastRowId = None
+            pending = None
+        else:
+            grid.dbRows = None
+            grid.dbKeys = self._getDbPrimaryKey(conn, grid.dbTable)
+            grid.dbLastKey = None
+            if len(grid.dbKeys) > 0:
+                pending = None
+            else:
+                pending = conn.execute('SELECT * from ' + grid.dbTable).fetchall()
+
+        # show the first batch straight away
+        self._loadDbRows(grid, pending)
+
+    def _loadDbRows(self, grid, pending=None, pos=0):
+        ''' adds up to DB_BATCH_SIZE rows to the table, then reschedules itself
+            pending is the rows of a view, already read, pos is the next one to add '''
+        grid.loadId = None
+        if pending is not None:
+            rows = pending[pos:pos + self.DB_BATCH_SIZE]
+            pos += len(rows)
+        elif grid.dbRows is None:
+            rows = self._selectDbRowsByKey(grid, grid.dbLastKey, self.DB_BATCH_SIZE)
+            if len(rows) > 0: grid.dbLastKey = [rows[-1][index] for index, name in grid.dbKeys]
+        else:
+            rows = self._selectDbRows(grid, grid.dbLastRowId, self.DB_BATCH_SIZE).fetchall()
+            if len(rows) > 0: grid.dbLastRowId = rows[-1][0]
+            start = grid.getRowCount()
+
+        if len(rows) > 0:
+            if grid.dbRows is None:
+                grid.addRows(rows, scroll=False)
+            else:
+                grid.addRows([row[1:] for row in rows], scroll=False)
+                # remember which stored row came from which rowid, for refreshing
+                for row, stored in zip(rows, grid.rows[start:]):
+                    grid.dbRows[row[0]] = stored
+
+        if len(rows) == self.DB_BATCH_SIZE:
+            grid.loadId = grid.after(self.DB_BATCH_SPEED, self._loadDbRows, grid, pending, pos)
+        else:
+            gui.trace("Finished loading %s rows from %s", grid.getRowCount(), grid.dbTable)
+
+    def _selectDbRows(self, grid, afterRowId=None, limit=-1):
+        query = 'SELECT rowid, * from ' + grid.dbTable
+        if afterRowId is None:
+            return self._getDbConnection(grid.db).execute(query + ' ORDER BY rowid LIMIT ?', (limit,))
+        else:
+            return self._getDbConnection(grid.db).execute(query + ' WHERE rowid > ? ORDER BY rowid LIMIT ?', (afterRowId, limit))
+
+    @staticmethod
+    def _getDbPrimaryKey(conn, table):
+        ''' returns the position & name of each column in the primary key, in the key's order
+            views have no primary key '''
+        columns = conn.execute('PRAGMA table_info(' + table + ')').fetchall()
+        return [(col[0], col[1]) for col in sorted(columns, key=lambda col: col[5]) if col[5] > 0]
+
+    def _selectDbRowsByKey(self, grid, afterKey=None, limit=-1):
+        ''' selects the rows after afterKey, in primary key order '''
+        names = ['"' + name.replace('"', '""') + '"' for index, name in grid.dbKeys]
+        query = 'SELECT * from ' + grid.dbTable
+        params = []
+        if afterKey is not None:
+            # (a, b) > (?, ?) is written out, as older versions of SQLite can't compare rows
+            where = []
+            for i in range(len(names)):
+                where.append('(' + ' AND '.join([name + ' = ?' for name in names[:i]] + [names[i] + ' > ?']) + ')')
+                params.extend(afterKey[:i + 1])
+            query += ' WHERE ' + ' OR '.join(where)
+        query += ' ORDER BY ' + ', '.join(names) + ' LIMIT ?'
+        params.append(limit)
+        return self._getDbConnection(grid.db).execute(query, params).fetchall()
+
+    @staticmethod
+    def _stopTableLoad(grid):
+        if grid.loadId is not None:
+            grid.after_cancel(grid.loadId)
+            grid.loadId = None
+        if grid.loadFile is not None:
+            grid.loadFile.close()
+            grid.loadFile = None
+
+    def _refreshDbRows(self, grid):
+        ''' only updates the rows that have changed in the database, matching them by rowid
+            the database is compared a batch at a time in rowid order, like _loadDbRows
+            tables without rowids, or still loading, or whose columns have changed are reloaded '''
+        conn = self._getDbConnection(grid.db)
+        version = self._getDbVersion(conn)
+        if version == grid.dbVersion and grid.loadId is None:
+            gui.trace("DB unchanged, not refreshing: %s", grid.dbTable)
+            return
+
+        if grid.dbRows is None or grid.loadId is not None or not self._hasDbRowIds(conn, grid.dbTable) \
+                or len(self._getDbHeaders(grid.db, grid.dbTable)) != grid.numColumns:
+            self._loadDbTable(grid, replace=True)
+            return
+
+        # the position of each stored row, rows removed by the user are ignored
+        positions = dict((id(stored), pos) for pos, stored in enumerate(grid.rows))
+        storedIds = sorted(grid.dbRows)
+        nextId = 0
+        deleted = []
+        added = []
+        lastRowId = None
+        while True:
+            rows = self._selectDbRows(grid, lastRowId, self.DB_BATCH_SIZE).fetchall()
+            for row in rows:
+                # stored rows before this rowid have gone from the database
+                while nextId < len(storedIds) and storedIds[nextId] < row[0]:
+                    deleted.append(storedIds[nextId])
+                    nextId += 1
+                if nextId < len(storedIds) and storedIds[nextId] == row[0]:
+                    nextId += 1
+                    pos = positions.get(id(grid.dbRows[row[0]]))
+                    if pos is None:
+                        del grid.dbRows[row[0]]
+                    elif list(row[1:]) != grid.rows[pos]:
+                        grid.replaceRow(pos, list(row[1:]))
+                        grid.dbRows[row[0]] = grid.rows[pos]
+                else:
+                    added.append(row)
+            if len(rows) < self.DB_BATCH_SIZE: break
+            lastRowId = rows[-1][0]
+        deleted.extend(storedIds[nextId:])
+
+        deletedPos = []
+        for rowId in deleted:
+            pos = positions.get(id(grid.dbRows.pop(rowId)))
+            if pos is not None: deletedPos.append(pos)
+        for pos in sorted(deletedPos, reverse=True):
+            grid.deleteRow(pos)
+
+        if len(added) > 0:
+            start = grid.getRowCount()
+            grid.addRows([list(row[1:]) for row in added], scroll=False)
+            for row, stored in zip(added, grid.rows[start:]):
+                grid.dbRows[row[0]] = stored
+            grid.dbLastRowId = added[-1][0]
+
+        grid.dbVersion = version
+
     def replaceDbTable(self, title, db, table):
         grid = self.widgetManager.get(WIDGET_NAMES.Table, title)
         grid.db = db
@@ -4979,14 +5247,7 @@ class gui(object):
             self.error("Unable to load DB data - can't load sqlite3")
             return
 
-        with sqlite3.connect(db) as conn:
-            cursor = conn.cursor()
-            dataQuery = 'SELECT * from ' + table
-
-            # select all data
-            cursor.execute(dataQuery)
-            self.setTableHeaders(title, cursor)
-            self.replaceAllTableRows(title, cursor)
+        self._loadDbTable(grid, replace=True)
         self.topLevel.update_idletasks()
 
     def disableTableEntry(self, title, entryPos, disabled=True):
@@ -5000,13 +5261,7 @@ class gui(object):
             self.error("Unable to load DB data - can't load sqlite3")
             return
 
-        with sqlite3.connect(grid.db) as conn:
-            cursor = conn.cursor()
-            dataQuery = 'SELECT * from ' + grid.dbTable
-
-            # select all data
-            cursor.execute(dataQuery)
-            self.replaceAllTableRows(title, cursor)
+        self._refreshDbRows(grid)
 
     def refreshDbOptionBox(self, title, selected=None):
         opt = self.widgetManager.get(WIDGET_NAMES.OptionBox, title)
@@ -5027,6 +5282,8 @@ class gui(object):
         addButton=kwargs.pop('addButton', "Add")
         showMenu=kwargs.pop('showMenu', False)
         horiz=kwargs.pop('horizontal', True)
+        virtual=kwargs.pop('virtual', False)
+        search=kwargs.pop('search', False)
         change=kwargs.pop('change', None)
         edit=kwargs.pop('edit', None)
 
@@ -5039,12 +5296,12 @@ class gui(object):
             if kind == 'normal':
                 table = self.addTable(title, value, *args,
                             action=action, addRow=addRow, actionHeading=actionHeading, actionButton=actionButton,
-                            addButton=addButton, showMenu=showMenu, horizontal=horiz, **kwargs
+                            addButton=addButton, showMenu=showMenu, horizontal=horiz, virtual=virtual, search=search, **kwargs
                         )
             else:
                 table = self.addDbTable(title, value, *args,
                             action=action, addRow=addRow, actionHeading=actionHeading, actionButton=actionButton,
-                            addButton=addButton, showMenu=showMenu, horizontal=horiz, **kwargs
+                            addButton=addButton, showMenu=showMenu, horizontal=horiz, virtual=virtual, search=search, **kwargs
                         )
         if change is not None: self.setTableChangeFunction(title, change)
         if edit is not None: self.setTableEditFunction(title, edit)
@@ -5056,50 +5313,52 @@ class gui(object):
     def addDbTable(self, title, value, table, row=None, column=0, colspan=0, rowspan=0,
                 action=None, addRow=None, actionHeading="Action", actionButton="Press",
                 addButton="Add", showMenu=False, border="solid", **kwargs):
-        ''' creates a new Table, displaying the specified database & table '''
+        ''' creates a new Table, displaying the specified database & table
+            the first DB_BATCH_SIZE rows are shown straight away, the rest are loaded in the background '''
 
         horiz=kwargs.pop('horizontal', True)
+        virtual=kwargs.pop('virtual', False)
+        search=kwargs.pop('search', False)
 
         self._importSqlite3()
         if not sqlite3:
             self.error("Unable to load DB data - can't load sqlite3")
             return
 
-        with sqlite3.connect(value) as conn:
-            cursor = conn.cursor()
-            dataQuery = 'SELECT * from ' + table
-
-            # select all data
-            cursor.execute(dataQuery)
-
-            grid = self.addTable(title, cursor, row, column, colspan, rowspan,
-                        action, addRow, actionHeading, actionButton,
-                        addButton, showMenu, border=border, horizontal=horiz
-                    )
+        headers = self._getDbHeaders(value, table)
+        grid = self.addTable(title, [headers], row, column, colspan, rowspan,
+                    action, addRow, actionHeading, actionButton,
+                    addButton, showMenu, border=border, horizontal=horiz, virtual=virtual, search=search
+                )
         grid.db = value
         grid.dbTable = table
+        self._loadDbTable(grid)
         return grid
 
     def addTable(self, title, data, row=None, column=0, colspan=0, rowspan=0, action=None, addRow=None,
                 actionHeading="Action", actionButton="Press", addButton="Add", showMenu=False, border="solid", **kwargs):
-        ''' creates a new table, displaying the specified data '''
+        ''' creates a new table, displaying the specified data
+            set virtual to True to only create widgets for the visible rows, for large amounts of data
+            set search to True to add a box for searching the table '''
         self.widgetManager.verify(WIDGET_NAMES.Table, title)
         wrap=kwargs.pop('wrap', 250)
         horiz=kwargs.pop('horizontal', True)
+        search=kwargs.pop('search', False)
+        tableClass = VirtualTable if kwargs.pop('virtual', False) else SimpleTable
         if not self.ttkFlag:
-            grid = SimpleTable(self.getContainer(), title, data,
+            grid = tableClass(self.getContainer(), title, data,
                         action, addRow,
                         actionHeading, actionButton, addButton,
                         showMenu, buttonFont=self._getContainerProperty('buttonFont'),
                         font=self.tableFont, background=self._getContainerBg(),
-                        queueFunction=self.queueFunction, border=border, wrap=wrap, horizontal=horiz
+                        queueFunction=self.queueFunction, border=border, wrap=wrap, horizontal=horiz, search=search
                     )
         else:
-            grid = SimpleTable(self.getContainer(), title, data,
+            grid = tableClass(self.getContainer(), title, data,
                         action, addRow,
                         actionHeading, actionButton, addButton,
                         showMenu, buttonFont=self._getContainerProperty('buttonFont'),
-                        queueFunction=self.queueFunction, border=border, wrap=wrap, horizontal=horiz
+                        queueFunction=self.queueFunction, border=border, wrap=wrap, horizontal=horiz, search=search
                     )
         self._positionWidget(grid, row, column, colspan, rowspan, N+E+S+W)
         self.widgetManager.add(WIDGET_NAMES.Table, title, grid)
@@ -5164,10 +5423,93 @@ class gui(object):
         grid = self.widgetManager.get(WIDGET_NAMES.Table, title)
         grid.sort(columnNumber, descending)
 
+    def setTableFilter(self, title, columnNumber, value):
+        ''' only shows the rows of the table that match the filter
+            value can be text to search for, a (low, high) range, or a function called with each value
+            set columnNumber to None to search every column, set value to None to remove the filter '''
+        grid = self.widgetManager.get(WIDGET_NAMES.Table, title)
+        grid.setFilter(columnNumber, value)
+
+    def clearTableFilters(self, title):
+        grid = self.widgetManager.get(WIDGET_NAMES.Table, title)
+        grid.clearFilters()
+
     def getTableRowCount(self, title):
         grid = self.widgetManager.get(WIDGET_NAMES.Table, title)
         return grid.getRowCount()
 
+    def exportTable(self, title, path, fmt="csv"):
+        ''' saves the headers & rows of the specified table to a csv or tsv file
+            the values are written straight from the table's data, rather than from its cells '''
+        grid = self.widgetManager.get(WIDGET_NAMES.Table, title)
+        delimiter = self._getTableDelimiter(fmt)
+        with self._openTableFile(path, "w") as tableFile:
+            writer = csv.writer(tableFile, delimiter=delimiter, lineterminator=str("\n"))
+            writer.writerow(grid.headers)
+            writer.writerows(grid.rows)
+        gui.trace("Exported %s rows from %s to %s", len(grid.rows), title, path)
+
+    def importTable(self, title, path, fmt="csv", append=False):
+        ''' loads a csv or tsv file into the specified table, the first row of the file is the headers
+            set append to True to add the file's rows to the table, rather than replacing it
+            the first FILE_BATCH_SIZE rows are shown straight away, the rest are loaded in the background '''
+        grid = self.widgetManager.get(WIDGET_NAMES.Table, title)
+        delimiter = self._getTableDelimiter(fmt)
+        self._stopTableLoad(grid)
+        tableFile = self._openTableFile(path, "r")
+        try:
+            reader = csv.reader(tableFile, delimiter=delimiter)
+            headers = next(reader, None)
+            if headers is None:
+                raise Exception("Unable to import an empty file: " + path)
+
+            if not append:
+                # the table no longer shows a database
+                grid.db = grid.dbTable = grid.dbRows = None
+                grid.deleteAllRows(deleteHeader=True)
+                grid.addRows([headers], scroll=False)
+
+            grid.loadFile = tableFile
+            self._importTableRows(grid, reader)
+        except:
+            # don't leave the file open, if it can't be read
+            grid.loadFile = None
+            tableFile.close()
+            raise
+
+    def _importTableRows(self, grid, reader):
+        ''' adds up to FILE_BATCH_SIZE rows from the file to the table, then reschedules itself '''
+        grid.loadId = None
+        try:
+            rows = list(islice(reader, self.FILE_BATCH_SIZE))
+        except:
+            self._stopTableLoad(grid)
+            raise
+        if len(rows) > 0:
+            grid.addRows(rows, scroll=False)
+
+        if len(rows) == self.FILE_BATCH_SIZE:
+            grid.loadId = grid.after(self.FILE_BATCH_SPEED, self._importTableRows, grid, reader)
+        else:
+            gui.trace("Finished importing %s rows", grid.getRowCount())
+            self._stopTableLoad(grid)
+
+    @staticmethod
+    def _getTableDelimiter(fmt):
+        delimiters = {"csv": ",", "tsv": "\t"}
+        if fmt.lower() not in delimiters:
+            raise Exception("Invalid table format: " + fmt + ", must be csv or tsv.")
+        # python 2's csv module needs a byte string
+        return str(delimiters[fmt.lower()])
+
+    @staticmethod
+    def _openTableFile(path, mode):
+        ''' opens a file for the csv module, which handles its own newlines '''
+        if PYTHON2:
+            return open(path, mode + "b")
+        else:
+            return open(path, mode, newline="", encoding="utf-8")
+
     def getTableRow(self, title, rowNumber):
         grid = self.widgetManager.get(WIDGET_NAMES.Table, title)
         return grid.getRow(rowNumber)
@@ -5776,6 +6118,9 @@ class gui(object):
             widgName = WIDGET_NAMES.name(widgType)
             gui.trace("Cleansing: %s", widgName)
 
+            if widgType == WIDGET_NAMES.Image:
+                self._releaseAnimationFrames(widget.image)
+
             if widgType not in [WIDGET_NAMES.Tab, WIDGET_NAMES.Page]:
                 if not self.widgetManager.destroyWidget(widgType, widget):
                     self.warn("Unable to destroy %s, during cleanse - destroy returned False", widgName)
@@ -7243,80 +7588,162 @@ class gui(object):
 
         return image
 
-    # looks up label containing image
-    def _animateImage(self, title, firstTime=False):
-        if not self.alive: return
-        try:
-            lab = self.widgetManager.get(WIDGET_NAMES.Image, title)
-        except ItemLookupError:
-            # image destroyed...
-            try: self.widgetManager.remove(WIDGET_NAMES.AnimationID, title)
-            except: pass
-            return
-        if not lab.image.animating:
-            self.widgetManager.remove(WIDGET_NAMES.AnimationID, title)
-            return
-        if firstTime and lab.image.alreadyAnimated:
+    # adds an image's label to the animation ticker
+    def _playAnimation(self, name, img):
+        img.animating = True
+        self._scheduleAnimation(name, self._getAnimationDelay(img))
+
+    # records when the next frame of an image is due, and makes sure the ticker will run by then
+    def _scheduleAnimation(self, name, delay):
+        self.widgetManager.update(WIDGET_NAMES.AnimationID, name, self._animationClock() + delay)
+        self._startAnimationTicker()
+
+    @staticmethod
+    def _animationClock():
+        return int(time.time() * 1000)
+
+    # the speed set by the user, otherwise the GIF's delay for the current frame
+    def _getAnimationDelay(self, img):
+        if img.anim_speed is not None:
+            return img.anim_speed
+        return img.frames.delay(img.anim_pos)
+
+    # schedules the ticker for the next frame that's due, unless it's already scheduled earlier
+    def _startAnimationTicker(self):
+        due = self.widgetManager.group(WIDGET_NAMES.AnimationID)
+        if not self.alive or len(due) == 0:
             return
+        nextTick = min(due.values())
+        if self.animationTickerId is not None:
+            if self.animationTickerDue <= nextTick:
+                return
+            self.topLevel.after_cancel(self.animationTickerId)
+        self.animationTickerDue = nextTick
+        self.animationTickerId = self.topLevel.after(
+            max(nextTick - self._animationClock(), 1), self._animateImages)
+
+    # single after loop, shows the next frame of any animated images that are due
+    def _animateImages(self):
+        self.animationTickerId = None
+        if not self.alive: return
+        now = self._animationClock()
+        due = self.widgetManager.group(WIDGET_NAMES.AnimationID)
+        for name in list(due):
+            if due[name] > now:
+                continue
+            try:
+                lab = self.widgetManager.get(WIDGET_NAMES.Image, name)
+            except ItemLookupError:
+                # image destroyed...
+                del due[name]
+                continue
 
-        lab.image.alreadyAnimated = True
-        try:
-            if lab.image.cached:
-                pic = lab.image.pics[lab.image.anim_pos]
-            else:
-                pic = PhotoImage(file=lab.image.path,
-                                 format="gif - {0}".format(lab.image.anim_pos))
-                lab.image.pics.append(pic)
-            lab.image.anim_pos += 1
-            lab.config(image=pic)
-            anim_id = self.topLevel.after(int(lab.image.anim_speed), self._animateImage, title)
-            self.widgetManager.update(WIDGET_NAMES.AnimationID, title, anim_id)
-        except IndexError:
-            # will be thrown when we reach end of anim images
-            lab.image.anim_pos = 0
-            lab.image.cached = True
-            self._animateImage(title)
-        except TclError:
-            # will be thrown when all images cached
-            lab.image.anim_pos = 0
-            lab.image.cached = True
-            self._animateImage(title)
+            img = lab.image
+            if img is None or not img.isAnimated or not img.animating:
+                del due[name]
+                continue
+
+            # don't change frames that can't be seen, just check again later
+            img.anim_paused = not self._isAnimationVisible(lab, now)
+            if img.anim_paused:
+                due[name] = now + self.HIDDEN_ANIMATION_SPEED
+                continue
+
+            img.anim_pos = (img.anim_pos + 1) % img.frames.count
+            lab.config(image=img.frames.frame(img.anim_pos))
+            due[name] = now + self._getAnimationDelay(img)
+
+        self._startAnimationTicker()
+
+    # checks if an image label can be seen, using its Map/Unmap/Visibility events
+    # events aren't sent when a parent is unmapped, or on every platform,
+    # so the screen is also checked, but only every HIDDEN_ANIMATION_SPEED ms
+    def _isAnimationVisible(self, lab, now):
+        if lab.visibility in ("unmapped", "obscured"):
+            return False
+        if now >= lab.visibilityDue:
+            lab.visible = self._isWidgetVisible(lab)
+            lab.visibilityDue = now + self.HIDDEN_ANIMATION_SPEED
+        return lab.visible
+
+    # called by an image label's Map/Unmap/Visibility events
+    @staticmethod
+    def _imageVisibilityChanged(lab, visibility):
+        lab.visibility = visibility
+        # check the screen on the next frame
+        lab.visibilityDue = 0
+
+    def _trackImageVisibility(self, lab):
+        lab.visibility = None
+        lab.visible = True
+        lab.visibilityDue = 0
+        lab.bind("<Map>", lambda e: self._imageVisibilityChanged(lab, None), add="+")
+        lab.bind("<Unmap>", lambda e: self._imageVisibilityChanged(lab, "unmapped"), add="+")
+        lab.bind("<Visibility>", lambda e: self._imageVisibilityChanged(lab,
+                    "obscured" if str(e.state) == "VisibilityFullyObscured" else None), add="+")
+
+    # checks if any of a widget can be seen - it might be unmapped, scrolled away,
+    # or under another widget, eg. on a tab or frame that's not been raised
+    # a grid of points is checked, so partly covered widgets still count
+    @staticmethod
+    def _isWidgetVisible(widget):
+        if not widget.winfo_viewable():
+            return False
 
-    def _preloadAnimatedImage(self, img):
+        x, y = widget.winfo_rootx(), widget.winfo_rooty()
+        w, h = widget.winfo_width(), widget.winfo_height()
+        for py in (y+h//2, y, y+h-1):
+            for px in (x+w//2, x, x+w-1):
+                if widget.tk.call("winfo", "containing", px, py) == str(widget):
+                    return True
+        return False
+
+    # decodes one frame per after call, until all frames are loaded
+    # pos is the first frame that might not be loaded yet
+    def _preloadAnimatedImage(self, frames, pos=0):
+        self.preloadAnimatedImageIds.pop(frames, None)
         if not self.alive: return
-        if img.cached:
-            return
-        try:
-            pic = PhotoImage(file=img.path,
-                             format="gif - {0}".format(img.anim_pos))
-            img.pics.append(pic)
-            img.anim_pos += 1
-            self.preloadAnimatedImageId = self.topLevel.after(
-                0, self._preloadAnimatedImage, img)
-        # when all frames have been processed
-        except TclError as e:
-            # expected - when all images cached
-            img.anim_pos = 0
-            img.cached = True
-
-    def _configAnimatedImage(self, img):
-        img.alreadyAnimated = False
+        for pos in range(pos, frames.count):
+            if frames.pics[pos] is None:
+                frames.frame(pos)
+                self.preloadAnimatedImageIds[frames] = self.topLevel.after(
+                    0, self._preloadAnimatedImage, frames, pos + 1)
+                return
+
+    def _configAnimatedImage(self, img, frames):
         img.isAnimated = True
-        img.pics = []
-        img.cached = False
+        img.frames = frames
         img.anim_pos = 0
-        img.anim_speed = 150
-        img.animating = True
+        img.anim_speed = None
+        img.animating = False
+        img.anim_paused = False
 
-    # simple way to check if image is animated
-    def _checkIsAnimated(self, name):
-        if imghdr.what(name) == "gif":
-            try:
-                PhotoImage(file=name, format="gif - 1")
-                return True
-            except:
-                pass
-        return False
+    # gets the shared frames for an animated GIF, or None if the image isn't animated
+    # frames are kept while any labels are showing them, or until the file changes
+    def _getAnimationFrames(self, imagePath):
+        frames = self.widgetManager.group(WIDGET_NAMES.AnimationFrames).get(imagePath)
+        if frames is not None and frames.modTime == os.path.getmtime(imagePath):
+            return frames
+
+        if imghdr.what(imagePath) != "gif":
+            return None
+        frames = AnimationFrames(imagePath)
+        if frames.count < 2:
+            return None
+
+        self.widgetManager.update(WIDGET_NAMES.AnimationFrames, imagePath, frames)
+        self._preloadAnimatedImage(frames)
+        return frames
+
+    # called when a label stops showing an animated image
+    def _releaseAnimationFrames(self, img):
+        if img is None or not img.isAnimated:
+            return
+        img.animating = False
+        frames = img.frames
+        frames.refs -= 1
+        if frames.refs <= 0 and self.widgetManager.group(WIDGET_NAMES.AnimationFrames).get(frames.path) is frames:
+            self.widgetManager.remove(WIDGET_NAMES.AnimationFrames, frames.path)
 
     def setAnimationSpeed(self, name, speed):
         img = self.widgetManager.get(WIDGET_NAMES.Image, name).image
@@ -7332,9 +7759,22 @@ class gui(object):
     def startAnimation(self, name):
         img = self.widgetManager.get(WIDGET_NAMES.Image, name).image
         if not img.animating:
-            img.animating = True
-            anim_id = self.topLevel.after(img.anim_speed, self._animateImage, name)
-            self.widgetManager.update(WIDGET_NAMES.AnimationID, name, anim_id)
+            self._playAnimation(name, img)
+
+    def getAnimationCount(self, paused=False):
+        """ gets the number of animations currently changing frames
+        animations are paused while their image can't be seen
+
+        :param paused: count the paused animations instead
+        :returns: the number of animations
+        """
+        count = 0
+        for name in self.widgetManager.group(WIDGET_NAMES.AnimationID):
+            try: img = self.widgetManager.get(WIDGET_NAMES.Image, name).image
+            except ItemLookupError: continue
+            if img is not None and img.isAnimated and img.animating and img.anim_paused == paused:
+                count += 1
+        return count
 
     # function to set an alternative image, when a mouse goes over
     def setImageMouseOver(self, title, overImg):
@@ -7342,7 +7782,7 @@ class gui(object):
 
         # first check over image & cache it
         fullPath = self.getImagePath(overImg)
-        self.topLevel.after(0, self._getImage, fullPath)
+        self.preloadImages([fullPath])
 
         leaveImg = lab.image.path
         lab.bind("<Leave>", lambda e: self.setImage(title, leaveImg, True))
@@ -7388,6 +7828,11 @@ class gui(object):
     # function to remove image objects form cache
     def clearImageCache(self):
         self.widgetManager.clear(WIDGET_NAMES.ImageCache)
+        self.widgetManager.clear(WIDGET_NAMES.ScaledImageCache)
+        # also forget any animations that no labels are showing
+        frames = self.widgetManager.group(WIDGET_NAMES.AnimationFrames)
+        for path in [path for path in frames if frames[path].refs <= 0]:
+            self.widgetManager.remove(WIDGET_NAMES.AnimationFrames, path)
 
     # internal function to build an image function from a string
     def _getImageData(self, imageData, fmt="gif"):
@@ -7436,55 +7881,84 @@ class gui(object):
         # else load a new one
         elif os.path.isfile(imagePath):
             if os.access(imagePath, os.R_OK):
-                imgType = imghdr.what(imagePath)
-                if imgType is None:
-                    raise Exception( "Invalid file: " + imagePath + " is not a valid image")
-                elif not imagePath.lower().endswith(imgType) and not (
-                        imgType == "jpeg" and imagePath.lower().endswith("jpg")):
-                        # the image has been saved with the wrong extension
-                    raise Exception(
-                        "Invalid image extension: " +
-                        imagePath +
-                        " should be a ." +
-                        imgType)
-                elif imagePath.lower().endswith('.gif'):
-                    photo = PhotoImage(file=imagePath)
-                elif imagePath.lower().endswith('.ppm') or imagePath.lower().endswith('.pgm'):
-                    photo = PhotoImage(file=imagePath)
-                elif imagePath.lower().endswith('jpg') or imagePath.lower().endswith('jpeg'):
-                    self.warn("Image processing for .JPGs is slow. .GIF is the recommended format")
-                    photo = self.convertJpgToBmp(imagePath)
-                elif imagePath.lower().endswith('.png'):
-                    # known issue here, some PNGs lack IDAT chunks
-                    # also, PNGs seem broken on python<3, maybe around the map
-                    # function used to generate pixel maps
-                    self._importPngimagetk()
-                    if PngImageTk is False:
-                        raise Exception(
-                            "TKINTERPNG library not found, PNG files not supported: " + imagePath)
-                    if sys.version_info >= (2, 7):
-                        self.warn("Image processing for .PNGs is slow. .GIF is the recommended format")
-                        png = PngImageTk(imagePath)
-                        png.convert()
-                        photo = png.image
-                    else:
-                        raise Exception("PNG images only supported in python 3: " + imagePath)
-                else:
-                    raise Exception("Invalid image type: " + imagePath)
+                photo = self._makeImage(imagePath, self._readImage(imagePath))
             else:
                 raise Exception("Can't read image: " + imagePath)
         else:
             raise Exception("Image " + imagePath + " does not exist")
 
+        return self._storeImage(photo, imagePath, addToCache)
+
+    # internal function to read & decode an image file
+    # doesn't use tk, so can be called from a worker thread
+    # returns None for images tk can load itself, or that are too big to decode in one go,
+    # otherwise a tuple of PPM data, and a list of runs of transparent pixels
+    def _readImage(self, imagePath):
+        imgType = imghdr.what(imagePath)
+        if imgType is None:
+            raise Exception( "Invalid file: " + imagePath + " is not a valid image")
+        elif not imagePath.lower().endswith(imgType) and not (
+                imgType == "jpeg" and imagePath.lower().endswith("jpg")):
+                # the image has been saved with the wrong extension
+            raise Exception(
+                "Invalid image extension: " +
+                imagePath +
+                " should be a ." +
+                imgType)
+        elif imagePath.lower().endswith('.gif'):
+            return None
+        elif imagePath.lower().endswith('.ppm') or imagePath.lower().endswith('.pgm'):
+            return None
+        elif imagePath.lower().endswith('jpg') or imagePath.lower().endswith('jpeg'):
+            self.warn("Image processing for .JPGs is slow. .GIF is the recommended format")
+            return self._decodeJpg(imagePath), []
+        elif imagePath.lower().endswith('.png'):
+            # known issue here, some PNGs lack IDAT chunks
+            # also, PNGs seem broken on python<3, maybe around the map
+            # function used to generate pixel maps
+            self._importPngimagetk()
+            if PngImageTk is False:
+                raise Exception(
+                    "TKINTERPNG library not found, PNG files not supported: " + imagePath)
+            if sys.version_info >= (2, 7):
+                self.warn("Image processing for .PNGs is slow. .GIF is the recommended format")
+                # big images are written to the PhotoImage a band at a time, by _makeImage
+                width, height = PngImageTk.getSize(imagePath)
+                if width * height > PngImageTk.maxPpmPixels:
+                    return None
+                return PngImageTk.toPpm(imagePath)
+            else:
+                raise Exception("PNG images only supported in python 3: " + imagePath)
+        else:
+            raise Exception("Invalid image type: " + imagePath)
+
+    # internal function to build a PhotoImage from the result of _readImage
+    # must be called on the gui's thread
+    def _makeImage(self, imagePath, imageData):
+        if imageData is None:
+            if imagePath.lower().endswith('.png'):
+                png = PngImageTk(imagePath)
+                png.convert()
+                return png.image
+            return PhotoImage(file=imagePath)
+
+        data, transparent = imageData
+        photo = PhotoImage(data=data)
+        if len(transparent) > 0:
+            PngImageTk.setTransparent(photo, transparent)
+        return photo
+
+    # internal function to record details of a loaded image, and cache it
+    def _storeImage(self, photo, imagePath, addToCache=True):
         # store the full path to this image
         photo.path = imagePath
         # store the modification time
         photo.modTime = os.path.getmtime(imagePath)
 
         # sort out if it's an animated image
-        if self._checkIsAnimated(imagePath):
-            self._configAnimatedImage(photo)
-            self._preloadAnimatedImage(photo)
+        frames = self._getAnimationFrames(imagePath)
+        if frames is not None:
+            self._configAnimatedImage(photo, frames)
         else:
             photo.isAnimated = False
             photo.animating = False
@@ -7493,6 +7967,73 @@ class gui(object):
 
         return photo
 
+    def preloadImages(self, paths, callback=None):
+        """ loads images into the image cache, ready to be displayed
+        files are read & decoded on a worker thread, then the images are built
+        on the gui's thread, a few at a time, so the gui stays responsive
+
+        :param paths: a list of image files
+        :param callback: a function to call once all the images are loaded,
+            it receives a list of the full paths of the images now in the cache
+        """
+        imagePaths = []
+        loaded = []
+        for path in paths:
+            imagePath = self.getImagePath(path)
+            cached = self.widgetManager.group(WIDGET_NAMES.ImageCache).get(imagePath)
+            if self.hasImageChanged(cached, imagePath):
+                imagePaths.append(imagePath)
+            else:
+                loaded.append(imagePath)
+
+        self._loadThreading()
+        if Queue is False:
+            gui.warn("Unable to preload images in the background - threading not possible.")
+            for imagePath in imagePaths:
+                self._getImage(imagePath)
+                loaded.append(imagePath)
+            if callback is not None: callback(loaded)
+            return
+
+        results = Queue.Queue()
+
+        def readImages():
+            for imagePath in imagePaths:
+                try:
+                    results.put((imagePath, self._readImage(imagePath)))
+                except Exception as e:
+                    results.put((imagePath, e))
+
+        self.thread(readImages)
+        self._buildPreloadedImages(results, len(imagePaths), loaded, callback)
+
+    # internal function to build images read by preloadImages
+    # builds up to PRELOAD_BATCH images, then reschedules itself
+    def _buildPreloadedImages(self, results, remaining, loaded, callback):
+        if not self.alive: return
+        for i in range(self.PRELOAD_BATCH):
+            if remaining == 0: break
+            try:
+                imagePath, imageData = results.get_nowait()
+            except Queue.Empty:
+                break
+            remaining -= 1
+            if isinstance(imageData, Exception):
+                self.warn("Unable to preload image %s: %s", imagePath, imageData)
+                continue
+            try:
+                self._storeImage(self._makeImage(imagePath, imageData), imagePath)
+                loaded.append(imagePath)
+            except Exception as e:
+                self.warn("Unable to preload image %s: %s", imagePath, e)
+
+        if remaining > 0:
+            self.preloadImagesIds[results] = self.after(
+                self.PRELOAD_SPEED, self._buildPreloadedImages, results, remaining, loaded, callback)
+        else:
+            self.preloadImagesIds.pop(results, None)
+            if callback is not None: callback(loaded)
+
     def getImageDimensions(self, name):
         img = self.widgetManager.get(WIDGET_NAMES.Image, name).image
         return img.width(), img.height()
@@ -7534,7 +8075,7 @@ class gui(object):
     def _populateImage(self, name, image, internal=False):
         label = self.widgetManager.get(WIDGET_NAMES.Image, name)
 
-        if label.image is not None: label.image.animating = False
+        self._releaseAnimationFrames(label.image)
         label.config(image=image)
         label.config(anchor=CENTER, font=self._getContainerProperty('labelFont'))
         if not self.ttkFlag:
@@ -7542,12 +8083,8 @@ class gui(object):
         label.image = image  # keep a reference!
 
         if image.isAnimated:
-            anim_id = self.topLevel.after(
-                image.anim_speed + 100,
-                self._animateImage,
-                name,
-                True)
-            self.widgetManager.update(WIDGET_NAMES.AnimationID, name, anim_id)
+            image.frames.refs += 1
+            self._playAnimation(name, image)
 
         if not internal and label.hasMouseOver:
             leaveImg = label.image.path
@@ -7628,10 +8165,10 @@ class gui(object):
 
         self.widgetManager.add(WIDGET_NAMES.Image, name, label)
         self._positionWidget(label, row, column, colspan, rowspan)
+        self._trackImageVisibility(label)
         if img is not None and img.isAnimated:
-            anim_id = self.topLevel.after(
-                img.anim_speed, self._animateImage, name, True)
-            self.widgetManager.update(WIDGET_NAMES.AnimationID, name, anim_id)
+            img.frames.refs += 1
+            self._playAnimation(name, img)
 
     def setImageSize(self, name, width, height):
         img = self.widgetManager.get(WIDGET_NAMES.Image, name)
@@ -7652,22 +8189,36 @@ class gui(object):
     # size ...
     def shrinkImage(self, name, x, y=''):
         label = self.widgetManager.get(WIDGET_NAMES.Image, name)
-        image = label.image.subsample(x, y)
-
-        label.config(image=image)
-        label.config(anchor=CENTER, font=self._getContainerProperty('labelFont'))
-
-        if not self.ttkFlag:
-            label.config(background=self._getContainerBg())
-            label.config(width=image.width(), height=image.height())
-        label.modImage = image  # keep a reference!
+        image = label.image
+        self._showModImage(label,
+            self._getScaledImage(image, ("subsample", x, y), lambda: image.subsample(x, y)))
 
     # get every nth pixel (must be an integer)
     # 0 won't work, 1 will return the original size
     def growImage(self, name, x, y=''):
         label = self.widgetManager.get(WIDGET_NAMES.Image, name)
-        image = label.image.zoom(x, y)
+        image = label.image
+        self._showModImage(label,
+            self._getScaledImage(image, ("zoom", x, y), lambda: image.zoom(x, y)))
+
+    def fitImage(self, name, width, height, keepAspect=True, smooth=True):
+        """ scales an image to fit the specified size
+        scaled images are cached, so returning to a size is quick
+
+        :param name: the image to scale
+        :param width: the width to fit the image to
+        :param height: the height to fit the image to
+        :param keepAspect: keep the image's proportions, and fit it within the size
+        :param smooth: blend pixels together, otherwise use the nearest pixel
+        """
+        label = self.widgetManager.get(WIDGET_NAMES.Image, name)
+        image = label.image
+        if keepAspect:
+            width, height = self._fitImageSize(image, width, height)
+        self._showModImage(label, self._scaleImage(image, width, height, smooth))
 
+    # internal function to show a scaled image in a label, without replacing its image
+    def _showModImage(self, label, image):
         label.config(image=image)
         label.config(anchor=CENTER, font=self._getContainerProperty('labelFont'))
 
@@ -7676,7 +8227,80 @@ class gui(object):
             label.config(width=image.width(), height=image.height())
         label.modImage = image  # keep a reference!
 
+    # works out the largest size that fits in the space, keeping the image's proportions
+    # or the smallest size that covers the space
+    @staticmethod
+    def _fitImageSize(image, width, height, cover=False):
+        imgWidth, imgHeight = image.width(), image.height()
+        if cover:
+            ratio = max(width / float(imgWidth), height / float(imgHeight))
+        else:
+            ratio = min(width / float(imgWidth), height / float(imgHeight))
+        return max(int(round(imgWidth * ratio)), 1), max(int(round(imgHeight * ratio)), 1)
+
+    # internal function to get a scaled copy of an image
+    def _scaleImage(self, image, width, height, smooth=True):
+        if width == image.width() and height == image.height():
+            return image
+        return self._getScaledImage(image, (width, height, smooth),
+            lambda: self._buildScaledImage(image, width, height, smooth))
+
+    # gets a scaled image from the cache, or builds & caches it
+    # the cache is keyed on the image's path, and how it was scaled
+    def _getScaledImage(self, image, key, build):
+        if image.path is None:
+            # nothing to identify the image by
+            return build()
+
+        key = (image.path,) + key
+        cache = self.widgetManager.group(WIDGET_NAMES.ScaledImageCache)
+        scaled = cache.pop(key, None)
+        if scaled is None or scaled.modTime != image.modTime:
+            scaled = build()
+            scaled.modTime = image.modTime
+            # only keep the most recently used images
+            while len(cache) >= self.SCALED_CACHE_SIZE:
+                del cache[next(iter(cache))]
+
+        self.widgetManager.update(WIDGET_NAMES.ScaledImageCache, key, scaled)
+        return scaled
+
+    def _buildScaledImage(self, image, width, height, smooth):
+        imgWidth, imgHeight = image.width(), image.height()
+
+        # tk can zoom & subsample by whole numbers, and keeps the transparency
+        if not smooth and width % imgWidth == 0 and height % imgHeight == 0:
+            return image.zoom(width // imgWidth, height // imgHeight)
+        elif not smooth and imgWidth % width == 0 and imgHeight % height == 0:
+            return image.subsample(imgWidth // width, imgHeight // height)
+
+        self._loadImagescale()
+        if imagescale is False:
+            raise Exception("imagescale library not found, unable to scale image: " + str(image.path))
+
+        data, transparent = self._getImagePixels(image)
+        mask = imagescale.runsToMask(transparent, imgWidth, imgHeight) if len(transparent) > 0 else None
+        data, mask = imagescale.scalePpm(data, width, height, smooth, mask)
+        scaled = self._makeImage(image.path, (data, [] if mask is None else imagescale.maskToRuns(mask, width)))
+        scaled.path = image.path
+        scaled.isAnimated = False
+        scaled.animating = False
+        return scaled
+
+    # internal function to get an image's pixels as PPM data, and a list of runs of transparent pixels
+    def _getImagePixels(self, image):
+        if image.path is not None and image.path.lower().endswith(".png"):
+            # tk won't give us the transparent pixels, so read them from the file
+            self._importPngimagetk()
+            return PngImageTk.toPpm(image.path)
+        return image.tk.call(image.name, "data", "-format", "ppm"), []
+
     def convertJpgToBmp(self, image):
+        return PhotoImage(data=self._decodeJpg(image))
+
+    # internal function to decode a jpeg file into PPM data
+    # doesn't use tk, so can be called from a worker thread
+    def _decodeJpg(self, image):
         self._loadNanojpeg()
         if nanojpeg is False:
             raise Exception(
@@ -7684,65 +8308,112 @@ class gui(object):
         elif sys.version_info < (2, 7):
             raise Exception(
                 "JPG images only supported in python 2.7+: " + image)
+        elif self.decodeLock is not None:
+            # nanojpeg keeps its state in globals
+            with self.decodeLock:
+                return self._runNanojpeg(image)
         else:
-            # read the image into an array of bytes
-            with open(image, 'rb') as inFile:
-                buf = array.array(str('B'), inFile.read())
+            return self._runNanojpeg(image)
 
-            # init the translator, and decode the array of bytes
-            nanojpeg.njInit()
-            nanojpeg.njDecode(buf, len(buf))
+    def _runNanojpeg(self, image):
+        # read the image into an array of bytes
+        with open(image, 'rb') as inFile:
+            buf = array.array(str('B'), inFile.read())
 
-            # determine a file name & type
-            if nanojpeg.njIsColor():
-#                fileName = image.split('.jpg', 1)[0] + '.ppm'
-                param = 6
-            else:
-#                fileName = image.split('.jpg', 1)[0] + '.pgm'
-#                fileName = "test3.pgm"
-                param = 5
-
-            # create a string, starting with the header
-            val = "P%d\n%d %d\n255\n" % (
-                param, nanojpeg.njGetWidth(), nanojpeg.njGetHeight())
-            # append the bytes, converted to chars
-            val = str(val) + str('').join(map(chr, nanojpeg.njGetImage()))
-
-            # release any stuff
-            nanojpeg.njDone()
-
-            photo = PhotoImage(data=val)
-            return photo
-
-            # write the chars to a new file, if python3 we need to encode them first
-#            with open(fileName, "wb") as outFile:
-#                  if sys.version_info[0] == 2: outFile.write(val)
-#                  else: outFile.write(val.encode('ISO-8859-1'))
+        # init the translator, and decode the array of bytes
+        nanojpeg.njInit()
+        nanojpeg.njDecode(buf, len(buf))
+
+        # determine a file name & type
+        if nanojpeg.njIsColor():
+#            fileName = image.split('.jpg', 1)[0] + '.ppm'
+            param = 6
+        else:
+#            fileName = image.split('.jpg', 1)[0] + '.pgm'
+#            fileName = "test3.pgm"
+            param = 5
+
+        # create the header
+        header = ("P%d\n%d %d\n255\n" % (
+            param, nanojpeg.njGetWidth(), nanojpeg.njGetHeight())).encode("ascii")
+        # append the decoded bytes, in a single copy
+        if PYTHON2:
+            val = header + bytes(nanojpeg.njGetImage())
+        else:
+            val = b"".join((header, nanojpeg.njGetImage()))
+
+        # release any stuff
+        nanojpeg.njDone()
+
+        return val
+
+        # write the chars to a new file, if python3 we need to encode them first
+#        with open(fileName, "wb") as outFile:
+#              if sys.version_info[0] == 2: outFile.write(val)
+#              else: outFile.write(val.encode('ISO-8859-1'))
 #
-#            return fileName
+#        return fileName
 
     # function to set a background image
     # make sure this is done before everything else, otherwise it will cover
     # other widgets
-    def setBgImage(self, image):
+    # if fit is True, the image will be scaled to fill the window, whenever it's resized
+    def setBgImage(self, image, fit=False):
         image = self._getImage(image, False, False)  # make sure it's not using the cache
         # self.containerStack[0]['container'].config(image=image) # window as a
         # label doesn't work...
         self.bgLabel.config(image=image)
+        self.bgLabel.modImage = None
         self.containerStack[0]['container'].image = image  # keep a reference!
 
+        self._stopBgResize()
+        if fit:
+            self.bgResizeBinding = self.bgLabel.bind("<Configure>", self._bgImageConfigured, add="+")
+            self.resizeBgImage()
+
     def removeBgImage(self):
+        self._stopBgResize()
         self.bgLabel.config(image="")
+        self.bgLabel.modImage = None
         # self.containerStack[0]['container'].config(image=None) # window as a
         # label doesn't work...
         # remove the reference - shouldn't be cached
         self.containerStack[0]['container'].image = None
 
     def resizeBgImage(self):
-        if self.containerStack[0]['container'].image is None:
+        """ scales the background image to fill the window, keeping its proportions """
+        self.bgResizeId = None
+        image = getattr(self.containerStack[0]['container'], "image", None)
+        if image is None:
             return
-        else:
-            pass
+
+        width, height = self.bgLabel.winfo_width(), self.bgLabel.winfo_height()
+        if width <= 1 or height <= 1:
+            return # not drawn yet
+
+        width, height = self._fitImageSize(image, width, height, cover=True)
+        scaled = self._scaleImage(image, width, height)
+        self.bgLabel.config(image=scaled)
+        self.bgLabel.modImage = scaled  # keep a reference!
+
+    # called every time the window changes size
+    # waits for the changes to stop, before scaling the background
+    def _bgImageConfigured(self, event=None):
+        if self.bgResizeId is not None:
+            self.topLevel.after_cancel(self.bgResizeId)
+        self.bgResizeId = self.topLevel.after(self.BG_RESIZE_SPEED, self.resizeBgImage)
+
+    def _stopBgResize(self):
+        if self.bgResizeBinding is not None:
+            # unbind() would remove every <Configure> binding, so only remove our script
+            script = self.bgLabel.bind("<Configure>")
+            script = "\n".join(line for line in script.split("\n") if self.bgResizeBinding not in line)
+            self.bgLabel.tk.call("bind", self.bgLabel._w, "<Configure>", script)
+            self.bgLabel.deletecommand(self.bgResizeBinding)
+            self.bgResizeBinding = None
+        if self.bgResizeId is not None:
+            self.topLevel.after_cancel(self.bgResizeId)
+            self.bgResizeId = None
 
 #####################################
 # FUNCTION to play sounds
@@ -7981,6 +8652,9 @@ class gui(object):
         selected = kwargs.pop("selected", None)
         first = kwargs.pop("first", False)
         callFunction = kwargs.pop("callFunction", True)
+        virtual = kwargs.pop("virtual", False)
+        length = kwargs.pop("length", None)
+        getItem = kwargs.pop("getItem", None)
 
         # select=select, deselect=??, toggle=??, clear=??, rename=set, replace=update, delete=remove
         if value is None: mode = 'get'
@@ -8035,7 +8709,11 @@ class gui(object):
             listBox = self.getListBox(title)
         else: # new widget
             kwargs = self._parsePos(kwargs.pop("pos", []), kwargs)
-            listBox = self._listBoxMaker(title, value, *args, **kwargs)
+            if virtual or getItem is not None:
+                listBox = self._listBoxMaker(title, None, *args, virtual=True, **kwargs)
+                self.setVirtualListBox(title, value, length, getItem)
+            else:
+                listBox = self._listBoxMaker(title, value, *args, **kwargs)
 
         if rows is not None: self.setListBoxRows(title, rows)
         if multi: self.setListBoxMulti(title)
@@ -8047,20 +8725,27 @@ class gui(object):
 
         return listBox
 
-    def _listBoxMaker(self, name, values=None, row=None, column=0, colspan=0, rowspan=0, **kwargs):
+    def _listBoxMaker(self, name, values=None, row=None, column=0, colspan=0, rowspan=0, virtual=False, **kwargs):
         """ internal wrapper to hide kwargs from original add functions """
+        if virtual: return self.addVirtualListBox(name, None, row, column, colspan, rowspan)
         return self.addListBox(name, values, row, column, colspan, rowspan)
 
-    def addListBox(self, name, values=None, row=None, column=0, colspan=0, rowspan=0):
-        ''' adds a list box, with the the specified list of values '''
+    def addListBox(self, name, values=None, row=None, column=0, colspan=0, rowspan=0, virtual=False):
+        ''' adds a list box, with the the specified list of values
+            set virtual to True to only put the visible rows in the list box, see addVirtualListBox() '''
         self.widgetManager.verify(WIDGET_NAMES.ListBox, name)
         container = self.makeListBoxContainer()(self.getContainer())
         vscrollbar = AutoScrollbar(container)
         hscrollbar = AutoScrollbar(container, orient=HORIZONTAL)
 
-        container.lb = Listbox(container,
-            yscrollcommand=vscrollbar.set,
-            xscrollcommand=hscrollbar.set)
+        if virtual:
+            container.lb = AjVirtualListBox(container,
+                scrollbar=vscrollbar,
+                xscrollcommand=hscrollbar.set)
+        else:
+            container.lb = AjListBox(container,
+                yscrollcommand=vscrollbar.set,
+                xscrollcommand=hscrollbar.set)
 
         vscrollbar.grid(row=0, column=1, sticky=N + S)
         hscrollbar.grid(row=1, column=0, sticky=E + W)
@@ -8077,14 +8762,34 @@ class gui(object):
         self.widgetManager.add(WIDGET_NAMES.ListBox, name, container.lb)
 
         container.lb.DEFAULT_TEXT=""
-        if values is not None:
+        if virtual:
+            container.lb.setData(values)
+        elif values is not None:
             container.lb.DEFAULT_TEXT='\n'.join(str(x) for x in values)
-            for name in values:
-                container.lb.insert(END, name)
+            if len(values) > 0:
+                container.lb.insert(END, *values)
 
         self._positionWidget(container, row, column, colspan, rowspan)
         return container.lb
 
+    def addVirtualListBox(self, name, values=None, row=None, column=0, colspan=0, rowspan=0, length=None, getItem=None):
+        ''' adds a list box for very long lists, only the visible rows are put in the list box
+            the items come from values, a sequence, or from calling getItem(position) for positions up to length
+            the other list box functions work as normal, except those that add, remove or change items '''
+        lb = self.addListBox(name, None, row, column, colspan, rowspan, virtual=True)
+        self.setVirtualListBox(name, values, length, getItem)
+        return lb
+
+    def setVirtualListBox(self, title, values=None, length=None, getItem=None):
+        ''' changes the items shown in a virtual list box, see addVirtualListBox()
+            length can also be a function, returning the number of items '''
+        lb = self.widgetManager.get(WIDGET_NAMES.ListBox, title)
+        lb.setData(values, length, getItem)
+
+    def refreshVirtualListBox(self, title):
+        ''' redraws a virtual list box, after its items have changed '''
+        self.widgetManager.get(WIDGET_NAMES.ListBox, title).refresh()
+
     # enable multiple listboxes to be selected at the same time
     def setListBoxGroup(self, name, group=True):
         lb = self.widgetManager.get(WIDGET_NAMES.ListBox, name)
@@ -8163,14 +8868,52 @@ class gui(object):
         return True
 
     # replace the list items in the list box
+    # only the items between the first & last differences are replaced
     def updateListBox(self, title, items, select=False, callFunction=True):
-        self.clearListBox(title, callFunction=callFunction)
-        self.addListItems(title, items, select=select)
+        lb = self.widgetManager.get(WIDGET_NAMES.ListBox, title)
+        if isinstance(lb, AjVirtualListBox):
+            lb.setData(items)
+            if select and len(items) > 0:
+                self.selectListItemAtPos(title, len(items) - 1)
+            if callFunction and hasattr(lb, 'cmd'):
+                lb.cmd()
+            return
+
+        items = list(items)
+        current = lb.get(0, END)
+        lb.selection_clear(0, END)
+
+        # skip the items that haven't changed, at the start & end of the list
+        start = 0
+        length = min(len(current), len(items))
+        while start < length and current[start] == items[start]:
+            start += 1
+        end = 0
+        while end < length - start and current[-1 - end] == items[-1 - end]:
+            end += 1
+
+        if start < len(current) - end:
+            lb.delete(start, len(current) - end - 1)
+        if start < len(items) - end:
+            lb.insert(start, *items[start:len(items) - end])
+
+        # show & select the last item
+        if select and len(items) > 0:
+            self.selectListItemAtPos(title, len(items) - 1)
+        if callFunction and hasattr(lb, 'cmd'):
+            lb.cmd()
 
     def addListItems(self, title, items, select=True):
-        ''' adds the list of items to the specified list box '''
-        for i in items:
-            self.addListItem(title, i, select=select)
+        ''' adds the list of items to the end of the specified list box, in one go '''
+        lb = self.widgetManager.get(WIDGET_NAMES.ListBox, title)
+        items = list(items)
+        if len(items) == 0: return
+        lb.insert(END, *items)
+
+        # show & select the last item added
+        if select:
+            lb.selection_clear(0, END)
+            self.selectListItemAtPos(title, lb.size() - 1)
 
     def addListItem(self, title, item, pos=None, select=True):
         ''' add the item to the end of the specified list box '''
@@ -8225,9 +8968,8 @@ class gui(object):
 
     def removeListItemAtPos(self, title, pos):
         lb = self.widgetManager.get(WIDGET_NAMES.ListBox, title)
-        items = lb.get(0, END)
-        if pos >= len(items):
-            raise Exception("Invalid position: " + str(pos) + " must be between 0 and " + str(len(items)-1))
+        if pos >= lb.size():
+            raise Exception("Invalid position: " + str(pos) + " must be between 0 and " + str(lb.size()-1))
         lb.delete(pos)
 
         # show & select this item
@@ -8250,8 +8992,7 @@ class gui(object):
 
     def setListItemAtPos(self, title, pos, newVal):
         lb = self.widgetManager.get(WIDGET_NAMES.ListBox, title)
-        lb.delete(pos)
-        lb.insert(pos, newVal)
+        lb.setItem(pos, newVal)
 
     def setListItem(self, title, item, newVal, first=False):
         for pos in self._getListPositions(title, item):
@@ -8272,12 +9013,7 @@ class gui(object):
         lb = self.widgetManager.get(WIDGET_NAMES.ListBox, title)
         if not isinstance(item, list):
             item = [item]
-        vals = lb.get(0, END)
-        positions = []
-        for pos, val in enumerate(vals):
-            if val in item:
-                positions.append(pos)
-        return positions
+        return lb.getPositions(item)
 
     def setListItemBg(self, title, item, col):
         for pos in self._getListPositions(title, item):
@@ -8290,7 +9026,8 @@ class gui(object):
     def clearListBox(self, title, callFunction=True):
         lb = self.widgetManager.get(WIDGET_NAMES.ListBox, title)
         lb.selection_clear(0, END)
-        lb.delete(0, END)  # clear
+        if isinstance(lb, AjVirtualListBox): lb.setData()
+        else: lb.delete(0, END)  # clear
         if callFunction and hasattr(lb, 'cmd'):
             lb.cmd()
 
@@ -9171,13 +9908,20 @@ class gui(object):
         disabled = kwargs.pop("disabled", False)
         tag = kwargs.pop("tag", None)
         tags = kwargs.pop("tags", [])
+        log = kwargs.pop("log", None)
+        fileName = kwargs.pop("file", None)
 
         try: self.widgetManager.verify(WIDGET_NAMES.TextArea, title)
         except: # widget exists
-            text = self.getTextArea(title)
+            # getting the text flushes a log, so don't get it when a line's being logged
+            if value is not None and self.widgetManager.get(WIDGET_NAMES.TextArea, title).logLines is not None:
+                text = None
+            else:
+                text = self.getTextArea(title)
         else: # new widget
             kwargs = self._parsePos(kwargs.pop("pos", []), kwargs)
-            if scroll: text = self._textMaker(title, "scroll", *args, **kwargs)
+            if fileName is not None: text = self._textMaker(title, "file", *args, **kwargs)
+            elif scroll: text = self._textMaker(title, "scroll", *args, **kwargs)
             else: text = self._textMaker(title, "text", *args, **kwargs)
             callFunction = False
 
@@ -9185,6 +9929,13 @@ class gui(object):
         for _tag in tags:
             self.textAreaCreateTag(title, _tag[0], **_tag[1])
 
+        if log is not None:
+            # turning log mode on flushes & trims the log, so only do it if it's changed
+            ta = self.widgetManager.get(WIDGET_NAMES.TextArea, title)
+            logLines = ta.LOG_LINES if log is True else log or None
+            if logLines != ta.logLines: self.setTextAreaLog(title, log)
+        if fileName is not None: self.setTextAreaFile(title, fileName)
+
         if replace: self.clearTextArea(title)
         if value is not None: self.setTextArea(title, value, end=end, callFunction=callFunction, tag=tag)
         if disabled: self.disableTextArea(title)
@@ -9195,22 +9946,26 @@ class gui(object):
     def _textMaker(self, title, kind="text", row=None, column=0, colspan=0, rowspan=0, *args, **kwargs):
         if kind == "scroll": return self.addScrolledTextArea(title, row, column, colspan, rowspan)
         elif kind == "text": return self.addTextArea(title, row, column, colspan, rowspan)
+        elif kind == "file": return self.addFileTextArea(title, None, row, column, colspan, rowspan)
 
-    def _buildTextArea(self, title, frame, scrollable=False):
+    def _buildTextArea(self, title, frame, scrollable=False, fileView=False):
         """ Internal wrapper, used for building TextAreas.
 
         :param title: the key used to reference this TextArea
         :param frame: this should be a container, used as the parent for the OptionBox
         :param scrollable: the key used to reference this TextArea
+        :param fileView: build a read-only TextArea, for showing large files
         :returns: the created TextArea
         :raises ItemLookupError: if the title is already in use
         """
         self.widgetManager.verify(WIDGET_NAMES.TextArea, title)
-        if scrollable:
+        if fileView:
+            text = AjFileView(frame)
+        elif scrollable:
             text = AjScrolledText(frame)
         else:
             text = AjText(frame)
-        text.config(width=20, height=10, undo=True, wrap=WORD)
+        text.config(width=20, height=10, undo=not fileView, wrap=WORD)
 
         if not self.ttkFlag:
             if self.platform in [self.MAC, self.LINUX]:
@@ -9254,6 +10009,46 @@ class gui(object):
         if text is not None: self.setTextArea(title, text, callFunction=False)
         return txt
 
+    def addFileTextArea(self, title, fileName=None, row=None, column=0, colspan=0, rowspan=0, encoding="utf-8"):
+        """ Adds a read-only TextArea, for showing files too big to load into a TextArea
+        The file is memory mapped, and only the lines being shown are read
+        Other TextArea functions only see the lines currently loaded
+
+        :param title: the key used to reference this TextArea
+        :param fileName: the file to show, see setTextAreaFile()
+        :returns: the created TextArea
+        :raises ItemLookupError: if the title is already in use
+        """
+        txt = self._buildTextArea(title, self.getContainer(), fileView=True)
+        self._positionWidget(txt, row, column, colspan, rowspan, N+E+S+W)
+        if fileName is not None: self.setTextAreaFile(title, fileName, encoding)
+        return txt
+
+    def setTextAreaFile(self, title, fileName, encoding="utf-8"):
+        """ Shows the file in a TextArea made by addFileTextArea()
+        The first lines are shown straight away, the rest are counted in the background
+
+        :param title: the TextArea to change
+        :param fileName: the file to show
+        :param encoding: the file's encoding, any invalid characters are replaced
+        :raises ItemLookupError: if the title can't be found
+        """
+        ta = self.widgetManager.get(WIDGET_NAMES.TextArea, title)
+        if not isinstance(ta, AjFileView):
+            raise Exception("TextArea " + title + " can't show files, it must be added with addFileTextArea()")
+        self._loadLineIndex()
+        if lineindex is False:
+            raise Exception("Unable to show files - file views not available.")
+
+        self._loadThreading()
+        ta.openFile(fileName, encoding, threaded=Queue is not False)
+        if Queue is not False:
+            self.thread(ta.lines.build)
+
+    def showTextAreaLine(self, title, line):
+        """ scrolls a TextArea made by addFileTextArea(), so the line (counting from 0) is at the top """
+        self.widgetManager.get(WIDGET_NAMES.TextArea, title).showLine(line)
+
     def getTextArea(self, title):
         """ Gets the text in the specified TextArea
 
@@ -9293,6 +10088,17 @@ class gui(object):
         ta = self.widgetManager.get(WIDGET_NAMES.TextArea, title)
         ta.highlightPattern(pattern, tag, regexp=regexp)
 
+    def addTextAreaHighlight(self, title, tag, pattern, regexp=False, nocase=False):
+        """ keeps the tag applied to the pattern, as the text is edited
+            visible lines are highlighted first, the rest in the background """
+        ta = self.widgetManager.get(WIDGET_NAMES.TextArea, title)
+        ta.addHighlight(tag, pattern, regexp=regexp, nocase=nocase)
+
+    def removeTextAreaHighlight(self, title, tag):
+        """ stops highlighting the tag, and removes it from the text """
+        ta = self.widgetManager.get(WIDGET_NAMES.TextArea, title)
+        ta.removeHighlight(tag)
+
     def textAreaTagRange(self, title, tag, start, end=END):
         """ applies the tag to the specified range """
         ta = self.widgetManager.get(WIDGET_NAMES.TextArea, title)
@@ -9369,6 +10175,32 @@ class gui(object):
             ta.mark_set("insert", pos)
             return pos
 
+    def getTextAreaMatches(self, title, pattern, regexp=False, nocase=True):
+        """ returns a list of the (start, end) positions of every match in the text area
+            the matches are remembered until the text is edited, so the same search is instant """
+        ta = self.widgetManager.get(WIDGET_NAMES.TextArea, title)
+        return ta.findAll(pattern, regexp=regexp, nocase=nocase)
+
+    def countTextAreaMatches(self, title, pattern, regexp=False, nocase=True):
+        """ returns how many times the pattern matches in the text area """
+        ta = self.widgetManager.get(WIDGET_NAMES.TextArea, title)
+        return ta.countMatches(pattern, regexp=regexp, nocase=nocase)
+
+    def nextTextAreaMatch(self, title, pattern, regexp=False, nocase=True, backwards=False):
+        """ will find and highlight the next match after the cursor, or the previous match if backwards
+            wraps around the text, returning the position, or None if there are no matches """
+        ta = self.widgetManager.get(WIDGET_NAMES.TextArea, title)
+        match = ta.findMatch(pattern, INSERT, regexp=regexp, nocase=nocase, backwards=backwards)
+        ta.focus_set()
+        if match is None:
+            return None
+        else:
+            ta.see(match[0])
+            ta.tag_remove(SEL, "1.0", END)
+            ta.tag_add(SEL, *match)
+            ta.mark_set("insert", match[0])
+            return match[0]
+
     def getTextAreaTag(self, title, tag):
         """ returns all details about the specified tag """
         ta = self.widgetManager.get(WIDGET_NAMES.TextArea, title)
@@ -9394,6 +10226,9 @@ class gui(object):
         :raises ItemLookupError: if the title can't be found
         """
         ta = self.widgetManager.get(WIDGET_NAMES.TextArea, title)
+        if end and ta.logLines is not None:
+            ta.appendLog(text)
+            return
 
         ta.pauseCallFunction(callFunction)
         # in case it's disabled
@@ -9422,6 +10257,8 @@ class gui(object):
         :raises ItemLookupError: if the title can't be found
         """
         ta = self.widgetManager.get(WIDGET_NAMES.TextArea, title)
+        ta.stopLog()
+        ta.logBuffer = []
         ta.pauseCallFunction(callFunction)
         # in case it's disabled
         _state = ta.cget('state')
@@ -9430,6 +10267,12 @@ class gui(object):
         ta.config(state=_state)
         ta.resumeCallFunction()
 
+    def setTextAreaLog(self, title, maxLines=True):
+        ''' turns the TextArea into a log, set maxLines to False to turn it back
+            text added to the end is added in batches, a few times a second, and only the last maxLines lines are kept
+            it only scrolls to the new text, if the end of the text is showing '''
+        self.widgetManager.get(WIDGET_NAMES.TextArea, title).setLog(maxLines)
+
     def clearAllTextAreas(self, callFunction=False):
         """ Convenience function to clear all TextAreas in the GUI
         Will simply call clearTextArea on each TextArea
@@ -9446,34 +10289,45 @@ class gui(object):
         ta.tag_add(SEL, start, end)
 
     def logTextArea(self, title):
-        """ Creates an md5 hash - can be used later to check if the TextArea has changed
-        The hash is stored in the widget
+        """ Remembers the TextArea's edit generation - can be used later to check if the TextArea has changed
+        The generation is stored in the widget
 
-        :param title: the TextArea to hash
+        :param title: the TextArea to log
         :returns: None
         :raises ItemLookupError: if the title can't be found
         """
-        self._loadHashlib()
-        if hashlib is False:
-            self.warn("Unable to log TextArea, hashlib library not available")
-        else:
-            text = self.widgetManager.get(WIDGET_NAMES.TextArea, title)
-            text.__hash = text.getTextAreaHash()
+        text = self.widgetManager.get(WIDGET_NAMES.TextArea, title)
+        text.loggedGeneration = text.getGeneration()
 
     def textAreaChanged(self, title):
-        """ Creates a temporary md5 hash - and compares it with a previously generated & stored hash
-        The previous hash has to be generated manually, by calling logTextArea
+        """ Compares the TextArea's edit generation with the one stored by logTextArea
+        Any edit counts as a change, even if it's later undone
 
-        :param title: the TextArea to hash
+        :param title: the TextArea to check
         :returns: bool - True if the TextArea has changed or False if it hasn't
         :raises ItemLookupError: if the title can't be found
         """
-        self._loadHashlib()
-        if hashlib is False:
-            self.warn("Unable to log TextArea, hashlib library not available")
-        else:
-            text = self.widgetManager.get(WIDGET_NAMES.TextArea, title)
-            return text.__hash != text.getTextAreaHash()
+        text = self.widgetManager.get(WIDGET_NAMES.TextArea, title)
+        return text.getGeneration() != text.loggedGeneration
+
+    def trackTextAreaChanges(self, title):
+        """ Starts keeping track of which lines of the TextArea are changed, see getTextAreaChanges
+
+        :param title: the TextArea to track
+        :returns: None
+        :raises ItemLookupError: if the title can't be found
+        """
+        self.widgetManager.get(WIDGET_NAMES.TextArea, title).trackChanges()
+
+    def getTextAreaChanges(self, title, clear=True):
+        """ Gets the lines changed since trackTextAreaChanges, or since the changes were last cleared
+
+        :param title: the TextArea to check
+        :param clear: whether to forget the changes, once they've been got
+        :returns: a list of (start, end) indexes, each covering whole lines
+        :raises ItemLookupError: if the title can't be found
+        """
+        return self.widgetManager.get(WIDGET_NAMES.TextArea, title).getChanges(clear)
 
 #####################################
 # FUNCTIONS to add Tree Widgets
@@ -9489,6 +10343,8 @@ class gui(object):
         editable = kwargs.pop("editable", None)
         showAttr = kwargs.pop("attributes", None)
         showMenu = kwargs.pop("menu", None)
+        lazy = kwargs.pop("lazy", False)
+        children = kwargs.pop("children", None)
 
         fg = kwargs.pop("fg", None)
         bg = kwargs.pop("bg", None)
@@ -9500,7 +10356,10 @@ class gui(object):
             tree = self.getTree(title)
         else: # new widget
             kwargs = self._parsePos(kwargs.pop("pos", []), kwargs)
-            tree = self.addTree(title, value, *args, **kwargs)
+            if lazy or children is not None:
+                tree = self.addLazyTree(title, value, children, *args, **kwargs)
+            else:
+                tree = self.addTree(title, value, *args, **kwargs)
 
         if len(kwargs) > 0:
             self._configWidget(title, widgKind, **kwargs)
@@ -9516,8 +10375,11 @@ class gui(object):
         return tree
 
     def addTree(self, title, data, row=None, column=0, colspan=0, rowspan=0):
-        ''' adds a navigatable tree, displaying the specified xml text '''
+        ''' adds a navigatable tree, displaying the specified xml text
+            file names & streams are read as they're shown, see addLazyTree() '''
         self.widgetManager.verify(WIDGET_NAMES.Tree, title)
+        if hasattr(data, "read") or (isinstance(data, UNIVERSAL_STRING) and "<" not in data):
+            return self.addLazyTree(title, data, None, row, column, colspan, rowspan)
         self._importAjtree()
         if parseString is False:
             self.warn("Unable to parse xml files. .addTree() not available")
@@ -9528,12 +10390,38 @@ class gui(object):
         else:
             pass # assume xml object
             
-        return self._buildTree(title, data, row, column, colspan, rowspan)
+        return self._buildTree(title, self._makeAjTreeData()(data), row, column, colspan, rowspan)
 
-    def _buildTree(self, title, xmlDoc, row=None, column=0, colspan=0, rowspan=0):
-        self.widgetManager.verify(WIDGET_NAMES.Tree, title)
+    def addLazyTree(self, title, data, getChildren=None, row=None, column=0, colspan=0, rowspan=0):
+        """ Adds a tree that only reads the nodes being shown
+        Children are read when their parent is expanded, and shown a page at a time
 
-        frame = ScrollPane(
+        :param title: the key used to reference this tree
+        :param data: XML text, a file name or stream of XML, or the root node to pass to getChildren
+        :param getChildren: a function that's passed a node, and returns an iterable of its children
+            nodes are shown as text, and passed to click functions as their id
+        :returns: the created tree
+        :raises ItemLookupError: if the title is already in use
+        """
+        self.widgetManager.verify(WIDGET_NAMES.Tree, title)
+        self._importAjtree()
+        self._loadLazyTree()
+        if TreeNode is False or lazytree is False:
+            self.warn("Unable to load trees. .addLazyTree() not available")
+            return
+
+        if getChildren is not None:
+            source = lazytree.CallbackSource(data, getChildren)
+        else:
+            source = lazytree.openXml(data)
+
+        treeData = self._makeAjLazyTreeData()(source.root, source)
+        return self._buildTree(title, treeData, row, column, colspan, rowspan)
+
+    def _buildTree(self, title, treeData, row=None, column=0, colspan=0, rowspan=0):
+        self.widgetManager.verify(WIDGET_NAMES.Tree, title)
+
+        frame = ScrollPane(
             self.getContainer(),
             relief=RAISED,
             borderwidth=2,
@@ -9542,11 +10430,10 @@ class gui(object):
             takefocus=1)
         self._positionWidget(frame, row, column, colspan, rowspan, "NSEW")
 
-        treeData = self._makeAjTreeData()(xmlDoc)
-        gui.trace("TreeData populated: %s", title)
-
         treeNode = self._makeAjTreeNode()(frame.getPane(), None, treeData)
         gui.trace("TreeNode created: %s", title)
+        # lazy trees keep their file open, until the tree is removed
+        frame.getPane().bind("<Destroy>", lambda e: treeData.close(), add="+")
 
         self.widgetManager.add(WIDGET_NAMES.Tree, title, treeNode)
         # update() & expand() called in go() function
@@ -9619,7 +10506,21 @@ class gui(object):
     # get whole tree as XML
     def getTreeXML(self, title):
         tree = self.widgetManager.get(WIDGET_NAMES.Tree, title)
-        return tree.item.node.toxml()
+        return tree.item.toxml()
+
+    def saveTreeXML(self, title, fileName):
+        """ Saves a tree's XML, including any edits, to a file
+        The XML is written a piece at a time, rather than built as one string
+
+        :param title: the tree to save
+        :param fileName: the file to save to, this can't be the file a lazy tree is reading
+        :raises ItemLookupError: if the title can't be found
+        """
+        tree = self.widgetManager.get(WIDGET_NAMES.Tree, title)
+        self._loadLazyTree()
+        if lazytree is False:
+            raise Exception("Unable to save trees - lazy tree support not available.")
+        tree.item.save(fileName)
 
     # get selected node as a string
     def getTreeSelected(self, title):
@@ -9631,7 +10532,7 @@ class gui(object):
         tree = self.widgetManager.get(WIDGET_NAMES.Tree, title)
         item = tree.getSelected()
         if item is not None:
-            return item.node.toxml()
+            return item.toxml()
         else:
             return None
 
@@ -9721,6 +10622,8 @@ class gui(object):
         limit = kwargs.pop("limit", None)
         case = kwargs.pop("case", None)
         rows = kwargs.pop("rows", None)
+        match = kwargs.pop("match", None)
+        maxMatches = kwargs.pop("maxMatches", False)
         secret = kwargs.pop("secret", False)
         kind = kwargs.pop("kind", "standard").lower().strip()
         labBg = kwargs.pop("labBg", None)
@@ -9750,6 +10653,8 @@ class gui(object):
             if value is not None: self.setEntry(title, value)
         else:
             if rows is not None: self.setAutoEntryNumRows(title, rows)
+            if match is not None: self.setAutoEntryMode(title, match)
+            if maxMatches is not False: self.setAutoEntryMaxMatches(title, maxMatches)
 
         if labBg is not None and self.widgetManager.get(WIDGET_NAMES.Entry, title).isValidation:
             self.setValidationEntryLabelBg(title, labBg)
@@ -10129,6 +11034,22 @@ class gui(object):
         except AttributeError:
             gui.error("You can only change the number of rows in an AutoEntry, %s is not an AutoEntry.", title)
 
+    def setAutoEntryMode(self, title, mode):
+        ''' sets how an AutoEntry matches words: prefix (the default), substring or fuzzy '''
+        entry = self.widgetManager.get(WIDGET_NAMES.Entry, title)
+        try:
+            entry.setMode(mode)
+        except AttributeError:
+            gui.error("You can only change the mode of an AutoEntry, %s is not an AutoEntry.", title)
+
+    def setAutoEntryMaxMatches(self, title, maxMatches):
+        ''' sets the most words an AutoEntry will suggest, None for no limit '''
+        entry = self.widgetManager.get(WIDGET_NAMES.Entry, title)
+        try:
+            entry.setMaxMatches(maxMatches)
+        except AttributeError:
+            gui.error("You can only change the matches of an AutoEntry, %s is not an AutoEntry.", title)
+
     def _validateNumericEntry(self, action, index, value_if_allowed, prior_value, text, validation_type, trigger_type, widget_name):
         if action == "1":
             if str(text) in '0123456789.-+':
@@ -12010,8 +12931,7 @@ class gui(object):
 
             def __init__(self, words, tl, *args, **kwargs):
                 super(AutoCompleteEntry, self).__init__(*args, **kwargs)
-                self.allWords = words
-                self.allWords.sort()
+                self.words = AutoCompleteWords(words)
                 self.topLevel = tl
 
                 # store variable - so we can see when it changes
@@ -12044,32 +12964,28 @@ class gui(object):
                 super(AutoCompleteEntry, self).config(cnf, **kw)
 
             def removeWord(self, word):
-                if word in self.allWords:
-                    self.allWords.remove(word)
+                self.words.removeWord(word)
 
             def addWords(self, words):
-                if not hasattr(words, "__iter__"):
+                if isinstance(words, UNIVERSAL_STRING) or not hasattr(words, "__iter__"):
                     words = [words]
-                for word in words:
-                    if word not in self.allWords:
-                        self.allWords.append(word)
-                self.allWords.sort()
+                self.words.addWords(words)
 
             def changeWords(self, words):
-                self.allWords = words
-                self.allWords.sort()
+                self.words.changeWords(words)
 
             def setNumRows(self, rows):
                 self.rows = rows
 
-            # function to see if words match
-            def checkMatch(self, fieldValue, acListEntry):
-                pattern = re.compile(re.escape(fieldValue) + '.*', re.IGNORECASE)
-                return re.match(pattern, acListEntry)
+            def setMode(self, mode):
+                self.words.setMode(mode)
+
+            def setMaxMatches(self, maxMatches):
+                self.words.maxMatches = maxMatches
 
             # function to get all matches as a list
             def getMatches(self):
-                return [w for w in self.allWords if self.checkMatch(self.var.get(), w)]
+                return self.words.getMatches(self.var.get())
 
             # called when typed in entry
             def textChanged(self, name, index, mode):
@@ -12087,8 +13003,7 @@ class gui(object):
                     self.listbox.delete(0, END)
                     shownWords = self.getMatches()
                     if shownWords:
-                        for w in shownWords:
-                            self.listbox.insert(END, w)
+                        self.listbox.insert(END, *shownWords)
                         self.selectItem(0)
 
             # function to create & show an empty list box
@@ -12184,11 +13099,28 @@ class gui(object):
     # modify minidom - https://wiki.python.org/moin/MiniDom
     #####################################
     def _makeAjTreeNode(self):
+        # shown after a page of children, expanding it shows the next page
+        class AjTreeMore(TreeItem, object):
+            def GetText(self): return "..."
+            def IsExpandable(self): return True
+            def getAttributes(self): return None
+            def getAttribute(self, att='id'): return None
+            def toxml(self): return None
+
         class AjTreeNode(TreeNode, object):
+            # how many children are shown, before a node to show the next page
+            PAGE_SIZE = 200
+            # how many collapsed branches keep their children, the oldest are cleared
+            CACHE_SIZE = 20
 
             def __init__(self, canvas, parent, item):
                 super(AjTreeNode, self).__init__(canvas, parent, item)
 
+                # the children not shown yet, and the node to show them
+                self.pending = None
+                self.nextItem = None
+                self.moreNode = None
+
                 self.hasAttr = False
                 self.showAttr = False
                 self.bgColour = None
@@ -12209,6 +13141,7 @@ class gui(object):
                     # set this once, in parent
                     self.canvas.menu = None
                     self.canvas.lastSelected = None
+                    self.canvas.collapsed = []
 
                 self.menuBound = False
 
@@ -12295,13 +13228,74 @@ class gui(object):
                     c._updateColours(bgCol, bgHCol, fgCol, fgHCol)
 
             def draw(self, x, y):
+                # only make the first page of children
+                if self.state == 'expanded' and not self.children and self.pending is None:
+                    self.pending = iter(self.item._GetSubList())
+                    self._loadPage()
+                    if not self.children:
+                        self.state = 'collapsed'
                 cy = super(AjTreeNode, self).draw(x, y)
                 self._bindMenu()
                 return cy
 
+            # makes the next page of children, keeping one item to see if there are more
+            def _loadPage(self):
+                if self.moreNode is not None:
+                    self.children.remove(self.moreNode)
+                    try: self.moreNode.label.destroy()
+                    except AttributeError: pass
+                    self.moreNode.destroy()
+                    self.moreNode = None
+
+                items = [] if self.nextItem is None else [self.nextItem]
+                items.extend(islice(self.pending, self.PAGE_SIZE + 1 - len(items)))
+                self.nextItem = items.pop() if len(items) > self.PAGE_SIZE else None
+
+                for item in items:
+                    self.children.append(self.__class__(self.canvas, self, item))
+                if self.nextItem is not None:
+                    self.moreNode = self.__class__(self.canvas, self, AjTreeMore())
+                    self.children.append(self.moreNode)
+
+            def expand(self, event=None):
+                parent = self.parent
+                if parent is not None and self is parent.moreNode:
+                    parent._loadPage()
+                    parent.update()
+                    return
+                if self in self.canvas.collapsed:
+                    self.canvas.collapsed.remove(self)
+                super(AjTreeNode, self).expand(event)
+
+            def collapse(self, event=None):
+                # keep the children of recently collapsed branches, in case they're expanded again
+                if self.state != 'collapsed' and self.children:
+                    collapsed = self.canvas.collapsed
+                    collapsed.append(self)
+                    while len(collapsed) > self.CACHE_SIZE:
+                        collapsed.pop(0)._clearChildren()
+                super(AjTreeNode, self).collapse(event)
+
+            # the children are made again, a page at a time, the next time it's drawn
+            def destroy(self):
+                super(AjTreeNode, self).destroy()
+                if self in self.canvas.collapsed:
+                    self.canvas.collapsed.remove(self)
+                self.pending = self.nextItem = self.moreNode = None
+
+            # removes all the children, and their labels, they'll be made again if expanded
+            def _clearChildren(self):
+                for child in self.children:
+                    child._clearChildren()
+                    try: child.label.destroy()
+                    except AttributeError: pass
+                    child.destroy()
+                self.children = []
+                self.pending = self.nextItem = self.moreNode = None
+
             # override parent function, so that we can change the label's background colour
             def drawtext(self):
-                attr=self.item.node.attributes
+                attr=self.item.getAttributes()
                 self.hasAttr = self.showAttr and attr is not None and len(attr) > 0
 
                 if self.hasAttr:
@@ -12315,7 +13309,7 @@ class gui(object):
                 if ToolTip is not False and self.hasAttr:
                     text = "Attributes\n"
                     for key, val in attr.items():
-                        text += "  " + key + ":" + val + "\n"
+                        text += "  %s:%s\n" % (key, val)
                     text = text[:-1]
                     ToolTip(self.label, text, delay=500, follow_mouse=1)
                     ToolTip(self.canvas, text, specId=self.attrId, delay=500, follow_mouse=1)
@@ -12411,6 +13405,9 @@ class gui(object):
                 try: return self.node.attributes[att].value
                 except: return None
 
+            def getAttributes(self):
+                return self.node.attributes
+
             def IsEditable(self):
                 return self.canEdit and not self.node.hasChildNodes()
 
@@ -12431,11 +13428,15 @@ class gui(object):
                 prelist = [AjTreeData(node) for node in children]
                 itemList = [item for item in prelist if item.GetText().strip()]
                 for item in itemList:
-                    item.registerDblClick(self.treeTitle, self.dblClickFunc)
-                    item.registerClick(self.treeTitle, self.clickFunc)
-                    item.canEdit = self.canEdit
+                    self._inherit(item)
                 return itemList
 
+            # passes this item's settings to a child
+            def _inherit(self, item):
+                item.registerDblClick(self.treeTitle, self.dblClickFunc)
+                item.registerClick(self.treeTitle, self.clickFunc)
+                item.canEdit = self.canEdit
+
             def OnDoubleClick(self):
                 if self.IsEditable():
                     # TO DO: start editing this node...
@@ -12445,6 +13446,16 @@ class gui(object):
 
         #  EXTRA FUNCTIONS
 
+            def toxml(self):
+                return self.node.toxml()
+
+            def save(self, fileName):
+                lazytree.saveDom(self.node, fileName)
+
+            # nothing to close, the whole tree is in memory
+            def close(self):
+                pass
+
             # TODO: can only set before calling go()
             def setCanEdit(self, value=True):
                 self.canEdit = value
@@ -12474,6 +13485,58 @@ class gui(object):
                             gui.trace("%s >>>> %s", " "*spaces, val)
         return AjTreeData
 
+    def _makeAjLazyTreeData(self):
+        # container for data read on demand, from one of the sources in lazytree
+        class AjLazyTreeData(self._makeAjTreeData()):
+
+            def __init__(self, node, source):
+                super(AjLazyTreeData, self).__init__(node)
+                self.node = node
+                self.source = source
+                self.expandable = source.isExpandable(node)
+
+            def GetText(self):
+                return self.source.getText(self.node)
+
+            def getAttribute(self, att='id'):
+                return self.getAttributes().get(att)
+
+            def getAttributes(self):
+                return self.source.getAttributes(self.node)
+
+            def IsEditable(self):
+                return self.canEdit and self.source.isEditable(self.node)
+
+            def SetText(self, text):
+                self.source.setText(self.node, text)
+
+            def IsExpandable(self):
+                return self.expandable
+
+            # a generator, so children are only read as they're shown
+            def GetSubList(self):
+                found = False
+                for node in self.source.getChildren(self.node):
+                    found = True
+                    item = AjLazyTreeData(node, self.source)
+                    self._inherit(item)
+                    yield item
+                if not found:
+                    self.expandable = False
+
+            def toxml(self):
+                return self.source.getXml(self.node)
+
+            def save(self, fileName):
+                self.source.save(fileName)
+
+            # closes the source's file, the tree has no more children to read
+            def close(self):
+                self.source.close()
+                self.expandable = False
+
+        return AjLazyTreeData
+
 ############################################################################
 #### ******* ------ CLASS DEFINITIONS FROM HERE ------ *********** #########
 ############################################################################
@@ -13500,12 +14563,45 @@ class AutoScrollbar(Scrollbar, object):
 
 
 class TextParent(object):
+
+    # in log mode, how often the new text is added, in ms, and how many lines are kept by default
+    LOG_SPEED = 20
+    LOG_LINES = 10000
+    # how many lines are highlighted at a time, and how often
+    HIGHLIGHT_LINES = 500
+    HIGHLIGHT_SPEED = 1
+
     def _init(self):
         self.clearModifiedFlag()
         self.bind('<<Modified>>', self._beenModified)
         self.__hash = None
         self.callFunction = True
         self.oldCallFunction = True
+
+        # counts the edits, see getGeneration()
+        self.generation = 0
+        self.loggedGeneration = 0
+        # the Tcl command of the real text widget, when tracking changes
+        self.trackedCommand = None
+        # the tags added to changed lines
+        self.changeTags = []
+
+        # (tag, compiled pattern) of each highlight, kept up to date as the text changes
+        self.highlights = []
+        self.highlightId = None
+
+        # a copy of the text, the offset of each line in it, and the last search's matches
+        # kept until the text is edited, see _getSearchText()
+        self.searchText = None
+        self.searchGeneration = None
+        self.lineStarts = None
+        self.searchMatches = None
+
+        # log mode - the most lines to keep, None if not a log
+        self.logLines = None
+        # text waiting to be added
+        self.logBuffer = []
+        self.logId = None
         self.TAGS = ["UNDERLINE", "BOLD", "ITALIC", "BOLD_ITALIC"]
 
         # create default fonts, and assign to tags
@@ -13544,9 +14640,22 @@ class TextParent(object):
     def _beenModified(self, event=None):
         # stop recursive calls
         if self._resetting_modified_flag: return
-        self.clearModifiedFlag()
+        self._countEdits()
         self.beenModified(event)
 
+    # Tk sets the modified flag on every edit, and it's cleared each time it's counted
+    # so several edits, before the <<Modified>> event is handled, only count once
+    def _countEdits(self):
+        if self.tk.getboolean(self.tk.call(self._w, 'edit', 'modified')):
+            self.generation += 1
+            self.clearModifiedFlag()
+
+    def getGeneration(self):
+        ''' returns a number that changes whenever the text is edited '''
+        # edits whose <<Modified>> event hasn't been handled yet
+        self._countEdits()
+        return self.generation
+
     def bindChangeEvent(self, function):
         self.function = function
 
@@ -13564,8 +14673,252 @@ class TextParent(object):
             self._resetting_modified_flag = False
 
     def getText(self):
+        self.flushLog()
         return self.get('1.0', END + '-1c')
 
+    def trackChanges(self, tag="AJ_CHANGED"):
+        ''' starts adding the tag to the lines changed by any edit, whether made by the user or by code
+            the widget's Tcl command is replaced, so every insert, delete & replace can be seen '''
+        if tag not in self.changeTags: self.changeTags.append(tag)
+        if self.trackedCommand is not None: return
+        self.trackedCommand = self._w + "_tracked"
+        self.tk.call("rename", self._w, self.trackedCommand)
+        self.tk.createcommand(self._w, self._trackCommand)
+
+    def stopTracking(self):
+        if self.trackedCommand is None: return
+        self.tk.deletecommand(self._w)
+        self.tk.call("rename", self.trackedCommand, self._w)
+        self.trackedCommand = None
+
+    # passes each command on to the real widget, tagging the lines changed by edits
+    def _trackCommand(self, operation, *args):
+        command = self.trackedCommand
+        if operation not in ("insert", "delete", "replace"):
+            return self.tk.call((command, operation) + args)
+
+        # text can't go after the final newline, so edits at the end are made before it
+        start = self.tk.call(command, "index", args[0])
+        if self.tk.getboolean(self.tk.call(command, "compare", start, "==", "end")):
+            start = self.tk.call(command, "index", "end - 1 chars")
+        # a mark that stays before any text inserted at it, to find the start after the edit
+        self.tk.call(command, "mark", "set", "AJ_EDIT", start)
+        self.tk.call(command, "mark", "gravity", "AJ_EDIT", "left")
+        result = self.tk.call((command, operation) + args)
+        start = str(self.tk.call(command, "index", "AJ_EDIT"))
+        self.tk.call(command, "mark", "unset", "AJ_EDIT")
+        if operation == "insert":
+            # text & tags alternate after the index
+            length = sum(len(text) for text in args[1::2])
+        elif operation == "replace":
+            length = len(args[2])
+        else:
+            length = 0
+        # up to the start of the next line, so changes to neighbouring lines join up
+        end = "%s + %d chars lineend + 1 chars" % (start, length)
+        for tag in self.changeTags:
+            self.tk.call(command, "tag", "add", tag, start + " linestart", end)
+        if len(self.highlights) > 0:
+            self._scheduleHighlight()
+        return result
+
+    def getChanges(self, clear=True):
+        ''' returns the (start, end) of each range of lines changed since the changes were last cleared '''
+        ranges = self.tag_ranges("AJ_CHANGED")
+        changes = [(str(ranges[i]), str(ranges[i + 1])) for i in range(0, len(ranges), 2)]
+        if clear: self.tag_remove("AJ_CHANGED", "1.0", END)
+        return changes
+
+    def addHighlight(self, tag, pattern, regexp=False, nocase=False):
+        ''' applies the tag to all text matching the pattern, and keeps it applied as the text changes
+            pattern is a python regular expression if regexp is True, otherwise plain text
+            only the changed lines are searched again, the visible lines first '''
+        if not regexp: pattern = re.escape(pattern)
+        self.removeHighlight(tag)
+        self.highlights.append((tag, re.compile(pattern, re.IGNORECASE if nocase else 0)))
+        # lines still to be searched are tagged, and the tag is kept on any changed lines
+        self.trackChanges("AJ_UNHIGHLIGHTED")
+        self.tag_add("AJ_UNHIGHLIGHTED", "1.0", END)
+        self._scheduleHighlight()
+
+    def removeHighlight(self, tag):
+        self.highlights = [highlight for highlight in self.highlights if highlight[0] != tag]
+        self.tag_remove(tag, "1.0", END)
+
+    def _scheduleHighlight(self):
+        if self.highlightId is None:
+            self.highlightId = self.after(self.HIGHLIGHT_SPEED, self._highlight)
+
+    def stopHighlight(self):
+        if self.highlightId is not None:
+            self.after_cancel(self.highlightId)
+            self.highlightId = None
+
+    # searches the next HIGHLIGHT_LINES lines waiting to be searched, the visible lines first
+    def _highlight(self):
+        self.highlightId = None
+        if len(self.highlights) == 0:
+            self.tag_remove("AJ_UNHIGHLIGHTED", "1.0", END)
+            return
+
+        top = self.index("@0,0 linestart")
+        if "AJ_UNHIGHLIGHTED" in self.tag_names(top):
+            # the top line is waiting, so start there
+            waiting = (top, self.tag_prevrange("AJ_UNHIGHLIGHTED", top + " + 1 chars")[1])
+        else:
+            # then any other visible lines, then the rest
+            waiting = self.tag_nextrange("AJ_UNHIGHLIGHTED", top, "@0,%d" % self.winfo_height())
+            if len(waiting) == 0:
+                waiting = self.tag_nextrange("AJ_UNHIGHLIGHTED", "1.0")
+            if len(waiting) == 0:
+                return
+
+        first = int(self.index(waiting[0]).split(".")[0])
+        last = min(int(self.index(str(waiting[1]) + " - 1 chars").split(".")[0]), first + self.HIGHLIGHT_LINES - 1)
+        start, end = "%d.0" % first, "%d.end" % last
+        text = self.get(start, end)
+
+        # the offset of each line in the text, to turn matches into indexes
+        lineStarts = [0]
+        pos = text.find("\n")
+        while pos != -1:
+            lineStarts.append(pos + 1)
+            pos = text.find("\n", pos + 1)
+
+        def toIndex(offset):
+            line = bisect_right(lineStarts, offset) - 1
+            return "%d.%d" % (first + line, offset - lineStarts[line])
+
+        for tag, pattern in self.highlights:
+            self.tag_remove(tag, start, end)
+            indexes = []
+            for match in pattern.finditer(text):
+                if match.end() > match.start():
+                    indexes.append(toIndex(match.start()))
+                    indexes.append(toIndex(match.end()))
+            if len(indexes) > 0:
+                self.tag_add(tag, *indexes)
+
+        self.tag_remove("AJ_UNHIGHLIGHTED", start, "%d.0" % (last + 1))
+        if len(self.tag_nextrange("AJ_UNHIGHLIGHTED", "1.0")) > 0:
+            self._scheduleHighlight()
+
+    # copies the text, and finds the offset of each line, if it's been edited since last time
+    # so large, mostly unchanging texts, can be searched & navigated without asking Tk again
+    def _getSearchText(self):
+        self.flushLog()
+        generation = self.getGeneration()
+        if self.searchText is None or generation != self.searchGeneration:
+            self.searchText = self.get('1.0', END + '-1c')
+            self.lineStarts = [0]
+            self.lineStarts.extend(match.end() for match in re.finditer("\n", self.searchText))
+            self.searchGeneration = generation
+            self.searchMatches = None
+        return self.searchText
+
+    def _offsetToIndex(self, offset):
+        line = bisect_right(self.lineStarts, offset) - 1
+        return "%d.%d" % (line + 1, offset - self.lineStarts[line])
+
+    def offsetToIndex(self, offset):
+        ''' converts an offset in the string returned by getText() to a line.col index '''
+        self._getSearchText()
+        return self._offsetToIndex(offset)
+
+    def indexToOffset(self, index):
+        ''' converts any index to an offset in the string returned by getText() '''
+        self._getSearchText()
+        line, col = self.index(index).split(".")
+        line = int(line) - 1
+        if line >= len(self.lineStarts): return len(self.searchText)
+        return self.lineStarts[line] + int(col)
+
+    # the start & end offsets of every match, the last search is remembered until the text is edited
+    def _findMatches(self, pattern, regexp=False, nocase=False):
+        text = self._getSearchText()
+        search = (pattern, regexp, nocase)
+        if self.searchMatches is None or self.searchMatches[0] != search:
+            if not regexp: pattern = re.escape(pattern)
+            starts, ends = [], []
+            for match in re.finditer(pattern, text, re.IGNORECASE if nocase else 0):
+                if match.end() > match.start():
+                    starts.append(match.start())
+                    ends.append(match.end())
+            self.searchMatches = (search, starts, ends)
+        return self.searchMatches[1], self.searchMatches[2]
+
+    def findAll(self, pattern, regexp=False, nocase=False):
+        ''' returns the (start, end) indexes of every match of the pattern, in order
+            pattern is a python regular expression if regexp is True, otherwise plain text
+            matches don't overlap, and empty matches are ignored '''
+        starts, ends = self._findMatches(pattern, regexp, nocase)
+        return [(self._offsetToIndex(start), self._offsetToIndex(end)) for start, end in zip(starts, ends)]
+
+    def countMatches(self, pattern, regexp=False, nocase=False):
+        ''' returns how many times the pattern matches, see findAll() '''
+        return len(self._findMatches(pattern, regexp, nocase)[0])
+
+    def findMatch(self, pattern, start=INSERT, regexp=False, nocase=False, backwards=False):
+        ''' returns the (start, end) indexes of the first match after start, or the last match before it if backwards
+            wraps around the text, returns None if there are no matches, see findAll() '''
+        starts, ends = self._findMatches(pattern, regexp, nocase)
+        if len(starts) == 0: return None
+        offset = self.indexToOffset(start)
+        if backwards:
+            # -1 wraps around to the last match
+            pos = bisect_left(starts, offset) - 1
+        else:
+            pos = bisect_right(starts, offset)
+            if pos == len(starts): pos = 0
+        return self._offsetToIndex(starts[pos]), self._offsetToIndex(ends[pos])
+
+    def setLog(self, maxLines=True):
+        ''' turns log mode on, only keeping the last maxLines lines (LOG_LINES if True), or off if maxLines is False '''
+        self.flushLog()
+        if maxLines is True: maxLines = self.LOG_LINES
+        self.logLines = maxLines or None
+        if self.logLines is not None:
+            # undo would keep a copy of every line ever added
+            self.config(undo=False)
+            self.edit_reset()
+            self._trimLog()
+
+    def appendLog(self, text):
+        ''' queues the text, to be added along with any other text added before the next redraw '''
+        self.logBuffer.append(text)
+        if self.logId is None:
+            self.logId = self.after(self.LOG_SPEED, self.flushLog)
+
+    def flushLog(self):
+        self.stopLog()
+        if len(self.logBuffer) == 0:
+            return
+        text = "".join(self.logBuffer)
+        self.logBuffer = []
+        # don't insert lines that would be trimmed straight away
+        if text.count("\n") > self.logLines:
+            text = "\n".join(text.split("\n")[-self.logLines - 1:])
+
+        # only scroll to the new text, if the end was already showing
+        following = self.yview()[1] >= 1.0
+        state = self.cget('state')
+        self.config(state='normal')
+        self.insert(END, text)
+        self._trimLog()
+        self.config(state=state)
+        if following: self.see(END)
+
+    def stopLog(self):
+        if self.logId is not None:
+            self.after_cancel(self.logId)
+            self.logId = None
+
+    # deletes the oldest lines, so there are no more than logLines
+    def _trimLog(self):
+        lines = int(self.index(END + '-1c').split(".")[0])
+        if lines > self.logLines:
+            self.delete('1.0', "%d.0" % (lines - self.logLines + 1))
+
     def getTextAreaHash(self):
         text = self.getText()
         m = hashlib.md5()
@@ -13604,11 +14957,545 @@ class AjText(Text, TextParent):
         super(AjText, self).__init__(parent, **opts)
         self._init()    # call TextParent initialiser
 
+    def destroy(self):
+        self.stopLog()
+        self.stopHighlight()
+        self.stopTracking()
+        super(AjText, self).destroy()
+
 class AjScrolledText(scrolledtext.ScrolledText, TextParent):
     def __init__(self, parent, **opts):
         super(AjScrolledText, self).__init__(parent, **opts)
         self._init()    # call TextParent initialiser
 
+    def destroy(self):
+        self.stopLog()
+        self.stopHighlight()
+        self.stopTracking()
+        super(AjScrolledText, self).destroy()
+
+# a read-only text area, that shows lines from a file too big to load
+# the file is memory mapped, and only the visible lines, plus MARGIN_LINES either side, are put in the text
+# the scrollbar moves through the whole file, loading new lines, rather than scrolling the text
+class AjFileView(AjScrolledText):
+    # how many lines are kept above & below the visible lines
+    MARGIN_LINES = 200
+    # how often the scrollbar is updated, while the file's lines are being counted, in ms
+    INDEX_SPEED = 100
+
+    def __init__(self, parent, **opts):
+        super(AjFileView, self).__init__(parent, **opts)
+        # the index of the file's lines, None if no file is open
+        self.lines = None
+        self.encoding = "utf-8"
+        # if the lines are being counted on another thread, otherwise they're counted here, in the background
+        self.threaded = False
+        # the line of the file on the text's first line, and how many lines are in the text
+        self.first = 0
+        self.shown = 0
+        # if the lines in the text stopped short, because the rest hadn't been counted
+        self.cutShort = False
+        self.indexId = None
+        self.loadId = None
+
+        self.vbar.config(command=self._yview)
+        self.config(yscrollcommand=self._scrolled, state=DISABLED)
+
+    def destroy(self):
+        self.closeFile()
+        super(AjFileView, self).destroy()
+
+    def openFile(self, fileName, encoding="utf-8", threaded=False):
+        ''' shows the start of the file, lines are only read when they're shown
+            if threaded is True, lines.build() must be run on another thread, to count the lines '''
+        self.closeFile()
+        self.lines = lineindex.LineIndex(fileName)
+        self.encoding = encoding
+        self.threaded = threaded
+        # enough to show the first lines straight away
+        self.lines.update()
+        self.showLine(0)
+        self._checkIndex()
+
+    def closeFile(self):
+        self._stopLoading()
+        if self.lines is not None:
+            self.lines.close()
+            self.lines = None
+        self.first = self.shown = 0
+        self._setLines("")
+
+    def _stopLoading(self):
+        if self.indexId is not None:
+            self.after_cancel(self.indexId)
+            self.indexId = None
+        if self.loadId is not None:
+            self.after_cancel(self.loadId)
+            self.loadId = None
+
+    def showLine(self, line):
+        ''' scrolls the file, so the line (counting from 0) is at the top '''
+        if self.lines is None: return
+        self.loadId = None
+        count = self.lines.countLines()
+        pageLines = self._getPageLines()
+        # keep the text area full, at the end of the file
+        line = max(min(line, count - pageLines), 0)
+        self.first = max(line - self.MARGIN_LINES, 0)
+        data = self.lines.getLines(self.first, line - self.first + pageLines + self.MARGIN_LINES)
+        self.shown = data.count(b"\n")
+        if len(data) > 0 and not data.endswith(b"\n"): self.shown += 1
+        self.cutShort = not self.lines.isComplete() and self.first + self.shown >= count
+        text = data.decode(self.encoding, "replace")
+        # the text widget always has a newline at the end
+        if text.endswith("\n"): text = text[:-1]
+        self._setLines(text)
+        self.yview("%d.0" % (line - self.first + 1))
+
+    def getTopLine(self):
+        ''' returns the line of the file at the top of the text area, counting from 0 '''
+        return self.first + int(self.index("@0,0").split(".")[0]) - 1
+
+    def _setLines(self, text):
+        self.pauseCallFunction()
+        self.config(state=NORMAL)
+        self.delete("1.0", END)
+        self.insert("1.0", text)
+        self.config(state=DISABLED)
+        self.resumeCallFunction()
+
+    # how many lines fit in the text area
+    def _getPageLines(self):
+        return max(self.winfo_height() // max(self._normalFont.metrics("linespace"), 1), int(self.cget("height")), 1)
+
+    # counts some lines, if they're not being counted on another thread, and updates the scrollbar
+    def _checkIndex(self):
+        self.indexId = None
+        if self.lines is None: return
+        if not self.threaded:
+            self.lines.update()
+        if self.cutShort and self.lines.countLines() > self.first + self.shown:
+            self.showLine(self.getTopLine())
+        else:
+            self._scrolled()
+        if not self.lines.isComplete():
+            self.indexId = self.after(self.INDEX_SPEED if self.threaded else 1, self._checkIndex)
+
+    # called by the text, when it scrolls through the loaded lines
+    def _scrolled(self, first=None, last=None):
+        if self.lines is None:
+            if first is not None: self.vbar.set(first, last)
+            return
+
+        top = self.getTopLine()
+        bottom = self.first + int(self.index("@0,%d" % self.winfo_height()).split(".")[0])
+        total = self.lines.countLines(estimate=True)
+        if total <= bottom - top:
+            self.vbar.set(0.0, 1.0)
+        else:
+            self.vbar.set(top / float(total), bottom / float(total))
+
+        # load more lines, before the ends of the loaded lines are reached
+        if self.loadId is None:
+            if (self.first > 0 and top - self.first < self.MARGIN_LINES // 2) or \
+                    (self.first + self.shown < self.lines.countLines() and self.first + self.shown - bottom < self.MARGIN_LINES // 2):
+                self.loadId = self.after_idle(lambda: self.showLine(self.getTopLine()))
+
+    # called by the scrollbar, jumps to a new place in the file, or scrolls the loaded lines
+    def _yview(self, *args):
+        if self.lines is not None and args[0] == "moveto":
+            self.showLine(int(float(args[1]) * self.lines.countLines(estimate=True)))
+        else:
+            self.yview(*args)
+
+# a Listbox that keeps a copy of its items, so they can be counted & found without asking Tk
+# the positions of each value are indexed the first time they're needed, after the items change
+class AjListBox(Listbox, object):
+    def __init__(self, parent, **opts):
+        super(AjListBox, self).__init__(parent, **opts)
+        # the text of each item, as Tk stores it
+        self.items = []
+        # text -> list of positions, None until it's needed
+        self.positions = None
+
+    # Tk stores items as text, so they're copied & looked up as the text Tk would give them
+    def _getText(self, value):
+        if value is None or isinstance(value, UNIVERSAL_STRING):
+            return value
+        elif type(value) is int:
+            return str(value)
+        return self.tk.call("format", "%s", value)
+
+    # turns any Listbox index into a position
+    def _getPosition(self, index):
+        if index == END:
+            return len(self.items)
+        try:
+            return int(index)
+        except (TypeError, ValueError):
+            return int(super(AjListBox, self).index(index))
+
+    def insert(self, index, *elements):
+        pos = min(max(self._getPosition(index), 0), len(self.items))
+        super(AjListBox, self).insert(index, *elements)
+        # tkinter passes Tk the items before the first None
+        if None in elements: elements = elements[:elements.index(None)]
+        elements = [self._getText(value) for value in elements]
+        # items added to the end don't move any others
+        if self.positions is not None and pos == len(self.items):
+            for value in elements:
+                self.positions.setdefault(value, []).append(pos)
+                pos += 1
+        else:
+            self.positions = None
+        self.items[pos:pos] = elements
+
+    def delete(self, first, last=None):
+        # when deleting, end is the last item, not the place after it
+        first = len(self.items) - 1 if first == END else max(self._getPosition(first), 0)
+        last = first if last is None else min(self._getPosition(last), len(self.items) - 1)
+        super(AjListBox, self).delete(first, last)
+        if first > last:
+            return
+        if last < len(self.items) - 1:
+            self.positions = None
+        elif self.positions is not None:
+            # removing the end of the list, only removes the last positions
+            for value in self.items[first:last + 1]:
+                self.positions[value].pop()
+                if len(self.positions[value]) == 0:
+                    del self.positions[value]
+        del self.items[first:last + 1]
+
+    def setItem(self, pos, value):
+        ''' replaces the item at the position '''
+        if not 0 <= pos < len(self.items):
+            self.delete(pos)
+            self.insert(pos, value)
+            return
+        super(AjListBox, self).delete(pos)
+        super(AjListBox, self).insert(pos, value)
+        value = self._getText(value)
+        if self.positions is not None:
+            old = self.positions[self.items[pos]]
+            old.remove(pos)
+            if len(old) == 0:
+                del self.positions[self.items[pos]]
+            insort(self.positions.setdefault(value, []), pos)
+        self.items[pos] = value
+
+    def size(self):
+        return len(self.items)
+
+    def getPositions(self, values):
+        ''' returns the positions of the items matching any of the values, in order '''
+        if self.positions is None:
+            self.positions = {}
+            for pos, value in enumerate(self.items):
+                self.positions.setdefault(value, []).append(pos)
+        found = set()
+        for value in values:
+            found.update(self.positions.get(self._getText(value), ()))
+        return sorted(found)
+
+# a Listbox for lists too long to put in a Listbox, the rows come from a sequence, or a length & function
+# only the visible rows are put in the Listbox, the selection, active row & scrolling are kept here
+# the Listbox's methods are replaced, so they work with positions in the whole list
+class AjVirtualListBox(Listbox, object):
+    def __init__(self, parent, scrollbar=None, **opts):
+        super(AjVirtualListBox, self).__init__(parent, **opts)
+        self.scrollbar = scrollbar
+        # functions returning the number of items, and the item at a position
+        self.countItems = lambda: 0
+        self.getItem = None
+        # the first row shown, and how many rows fit
+        self.top = 0
+        self.pageRows = 1
+        self.selected = set()
+        self.active = 0
+        self.anchor = 0
+        # position -> options set with itemconfig()
+        self.itemOptions = {}
+        self.drawId = None
+
+        # bindings for the class tag go first, so the selection is up to date before the user's functions are called
+        # none of them return "break", so the user's, the window's & the app's bindings still run
+        self.classTag = "AjVirtualListBox" + str(self)
+        self.bind_class(self.classTag, "<<ListboxSelect>>", self._syncSelection)
+        self.bind_class(self.classTag, "<Configure>", lambda e: self._scheduleDraw())
+        # a click only selects the clicked row, control & shift clicks add to the selection
+        self.bind_class(self.classTag, "<Button-1>", self._clearSelection)
+        self.bind_class(self.classTag, "<Control-Button-1>", self._toggleSelection)
+        self.bind_class(self.classTag, "<Shift-Button-1>", lambda e: None)
+
+        # the Listbox's own scrolling, keys & shift clicks only move through the rows it holds
+        # so the Listbox class tag is replaced with a copy of its bindings, with those ones changed
+        self.listTag = "AjVirtualListBoxClass" + str(self)
+        for sequence in self.bind_class("Listbox"):
+            self.tk.call("bind", self.listTag, sequence, self.tk.call("bind", "Listbox", sequence))
+        self.bind_class(self.listTag, "<MouseWheel>", self._mouseWheel)
+        self.bind_class(self.listTag, "<Button-4>", lambda e: self._scroll(-5))
+        self.bind_class(self.listTag, "<Button-5>", lambda e: self._scroll(5))
+        self.bind_class(self.listTag, "<Shift-Button-1>", self._extendSelection)
+        for key, move in (("Up", -1), ("Down", 1), ("Prior", "-page"), ("Next", "page"), ("Control-Home", "first"), ("Control-End", "last")):
+            self.bind_class(self.listTag, "<" + key + ">", lambda e, move=move: self._moveActive(move))
+            self.bind_class(self.listTag, "<Shift-" + key + ">", lambda e, move=move: self._moveActive(move, True))
+
+        tags = tuple(self.listTag if tag == "Listbox" else tag for tag in self.bindtags())
+        self.bindtags((self.classTag,) + tags)
+
+        self.config(yscrollcommand="")
+
+    def destroy(self):
+        if self.drawId is not None:
+            self.after_cancel(self.drawId)
+            self.drawId = None
+        for tag in (self.classTag, self.listTag):
+            for sequence in self.bind_class(tag):
+                self.unbind_class(tag, sequence)
+        super(AjVirtualListBox, self).destroy()
+
+    def setData(self, values=None, length=None, getItem=None):
+        ''' shows the values, a sequence, or length items, each got by calling getItem(position)
+            length can also be a function, returning the number of items '''
+        if values is not None:
+            self.countItems = lambda: len(values)
+            self.getItem = values.__getitem__
+        elif getItem is not None:
+            self.countItems = length if callable(length) else lambda: length
+            self.getItem = getItem
+        else:
+            self.countItems = lambda: 0
+            self.getItem = None
+        self.selected = set()
+        self.itemOptions = {}
+        self.top = self.active = self.anchor = 0
+        self._scheduleDraw()
+
+    def refresh(self):
+        ''' redraws the rows, after the data has changed '''
+        count = self.countItems()
+        self.selected = set(pos for pos in self.selected if pos < count)
+        self._scheduleDraw()
+
+    # turns any Listbox index into a position
+    def _getPosition(self, index):
+        if index == END:
+            return self.countItems()
+        elif index == ACTIVE:
+            return self.active
+        elif index == ANCHOR:
+            return self.anchor
+        try:
+            return int(index)
+        except (TypeError, ValueError):
+            # @x,y
+            return self.top + int(Listbox.index(self, index))
+
+    # the first & last positions of a range
+    def _getRange(self, first, last=None):
+        first = max(self._getPosition(first), 0)
+        last = first if last is None else min(self._getPosition(last), self.countItems() - 1)
+        return first, last
+
+    def size(self):
+        return self.countItems()
+
+    def index(self, index):
+        return self._getPosition(index)
+
+    def nearest(self, y):
+        return self.top + int(Listbox.nearest(self, y))
+
+    def get(self, first, last=None):
+        if last is None:
+            return self.getItem(self._getPosition(first))
+        first, last = self._getRange(first, last)
+        return tuple(self.getItem(pos) for pos in range(first, last + 1))
+
+    def getPositions(self, values):
+        ''' returns the positions of the items matching any of the values, in order
+            every item is checked, as the data can change at any time '''
+        return [pos for pos in range(self.countItems()) if self.getItem(pos) in values]
+
+    def insert(self, index, *elements):
+        raise Exception("Items can't be added to a virtual ListBox, change its data instead.")
+
+    def delete(self, first, last=None):
+        raise Exception("Items can't be removed from a virtual ListBox, change its data instead.")
+
+    def setItem(self, pos, value):
+        raise Exception("Items can't be changed in a virtual ListBox, change its data instead.")
+
+    def curselection(self):
+        return tuple(sorted(self.selected))
+
+    def selection_set(self, first, last=None):
+        first, last = self._getRange(first, last)
+        self.selected.update(range(first, last + 1))
+        self._scheduleDraw()
+
+    def selection_clear(self, first, last=None):
+        first, last = self._getRange(first, last)
+        if first == 0 and last >= self.countItems() - 1:
+            self.selected = set()
+        else:
+            self.selected.difference_update(range(first, last + 1))
+        self._scheduleDraw()
+
+    def selection_includes(self, index):
+        return self._getPosition(index) in self.selected
+
+    def selection_anchor(self, index):
+        self.anchor = self._getPosition(index)
+
+    select_set = selection_set
+    select_clear = selection_clear
+    select_includes = selection_includes
+    select_anchor = selection_anchor
+
+    def activate(self, index):
+        self.active = max(min(self._getPosition(index), self.countItems() - 1), 0)
+        self._scheduleDraw()
+
+    def see(self, index):
+        pos = self._getPosition(index)
+        if pos < self.top:
+            self.top = pos
+        elif pos >= self.top + self.pageRows:
+            self.top = pos - self.pageRows + 1
+        self._scheduleDraw()
+
+    def itemconfig(self, index, cnf=None, **kw):
+        options = self.itemOptions.setdefault(self._getPosition(index), {})
+        if cnf is not None: options.update(cnf)
+        options.update(kw)
+        self._scheduleDraw()
+
+    itemconfigure = itemconfig
+
+    def itemcget(self, index, option):
+        return self.itemOptions.get(self._getPosition(index), {}).get(option, "")
+
+    def yview(self, *args):
+        count = self.countItems()
+        if len(args) == 0:
+            if count == 0: return (0.0, 1.0)
+            return (self.top / float(count), min(self.top + self.pageRows, count) / float(count))
+        elif args[0] == "moveto":
+            self.top = int(float(args[1]) * count)
+        elif args[0] == "scroll":
+            if args[2] == "pages":
+                self.top += int(args[1]) * self.pageRows
+            else:
+                self.top += int(args[1])
+        else:
+            self.top = self._getPosition(args[0])
+        self.top = max(min(self.top, count - self.pageRows), 0)
+        self._scheduleDraw()
+
+    def _scroll(self, rows):
+        self.yview("scroll", rows, "units")
+
+    def _mouseWheel(self, event):
+        if abs(event.delta) >= 120:
+            return self._scroll(-event.delta // 120)
+        else:
+            return self._scroll(-event.delta)
+
+    # a plain click selects just the clicked row, the Listbox clears the rows it holds
+    def _clearSelection(self, event):
+        if self.cget("selectmode") != MULTIPLE:
+            self.selected = set()
+        self.anchor = self.nearest(event.y)
+
+    # a control click moves the anchor, as the Listbox does, but keeps the selection
+    def _toggleSelection(self, event):
+        if self.cget("selectmode") == EXTENDED:
+            self.anchor = self.nearest(event.y)
+
+    # a shift click selects from the anchor, which might not be one of the rows the Listbox holds
+    def _extendSelection(self, event):
+        if self.cget("selectmode") != EXTENDED: return
+        self.active = self.nearest(event.y)
+        self._moveActive(0, self.anchor in self.selected)
+
+    # the Listbox changed the selection of the rows it holds
+    # the anchor is kept by the click handlers, the Listbox's is wrong once it's scrolled out of view
+    def _syncSelection(self, event=None):
+        shown = Listbox.size(self)
+        self.selected = set(pos for pos in self.selected if not self.top <= pos < self.top + shown)
+        self.selected.update(self.top + int(row) for row in Listbox.curselection(self))
+        if shown > 0:
+            self.active = self.top + int(Listbox.index(self, ACTIVE))
+
+    # up, down, page up/down & first/last, as the Listbox would
+    def _moveActive(self, move, extend=False):
+        count = self.countItems()
+        if count == 0: return
+        if move == "page": move = self.pageRows
+        elif move == "-page": move = -self.pageRows
+        elif move == "first": move = -count
+        elif move == "last": move = count
+        self.active = max(min(self.active + move, count - 1), 0)
+
+        mode = self.cget("selectmode")
+        if mode == EXTENDED and extend:
+            self.selected = set(range(min(self.anchor, self.active), max(self.anchor, self.active) + 1))
+        elif mode != MULTIPLE:
+            self.selected = set([self.active])
+            self.anchor = self.active
+        self.see(self.active)
+
+        # draw now, so the Listbox's selection matches when the event is handled
+        if self.drawId is not None:
+            self.after_cancel(self.drawId)
+        self._draw()
+        if mode != MULTIPLE:
+            self.event_generate("<<ListboxSelect>>")
+
+    def _scheduleDraw(self):
+        if self.drawId is None:
+            self.drawId = self.after_idle(self._draw)
+
+    # how many rows fit in the Listbox
+    def _getPageRows(self):
+        height = self.winfo_height()
+        if height <= 1:
+            return max(int(self.cget("height")), 1)
+        lineHeight = int(self.tk.call("font", "metrics", self.cget("font"), "-linespace")) + 1 + 2 * self.winfo_pixels(self.cget("selectborderwidth"))
+        height -= 2 * (self.winfo_pixels(self.cget("borderwidth")) + self.winfo_pixels(self.cget("highlightthickness")))
+        return max(height // lineHeight, 1)
+
+    # puts the visible rows in the Listbox
+    def _draw(self):
+        self.drawId = None
+        count = self.countItems()
+        self.pageRows = self._getPageRows()
+        self.top = max(min(self.top, count - self.pageRows), 0)
+
+        # with a spare row, for a partly visible row at the bottom
+        positions = range(self.top, min(self.top + self.pageRows + 1, count))
+        Listbox.delete(self, 0, END)
+        if len(positions) > 0:
+            Listbox.insert(self, END, *[self.getItem(pos) for pos in positions])
+        for row, pos in enumerate(positions):
+            if pos in self.selected:
+                Listbox.selection_set(self, row)
+            if pos in self.itemOptions:
+                Listbox.itemconfig(self, row, **self.itemOptions[pos])
+        if self.top <= self.active < self.top + len(positions):
+            Listbox.activate(self, self.active - self.top)
+        if self.top <= self.anchor < self.top + len(positions):
+            Listbox.selection_anchor(self, self.anchor - self.top)
+        Listbox.yview(self, 0)
+
+        if self.scrollbar is not None:
+            if count <= self.pageRows:
+                self.scrollbar.set(0.0, 1.0)
+            else:
+                self.scrollbar.set(self.top / float(count), (self.top + self.pageRows) / float(count))
+
 
 #######################
 # Widget to look like a label, but allow selection...
@@ -14134,32 +16021,123 @@ class SubWindow(Toplevel, object):
             self.killLab = Label(self)
             self._parent.wait_window(self.killLab)
 
+#####################################
+# AutoComplete Stuff
+#####################################
+
+# the words suggested by an AutoCompleteEntry, sorted by their case-folded text
+# words starting with the typed text are found with a binary search, rather than checking every word
+class AutoCompleteWords(object):
+
+    MODES = ("prefix", "substring", "fuzzy")
+
+    def __init__(self, words=()):
+        self.mode = "prefix"
+        # the most matches to return, None for no limit
+        self.maxMatches = 100
+        self.changeWords(words)
+
+    @staticmethod
+    def _fold(word):
+        return word.casefold() if hasattr(word, "casefold") else word.lower()
+
+    def changeWords(self, words):
+        # the words, to check for duplicates
+        self.words = set(words)
+        pairs = sorted(zip(map(self._fold, self.words), self.words))
+        # the folded words, and the words, in the same order
+        self.keys = [pair[0] for pair in pairs]
+        self.values = [pair[1] for pair in pairs]
+
+    def addWords(self, words):
+        newWords = set(words) - self.words
+        # lots of words are quicker to sort in, than to insert one at a time
+        if len(newWords) > len(self.keys) // 10:
+            self.changeWords(list(self.words) + list(newWords))
+        else:
+            for word in newWords:
+                pos = self._position(self._fold(word), word)
+                self.keys.insert(pos, self._fold(word))
+                self.values.insert(pos, word)
+                self.words.add(word)
+
+    def removeWord(self, word):
+        if word in self.words:
+            pos = self._position(self._fold(word), word)
+            del self.keys[pos]
+            del self.values[pos]
+            self.words.discard(word)
+
+    # the position of a word, or where it should go
+    def _position(self, key, word):
+        pos = bisect_left(self.keys, key)
+        while pos < len(self.keys) and self.keys[pos] == key and self.values[pos] < word:
+            pos += 1
+        return pos
+
+    def setMode(self, mode):
+        if mode not in self.MODES:
+            raise Exception("Invalid AutoEntry mode: " + mode + ", must be one of: " + ", ".join(self.MODES))
+        self.mode = mode
+
+    def getMatches(self, text):
+        key = self._fold(text)
+        if self.mode == "prefix":
+            start = bisect_left(self.keys, key)
+            end = start
+            stop = len(self.keys) if self.maxMatches is None else min(start + self.maxMatches, len(self.keys))
+            while end < stop and self.keys[end].startswith(key):
+                end += 1
+            return self.values[start:end]
+
+        if self.mode == "substring":
+            found = compress(self.values, map(contains, self.keys, repeat(key)))
+        else:
+            # the typed letters, in order, with anything between them
+            pattern = re.compile(".*?".join(map(re.escape, key)))
+            found = compress(self.values, map(pattern.search, self.keys))
+        return list(islice(found, self.maxMatches))
+
 #####################################
 # SimpleTable Stuff
 #####################################
 
 class GridCell(Label, object):
-    def __init__(self, parent, fonts, isHeader=False, wrap=0, **opts):
+    def __init__(self, parent, fonts, isHeader=False, wrap=0, bindTag=None, **opts):
         super(GridCell, self).__init__(parent, **opts)
         self.selected = False
         self.isHeader = isHeader
+        # the colours being shown: header, inactive, selected or over
+        self.state = None
         self.config(borderwidth=1, highlightthickness=0, padx=0, pady=0, wraplength=wrap)
         self.updateFonts(fonts)
 
-        if not self.isHeader:
+        if bindTag is not None:
+            # tables bind events once, to a tag shared by all their cells, rather than to every cell
+            tags = self.bindtags()
+            self.bindtags((tags[0], bindTag) + tags[1:])
+        elif not self.isHeader:
             self.bind("<Enter>", self.mouseEnter)
             self.bind("<Leave>", self.mouseLeave)
             self.bind("<Button-1>", self.toggleSelection)
 
+    # the state to show when the mouse isn't over the cell
+    def getState(self):
+        if self.isHeader: return "header"
+        elif self.selected: return "selected"
+        else: return "inactive"
+
     def updateFonts(self, fonts):
         self.fonts = fonts
-        if self.isHeader:
-            self.config(font=self.fonts["headerFont"], background=self.fonts["headerBg"], fg=self.fonts['headerFg'], relief=self.fonts['border'])
-        else:
-            if self.selected:
-                self.config(font=self.fonts["dataFont"], background=self.fonts["selectedBg"], fg=self.fonts['selectedFg'], relief=self.fonts['border'])
-            else:
-                self.config(font=self.fonts["dataFont"], background=self.fonts["inactiveBg"], fg=self.fonts['inactiveFg'], relief=self.fonts['border'])
+        self.state = self.getState()
+        font = self.fonts["headerFont"] if self.isHeader else self.fonts["dataFont"]
+        self.config(font=font, background=self.fonts[self.state + "Bg"], fg=self.fonts[self.state + "Fg"], relief=self.fonts['border'])
+
+    # only configures the cell if its colours change
+    def _setState(self, state):
+        if state != self.state:
+            self.state = state
+            self.config(background=self.fonts[state + "Bg"], fg=self.fonts[state + "Fg"])
 
     def setText(self, text):
         self.config(text=text)
@@ -14168,21 +16146,18 @@ class GridCell(Label, object):
         self.config(text="")
 
     def mouseEnter(self, event=None):
-        self.config(background=self.fonts["overBg"], fg=self.fonts["overFg"])
+        self._setState("over")
 
     def mouseLeave(self, event=None):
-        if self.selected:
-            self.config(background=self.fonts["selectedBg"], fg=self.fonts["selectedFg"])
-        else:
-            self.config(background=self.fonts["inactiveBg"], fg=self.fonts["inactiveFg"])
+        self._setState(self.getState())
 
     def select(self):
-        self.config(background=self.fonts["selectedBg"], fg=self.fonts["selectedFg"])
         self.selected = True
+        self._setState("selected")
 
     def deselect(self):
-        self.config(background=self.fonts["inactiveBg"], fg=self.fonts["inactiveFg"])
         self.selected = False
+        self._setState("inactive")
 
     def toggleSelection(self, event=None):
         if self.selected:
@@ -14190,10 +16165,162 @@ class GridCell(Label, object):
         else:
             self.select()
 
+# indexes the values in one column of a table, to quickly find the rows matching a filter
+# rows are identified by the id() of their list in the table's data, so sorting doesn't change the index
+# most values are unique, so a single id is stored for each value, only shared values use a set
+class TableIndex(object):
+
+    def __init__(self):
+        # lower case text -> row ids, for substring searches
+        self.texts = self.sharedTexts = None
+        # sort key -> row ids, and the keys in order, for range searches
+        self.keys = self.sharedKeys = None
+        self.sortedKeys = []
+        # new keys are only sorted in when they're needed
+        self.newKeys = []
+        # removed keys are left in sortedKeys, until there are lots of them
+        self.staleKeys = 0
+
+    # each half of the index is only built when it's first needed
+    def buildTexts(self, rowIds, values):
+        self.texts, self.sharedTexts = self._group(self._getTexts(values), rowIds)
+
+    def buildKeys(self, rowIds, values):
+        self.keys, self.sharedKeys = self._group(self._getKeys(values), rowIds)
+        self.sortedKeys = sorted(list(self.keys) + list(self.sharedKeys))
+        self.newKeys = []
+        self.staleKeys = 0
+
+    @staticmethod
+    def _text(value):
+        return ("%s" % SimpleTable._cellText(value)).lower()
+
+    # columns holding a single type are converted without calling a function for each value
+    @staticmethod
+    def _getTexts(values):
+        types = set(map(type, values))
+        if types.issubset(SimpleTable.STRING_TYPES):
+            return list(map(methodcaller("lower"), values))
+        elif types.issubset(SimpleTable.NUMBER_TYPES):
+            return list(map("%s".__mod__, values))
+        return list(map(TableIndex._text, values))
+
+    # these must match the keys made by SimpleTable._sortKey()
+    @staticmethod
+    def _getKeys(values):
+        types = set(map(type, values))
+        # NaN is keyed as text, by _sortKey()
+        if types.issubset(SimpleTable.NUMBER_TYPES) and all(val == val for val in values):
+            return list(zip(repeat(0), values, repeat("")))
+        elif types.issubset(SimpleTable.STRING_TYPES) and "" not in values \
+                and not any(map(SimpleTable.NUMBER_START.match, values)):
+            return list(zip(repeat(1), repeat(0), values))
+        return list(map(SimpleTable._sortKey, values))
+
+    # groups the ids of lots of rows by their keys
+    @staticmethod
+    def _group(keys, rowIds):
+        single = dict(zip(keys, rowIds))
+        shared = {}
+        if len(single) < len(keys):
+            repeated = set(key for key, count in Counter(keys).items() if count > 1)
+            for key, rowId in compress(zip(keys, rowIds), map(repeated.__contains__, keys)):
+                shared.setdefault(key, set()).add(rowId)
+            for key in repeated:
+                del single[key]
+        return single, shared
+
+    def add(self, rowId, value):
+        if self.texts is not None:
+            self._addId(self.texts, self.sharedTexts, self._text(value), rowId)
+        if self.keys is not None:
+            key = SimpleTable._sortKey(value)
+            if self._addId(self.keys, self.sharedKeys, key, rowId):
+                self.newKeys.append(key)
+
+    def remove(self, rowId, value):
+        if self.texts is not None:
+            self._removeId(self.texts, self.sharedTexts, self._text(value), rowId)
+        if self.keys is not None:
+            if self._removeId(self.keys, self.sharedKeys, SimpleTable._sortKey(value), rowId):
+                self.staleKeys += 1
+
+    def _getSortedKeys(self):
+        if self.staleKeys > len(self.sortedKeys) // 2:
+            self.sortedKeys = sorted(list(self.keys) + list(self.sharedKeys))
+            self.newKeys = []
+            self.staleKeys = 0
+        elif len(self.newKeys) > 0:
+            # python's sort merges the new keys into the already sorted keys
+            self.sortedKeys.extend(self.newKeys)
+            self.sortedKeys.sort()
+            self.newKeys = []
+        return self.sortedKeys
+
+    # returns True if the key wasn't used before
+    @staticmethod
+    def _addId(single, shared, key, rowId):
+        ids = shared.get(key)
+        if ids is not None:
+            ids.add(rowId)
+            return False
+        other = single.pop(key, None)
+        if other is None:
+            single[key] = rowId
+            return True
+        shared[key] = set((other, rowId))
+        return False
+
+    # returns True if the key is no longer used
+    @staticmethod
+    def _removeId(single, shared, key, rowId):
+        ids = shared.get(key)
+        if ids is None:
+            del single[key]
+            return True
+        ids.discard(rowId)
+        if len(ids) == 1:
+            single[key] = ids.pop()
+            del shared[key]
+        return False
+
+    def search(self, text):
+        ''' returns the ids of the rows whose value contains the text, ignoring case '''
+        text = text.lower()
+        single, shared = self.texts, self.sharedTexts
+        ids = set(map(single.__getitem__, compress(single, map(contains, single, repeat(text)))))
+        ids.update(*map(shared.__getitem__, compress(shared, map(contains, shared, repeat(text)))))
+        return ids
+
+    def range(self, low=None, high=None):
+        ''' returns the ids of the rows whose value is between low & high, inclusive
+            if low or high is None, the range stops at the end of the other value's type
+            sortedKeys can hold removed keys, & keys removed then added again, these are ignored '''
+        keys = self._getSortedKeys()
+        lowKey = None if low is None else SimpleTable._sortKey(low)
+        highKey = None if high is None else SimpleTable._sortKey(high)
+        if lowKey is not None or highKey is not None:
+            group = (lowKey if lowKey is not None else highKey)[0]
+            start = bisect_left(keys, lowKey if lowKey is not None else (group,))
+            end = bisect_right(keys, highKey) if highKey is not None else bisect_left(keys, (group + 1,))
+            keys = keys[start:end]
+
+        ids = set(filter(None, map(self.keys.get, keys)))
+        ids.update(*filter(None, map(self.sharedKeys.get, keys)))
+        return ids
+
 # first row is used as a header
 # SimpleTable is a ScrollPane, where a Frame has been placed on the canvas - called GridContainer
 class SimpleTable(ScrollPane):
 
+    # used to decide how values are sorted, values of these types aren't converted
+    NUMBER_TYPES = (int, float, long) if PYTHON2 else (int, float)
+    STRING_TYPES = (str, unicode) if PYTHON2 else (str,)
+    # text that doesn't start like this can't be a number
+    NUMBER_START = re.compile(r"\s*[-+]?(\d|\.\d|inf|nan)", re.IGNORECASE)
+    # how long to wait for typing to stop, before searching
+    SEARCH_SPEED = 250
+
     def __init__(self, parent, title, data, action=None, addRow=None,
                     actionHeading="Action", actionButton="Press",
                     addButton="Add", showMenu=False, queueFunction=None, border='solid', **opts):
@@ -14223,20 +16350,44 @@ class SimpleTable(ScrollPane):
         self.changeFunction = opts.pop("change", None)
         self.editFunction = opts.pop("edit", None)
 
-        # lists to store the data in
+        # lists to store the widgets in
         self.cells = []
         self.entries = []
         self.entryProps = []
         self.rightColumn = []
 
+        # lists to store the data in, the cells show this data
+        self.headers = []
+        self.rows = []
+
+        # the filter for each column, None is the search box's filter, which searches every column
+        self.filters = {}
+        # the TableIndex of each filtered column
+        self.indexes = {}
+        # the positions of the rows hidden by the filters
+        self.hiddenRows = set()
+        self.searchBox = None
+        self.searchId = None
+
         # database stuff
         self.db = None
         self.dbTable = None
+        # the stored row for each rowid, None if the DB table has no rowids
+        self.dbRows = None
+        self.dbLastRowId = None
+        # the primary key of a DB table without rowids, and the last key loaded
+        self.dbKeys = None
+        self.dbLastKey = None
+        self.dbVersion = None
+        # rows still being loaded, from a database or a file
+        self.loadId = None
+        self.loadFile = None
 
         # to wrap text in cells
         self.wrap = opts.pop("wrap", 0)
         # how do we align buttons in the action box?
         self.horizontalButtons = opts.pop("horizontal", True)
+        if opts.pop("search", False): self._createSearchBox()
 
         self.config(**opts)
 
@@ -14247,6 +16398,11 @@ class SimpleTable(ScrollPane):
         self.newText = None
         if self.showMenu: self._buildMenu()
 
+        # the cells' events are bound to these tags, once for the whole table
+        self.cellTag = "GridCell" + str(self)
+        self.headerTag = "GridHeader" + str(self)
+        self._bindCells()
+
         # how many rows & columns
         self.numColumns = 0
         # find out the max number of cells in a row
@@ -14270,6 +16426,16 @@ class SimpleTable(ScrollPane):
         gui.trace("SimpleTable %s constructed, adding rows", title)
         self.addRows(data, scroll=False)
 
+    def destroy(self):
+        gui._stopTableLoad(self)
+        if self.searchId is not None:
+            self.after_cancel(self.searchId)
+            self.searchId = None
+        for tag in (self.cellTag, self.headerTag):
+            for sequence in self.bind_class(tag):
+                self.unbind_class(tag, sequence)
+        super(SimpleTable, self).destroy()
+
     def config(self, cnf=None, **kw):
         self.configure(cnf, **kw)
 
@@ -14346,15 +16512,42 @@ class SimpleTable(ScrollPane):
 
     def _configCells(self):
         gui.trace("Config all cells")
-        for row in self.cells:
-            for cell in row:
-                gui.trace("Update Fonts: %s, %s", row, cell)
-                cell.updateFonts(self.fonts)
+        self._styleCells([cell for row in self.cells for cell in row], restyle=True)
+
+    def _bindCells(self):
+        self.bind_class(self.cellTag, "<Enter>", lambda e: e.widget.mouseEnter())
+        self.bind_class(self.cellTag, "<Leave>", lambda e: e.widget.mouseLeave())
+        self.bind_class(self.cellTag, "<Button-1>", lambda e: self._toggleCellSelection(e.widget))
+        self.bind_class(self.headerTag, "<Button-1>", self._selectColumn)
+        if self.showMenu:
+            button = '<Button-3>' if gui.GET_PLATFORM() in [gui.WINDOWS, gui.LINUX] else '<Button-2>'
+            self.bind_class(self.cellTag, button, self._rightClick)
+            self.bind_class(self.headerTag, button, self._rightClick)
+
+    # changes the colours of lots of cells, with one call to Tk for each colour, rather than one for each cell
+    # cells are put in the specified state, or back to their normal state, and left alone if they're already in it
+    # restyle updates every cell's fonts & border as well
+    def _styleCells(self, cells, state=None, restyle=False):
+        groups = {}
+        for cell in cells:
+            cellState = cell.getState() if state is None else state
+            if restyle or cell.state != cellState:
+                cell.state = cellState
+                groups.setdefault((cellState, cell.isHeader), []).append(str(cell))
+
+        for (cellState, isHeader), paths in groups.items():
+            options = [("background", self.fonts[cellState + "Bg"]), ("foreground", self.fonts[cellState + "Fg"])]
+            if restyle:
+                options.append(("font", self.fonts["headerFont"] if isHeader else self.fonts["dataFont"]))
+                options.append(("relief", self.fonts["border"]))
+            script = "$cell configure " + " ".join(["-%s {%s}" % option for option in options])
+            self.tk.call("foreach", "cell", tuple(paths), script)
 
     def addRow(self, rowData, scroll=True):
         self.queueFunction(self._hideEntryBoxes)
         self.queueFunction(self._addRow, rowData)
         self.queueFunction(self._showEntryBoxes)
+        self.queueFunction(self._applyFilter)
         self.queueFunction(self.canvas.event_generate, "<Configure>")
         if scroll:
             self.queueFunction(self.scrollBottom)
@@ -14374,22 +16567,20 @@ class SimpleTable(ScrollPane):
         except: gui.trace("Adding cursor in addRows()")
         list(map(self._addRow, data))
         self._showEntryBoxes()
+        self._applyFilter()
         self.canvas.event_generate("<Configure>")
         if scroll:
             self.scrollBottom()
 
-    # this will include the header row
+    # this won't include the header row
     def getRowCount(self):
-        return len(self.cells)-1
+        return len(self.rows)
 
     def getRow(self, rowNumber):
-        if 0 > rowNumber >= len(self.cells):
+        if rowNumber < 0 or rowNumber >= len(self.rows):
             raise Exception("Invalid row number.")
         else:
-            data = []
-            for cell in self.cells[rowNumber+1]:
-                data.append(str(cell.cget('text')))
-            return data
+            return [str(self._cellText(value)) for value in self.rows[rowNumber]]
 
     def setHeaders(self, data):
         if sqlite3 is not None and sqlite3 is not False and isinstance(data, sqlite3.Cursor):
@@ -14405,26 +16596,20 @@ class SimpleTable(ScrollPane):
                 cellsLen = len(self.cells[0])
                 self.deleteColumn(cellsLen-1)
 
-        dataLen = len(data)
-        cellsLen = len(self.cells[0])
-        for count in range(cellsLen):
-            cell = self.cells[0][count]
-            if count < dataLen:
-                cell.setText(data[count])
-            else:
-                cell.clear()
+        self.headers = self._padRow(data)
+        for count, cell in enumerate(self.cells[0]):
+            cell.setText(self._cellText(self.headers[count]))
 
     def replaceRow(self, rowNum, data):
-        if 0 > rowNum >= len(self.cells):
+        if rowNum < 0 or rowNum >= len(self.rows):
             raise Exception("Invalid row number.")
         else:
-            dataLen = len(data)
-            for count in range(len(self.cells[rowNum+1])):
-                cell = self.cells[rowNum+1][count]
-                if count < dataLen:
-                    cell.setText(data[count])
-                else:
-                    cell.clear()
+            self._unindexRow(self.rows[rowNum])
+            self.rows[rowNum] = self._padRow(data)
+            self._indexRow(self.rows[rowNum])
+            for count, cell in enumerate(self.cells[rowNum+1]):
+                cell.setText(self._cellText(self.rows[rowNum][count]))
+            self._applyFilter()
             self.canvas.event_generate("<Configure>")
 
     def deleteAllRows(self, deleteHeader=False):
@@ -14434,7 +16619,12 @@ class SimpleTable(ScrollPane):
         else:
             end = -1
             gui.trace('Deleting %s rows', len(self.cells)-1)
+        # the rows are going, so don't update their indexes
+        self.indexes = {}
         list(map(self._quickDeleteRow, range(len(self.cells)-2, end, -1)))
+        self.hiddenRows = set()
+        self.rows = []
+        if deleteHeader: self.headers = []
         self.canvas.event_generate("<Configure>")
         self._deleteEntryBoxes()
         self.numColumns = -1
@@ -14453,7 +16643,6 @@ class SimpleTable(ScrollPane):
                 self.rightColumn[position+1].grid_forget()
 
             # loop through all rows after, forget them, move them, grid them
-            butCount = len(self.actionButton)
             for loop in range(position+1, len(self.cells)-1):
                 # forget the next row
                 for cell in self.cells[loop+1]:
@@ -14469,13 +16658,9 @@ class SimpleTable(ScrollPane):
                     self.rightColumn[loop+1].grid(row=loop, column=self.numColumns, sticky=N+E+S+W)
 
                 # update its button
-                for but in self.rightColumn[loop].but:
-                    if butCount == 1:
-                        command=lambda row=loop, *args: self.action(row)
-                    else:
-                        command=lambda name=but.cget['text'], row=loop, *args: self.action(name, row)
-
-                    but.config(command=command)
+                if self.action is not None:
+                    for but in self.rightColumn[loop].but:
+                        but.config(command=self._actionCommand(but.cget('text'), loop))
 
                 # re-grid them
                 for cellNum in range(len(self.cells[loop])):
@@ -14484,8 +16669,15 @@ class SimpleTable(ScrollPane):
             # lose last item from lists
             self.cells = self.cells[:-1]
             self.rightColumn = self.rightColumn[:-1]
+            if position >= 0:
+                self._unindexRow(self.rows[position])
+                del self.rows[position]
+            else: self.headers = []
             self._updateButtons(position)
-            if not pauseUpdate: self.canvas.event_generate("<Configure>")
+            if not pauseUpdate:
+                # the rows after this one have been re-gridded, so hide them again
+                self._applyFilter(reset=True)
+                self.canvas.event_generate("<Configure>")
             if self.changeFunction is not None and callFunction:
                 self.changeFunction()
 
@@ -14499,79 +16691,84 @@ class SimpleTable(ScrollPane):
             newRow = []
             if numCols > self.numColumns:
                 gui.warn("New data has more columns (%s) than the table (%s), some columns will be discarded.", numCols, self.numColumns)
-            for cellNum in range(self.numColumns):
-
-                # get a val ("" if no val)
-                if cellNum >= numCols:
-                    val = ""
-                else:
-                    val = rowData[cellNum]
+            rowData = self._padRow(rowData)
+            if rowNum == 0:
+                self.headers = rowData
+            else:
+                self.rows.append(rowData)
+                self._indexRow(rowData)
 
-                lab = self._createCell(rowNum, cellNum, val)
+            for cellNum in range(self.numColumns):
+                lab = self._createCell(rowNum, cellNum, rowData[cellNum])
                 newRow.append(lab)
             self.cells.append(newRow)
 
             # add some buttons for each row
-            if self.action is not None:
-                # add the title
-                if rowNum == 0:
-                    widg = GridCell(self.interior, self.fonts, isHeader=True, text=self.actionHeading)
-                # add a button
-                else:
-                    widg = GridCell(self.interior, self.fonts, isHeader=True)
-                    widg.config(borderwidth=0, bg=self.fonts['headerBg'])
-                    widg.but=[]
+            self._createActions(rowNum)
 
-                    val = rowNum - 1
+    # makes sure a row has a value for every column
+    def _padRow(self, rowData):
+        numCols = len(rowData)
+        return [rowData[cellNum] if cellNum < numCols else "" for cellNum in range(self.numColumns)]
 
-                    butCount = len(self.actionButton)
-                    for row, text in enumerate(self.actionButton):
-                        if butCount == 1:
-                            command=lambda row=val, *args: self.action(row)
-                        else:
-                            command=lambda name=text, row=val, *args: self.action(name, row)
+    # the text to show in a cell, for a value in the table's data
+    @staticmethod
+    def _cellText(value):
+        return "" if value is None else value
 
-                        but = Button(widg, font=self.fonts["buttonFont"], text=text,
-                                        bd=0, highlightthickness=0, command=command)
+    def _createActions(self, rowNum):
+        if self.action is None:
+            return
 
-                        if gui.GET_PLATFORM() in [gui.MAC, gui.LINUX]:
-                            but.config(highlightbackground=widg.cget("bg"))
-                        if self.horizontalButtons:
-                            but.grid(row=0, column=row, sticky=N+E+S+W, pady=1)
-                            widg.grid_columnconfigure(row, weight=1)
-                        else:
-                            but.grid(column=0, row=row, sticky=N+E+S+W, pady=1)
-                            widg.grid_columnconfigure(0, weight=1)
-                        widg.but.append(but)
-                self.rightColumn.append(widg)
-                widg.grid(row=rowNum, column=cellNum + 1, sticky=N+E+S+W)
+        # add the title
+        if rowNum == 0:
+            widg = GridCell(self.interior, self.fonts, isHeader=True, text=self.actionHeading)
+        # add a button
+        else:
+            widg = GridCell(self.interior, self.fonts, isHeader=True)
+            widg.config(borderwidth=0, bg=self.fonts['headerBg'])
+            widg.but=[]
+
+            for row, text in enumerate(self.actionButton):
+                but = Button(widg, font=self.fonts["buttonFont"], text=text,
+                                bd=0, highlightthickness=0, command=self._actionCommand(text, rowNum - 1))
+
+                if gui.GET_PLATFORM() in [gui.MAC, gui.LINUX]:
+                    but.config(highlightbackground=widg.cget("bg"))
+                if self.horizontalButtons:
+                    but.grid(row=0, column=row, sticky=N+E+S+W, pady=1)
+                    widg.grid_columnconfigure(row, weight=1)
+                else:
+                    but.grid(column=0, row=row, sticky=N+E+S+W, pady=1)
+                    widg.grid_columnconfigure(0, weight=1)
+                widg.but.append(but)
+        self.rightColumn.append(widg)
+        widg.grid(row=rowNum, column=self.numColumns, sticky=N+E+S+W)
+
+    # builds the command for an action button, in the specified row of buttons
+    def _actionCommand(self, name, row):
+        if len(self.actionButton) == 1:
+            return lambda *args: self.action(self._actionRow(row))
+        else:
+            return lambda *args: self.action(name, self._actionRow(row))
+
+    # the row of data that a row of buttons belongs to
+    def _actionRow(self, row):
+        return row
 
     def _updateButtons(self, position=0):
-        butCount = len(self.actionButton)
         for pos in range(position+1, len(self.rightColumn)):
             for but in self.rightColumn[pos].but:
-                if butCount == 1:
-                    command=lambda row=pos-1, *args: self.action(row)
-                else:
-                    command=lambda name=but.cget['text'], row=pos-1, *args: self.action(name, row)
-
-                but.config(command=command)
+                but.config(command=self._actionCommand(but.cget('text'), pos-1))
 
     def _createCell(self, rowNum, cellNum, val):
         if rowNum == 0: # adding title row
-            lab = GridCell(self.interior, self.fonts, isHeader=True, text=val)
+            lab = GridCell(self.interior, self.fonts, isHeader=True, bindTag=self.headerTag, text=val)
             lab.gridPos = ''.join(["h-", str(cellNum)])
-            lab.bind("<Button-1>", self._selectColumn)
         else:
-            lab = GridCell(self.interior, self.fonts, text=val, wrap=self.wrap)
+            lab = GridCell(self.interior, self.fonts, bindTag=self.cellTag, text=val, wrap=self.wrap)
             lab.gridPos = ''.join([str(rowNum - 1), "-", str(cellNum)])
 
-        if self.showMenu:
-            if gui.GET_PLATFORM() in [gui.WINDOWS, gui.LINUX]:
-                lab.bind('<Button-3>', self._rightClick)
-            else:
-                lab.bind('<Button-2>', self._rightClick)
-
         lab.grid(row=rowNum, column=cellNum, sticky=N+E+S+W)
         self.interior.columnconfigure(cellNum, weight=1)
         self.interior.rowconfigure(rowNum, weight=1)
@@ -14585,22 +16782,21 @@ class SimpleTable(ScrollPane):
         if columnNumber < 0 or columnNumber >= self.numColumns:
             raise Exception("Invalid column number.")
         else:
-            try:
-                selected = self.cells[1][columnNumber].selected
-            except IndexError:
+            cells = [row[columnNumber] for row in self.cells[1:]]
+            if len(cells) == 0:
                 # no rows to select
                 return
-            for rowCount in range(1, len(self.cells)):
-                if highlight is None:
-                    if selected:
-                        self.cells[rowCount][columnNumber].deselect()
-                    else:
-                        self.cells[rowCount][columnNumber].select()
-                else:
-                    if highlight:
-                        self.cells[rowCount][columnNumber].mouseEnter()
-                    else:
-                        self.cells[rowCount][columnNumber].mouseLeave()
+            self._selectCells(cells, highlight)
+
+    # toggles the selection of the cells, based on the first cell, or highlights them
+    def _selectCells(self, cells, highlight=None):
+        if highlight is None:
+            selected = not cells[0].selected
+            for cell in cells:
+                cell.selected = selected
+            self._styleCells(cells)
+        else:
+            self._styleCells(cells, "over" if highlight else None)
 
     def _selectRow(self, event=None):
         rowNumber = event.widget.gridPos.split("-")[0]
@@ -14614,14 +16810,7 @@ class SimpleTable(ScrollPane):
         if 1 > rowNumber >= len(self.cells)+1:
             raise Exception("Invalid row number.")
         else:
-            selected = self.cells[rowNumber][0].selected
-            for cell in self.cells[rowNumber]:
-                if highlight is None:
-                    if selected: cell.deselect()
-                    else: cell.select()
-                else:
-                    if highlight: cell.mouseEnter()
-                    else: cell.mouseLeave()
+            self._selectCells(self.cells[rowNumber], highlight)
 
     def _buildMenu(self):
         self.menu = Menu(self, tearoff=0)
@@ -14692,7 +16881,7 @@ class SimpleTable(ScrollPane):
             if self.editFunction is not None: self.editFunction()
             else: self.addColumn(int(vals[1])+1, [], callFunction=True)
         elif action == "selectCell" and vals[0] != "h":
-            self.lastSelected.toggleSelection()
+            self._toggleCellSelection(self.lastSelected)
         elif action == "selectRow":
             self.selectRow(int(vals[0]))
         elif action == "selectColumn":
@@ -14731,9 +16920,20 @@ class SimpleTable(ScrollPane):
             if self.editFunction is not None:
                 self.editFunction()
             else:
+                row, col = self.lastSelected.gridPos.split("-")
+                if row == "h": self.headers[int(col)] = self.newText
+                else:
+                    rowData = self.rows[int(row)]
+                    self._unindexRow(rowData)
+                    rowData[int(col)] = self.newText
+                    self._indexRow(rowData)
                 self.lastSelected.config(text=self.newText)
+                self._applyFilter()
                 if self.changeFunction is not None: self.changeFunction()
 
+    def _toggleCellSelection(self, cell):
+        cell.toggleSelection()
+
     def addColumn(self, columnNumber, data, callFunction=False):
         if columnNumber < 0 or columnNumber > self.numColumns:
             raise Exception("Invalid column number.")
@@ -14773,17 +16973,16 @@ class SimpleTable(ScrollPane):
                     cell.gridPos = ''.join([val, "-", str(colPos+1)])
 
             # then add this column
-            dataLen = len(data)
+            self._insertColumnData(columnNumber, data)
             for rowPos in range(cellCount):
-                if rowPos < dataLen:
-                    val = data[rowPos]
-                else:
-                    val = ""
+                if rowPos == 0: val = self.headers[columnNumber]
+                else: val = self.rows[rowPos-1][columnNumber]
                 lab = self._createCell(rowPos, columnNumber, val)
                 self.cells[rowPos].insert(columnNumber, lab)
 
             self.numColumns += 1
             self._showEntryBoxes()
+            self._applyFilter(reset=True)
             self.canvas.event_generate("<Configure>")
             if self.changeFunction is not None and callFunction:
                 self.changeFunction()
@@ -14801,6 +17000,7 @@ class SimpleTable(ScrollPane):
             for row in self.cells:
                 row[columnNumber].grid_forget()
                 del row[columnNumber]
+            self._deleteColumnData(columnNumber)
 
             # update the entry boxes
             if self.addRowEntries is not None and len(self.entries) >= columnNumber:
@@ -14831,24 +17031,220 @@ class SimpleTable(ScrollPane):
             self.numColumns -= 1
             # show the entry boxes
             self._showEntryBoxes()
+            self._applyFilter(reset=True)
             self.canvas.event_generate("<Configure>")
             if self.changeFunction is not None and callFunction:
                 self.changeFunction()
 
+    # the first value in data is the column's header, the rest are its rows
+    def _insertColumnData(self, columnNumber, data):
+        data = list(data)
+        data += [""] * (len(self.rows) + 1 - len(data))
+        self.headers.insert(columnNumber, data[0])
+        for row, val in zip(self.rows, data[1:]):
+            row.insert(columnNumber, val)
+        self._moveFilters(columnNumber, 1)
+
+    def _deleteColumnData(self, columnNumber):
+        del self.headers[columnNumber]
+        for row in self.rows:
+            del row[columnNumber]
+        self.filters.pop(columnNumber, None)
+        self._moveFilters(columnNumber, -1)
+
+    # moves the filters of the columns after a column that's been added or deleted
+    # the indexes are rebuilt when they're next needed
+    def _moveFilters(self, columnNumber, change):
+        self.filters = dict((col if col is None or col < columnNumber else col + change, value)
+                                for col, value in self.filters.items())
+        self.indexes = {}
+
+    # columnNumber can be a list of columns, earlier columns take priority
+    # descending can be a single value, or a list with one per column
     def sort(self, columnNumber, descending=False):
-        order = self._getSortedData(columnNumber, descending)
-        for k, val in enumerate(order):
-            for c, cell in enumerate(self.cells[k+1]):
-                cell.config(text=val[c])
-                cell.selected=False
-                cell.mouseLeave()
-
-    def _getSortedData(self, columnNumber, descending=False):
-        data = []
-        for pos in range(len(self.cells)-1):
-            row = self.getRow(pos)
-            data.append(row)
-        return  sorted(data,key=lambda l:l[columnNumber], reverse=descending)
+        oldRows = self.rows
+        selected = [[cell.selected for cell in row] for row in self.cells[1:]]
+        order = self._sortData(columnNumber, descending)
+
+        # only update the cells of rows that have moved, and selections move with their data
+        moved = []
+        for newPos, oldPos in enumerate(order):
+            if newPos == oldPos: continue
+            for c, cell in enumerate(self.cells[newPos+1]):
+                text = self._cellText(self.rows[newPos][c])
+                if text != self._cellText(oldRows[newPos][c]):
+                    cell.config(text=text)
+                if selected[oldPos][c] != cell.selected:
+                    cell.selected = selected[oldPos][c]
+                    moved.append(cell)
+        self._styleCells(moved)
+        self._applyFilter()
+
+    # sorts the rows, and returns the old position of each row
+    def _sortData(self, columnNumber, descending=False):
+        columns = list(columnNumber) if isinstance(columnNumber, (list, tuple)) else [columnNumber]
+        if isinstance(descending, (list, tuple)):
+            descending = list(descending) + [False] * (len(columns) - len(descending))
+        else:
+            descending = [descending] * len(columns)
+
+        for col in columns:
+            if col < 0 or col >= self.numColumns:
+                raise Exception("Invalid column number: %s." % col)
+
+        # python's sort is stable, so sort by the least important column first
+        order = list(range(len(self.rows)))
+        for col, desc in reversed(list(zip(columns, descending))):
+            keys = self._sortKeys([row[col] for row in self.rows])
+            order.sort(key=keys.__getitem__, reverse=desc)
+
+        self.rows = list(map(self.rows.__getitem__, order))
+        return order
+
+    # converts a column of values into keys that sort by type:
+    # numbers (including numeric text) first, then text, then empty cells
+    @staticmethod
+    def _sortKeys(values):
+        # most columns hold a single type, so check for that first
+        types = set(map(type, values))
+        if types.issubset(SimpleTable.NUMBER_TYPES):
+            # NaN can't be compared, so is sorted as text
+            if all(val == val for val in values): return values
+        elif types.issubset(SimpleTable.STRING_TYPES):
+            if not any(map(SimpleTable.NUMBER_START.match, values)):
+                if "" not in values: return values
+            else:
+                try:
+                    keys = list(map(float, values))
+                    # NaN can't be compared, so is sorted as text
+                    if all(key == key for key in keys): return keys
+                except ValueError:
+                    pass
+
+        return list(map(SimpleTable._sortKey, values))
+
+    # the key for a single value, used when a column holds several types, and by the filter indexes
+    @staticmethod
+    def _sortKey(val):
+        if val is None or val == "":
+            return (2, 0, "")
+        elif type(val) in SimpleTable.NUMBER_TYPES and val == val:
+            return (0, val, "")
+        text = "%s" % val
+        try:
+            num = float(text)
+            if num != num: raise ValueError(text)
+            return (0, num, "")
+        except ValueError:
+            return (1, 0, text)
+
+    # keeps the indexes of any filtered columns up to date
+    def _indexRow(self, row):
+        for col, index in self.indexes.items():
+            index.add(id(row), row[col])
+
+    def _unindexRow(self, row):
+        for col, index in self.indexes.items():
+            index.remove(id(row), row[col])
+
+    # ranges uses the sorted half of the index, otherwise the text half is used
+    def _getIndex(self, columnNumber, ranges=False):
+        index = self.indexes.get(columnNumber)
+        if index is None:
+            index = self.indexes[columnNumber] = TableIndex()
+        if (index.keys if ranges else index.texts) is None:
+            gui.trace("Indexing column %s of %s rows", columnNumber, len(self.rows))
+            rowIds = list(map(id, self.rows))
+            values = [row[columnNumber] for row in self.rows]
+            if ranges: index.buildKeys(rowIds, values)
+            else: index.buildTexts(rowIds, values)
+        return index
+
+    def setFilter(self, columnNumber, value):
+        ''' only shows rows whose value in the column matches, filters on different columns are combined
+            value can be some text to search for, a (low, high) range, or a function that returns True for matching values
+            columnNumber can be None, to search for the text in every column
+            setting value to None removes the column's filter '''
+        if columnNumber is not None and (columnNumber < 0 or columnNumber >= self.numColumns):
+            raise Exception("Invalid column number: %s." % columnNumber)
+        if value is None or value == "":
+            self.filters.pop(columnNumber, None)
+        else:
+            self.filters[columnNumber] = value
+        self._applyFilter()
+
+    def clearFilters(self):
+        self.filters = {}
+        if self.searchBox is not None:
+            self.searchBox.delete(0, END)
+        self._applyFilter()
+
+    # the positions of the rows matching all of the filters, or None if there are no filters
+    def _getFilteredRows(self):
+        if len(self.filters) == 0:
+            return None
+        ids = None
+        for columnNumber, value in self.filters.items():
+            matches = self._getFilterMatches(columnNumber, value)
+            ids = matches if ids is None else ids & matches
+        return list(compress(range(len(self.rows)), map(ids.__contains__, map(id, self.rows))))
+
+    def _getFilterMatches(self, columnNumber, value):
+        if columnNumber is None:
+            text = "%s" % value
+            matches = set()
+            for col in range(self.numColumns):
+                matches.update(self._getIndex(col).search(text))
+            return matches
+        elif callable(value):
+            return set(id(row) for row in self.rows if value(row[columnNumber]))
+        elif isinstance(value, (list, tuple)):
+            return self._getIndex(columnNumber, ranges=True).range(*value)
+        else:
+            return self._getIndex(columnNumber).search("%s" % value)
+
+    # hides & shows the rows whose visibility has changed
+    # reset will hide every filtered row, after rows have been re-gridded
+    def _applyFilter(self, reset=False):
+        if len(self.filters) == 0 and len(self.hiddenRows) == 0:
+            return
+        if reset:
+            self.hiddenRows = set()
+
+        visible = self._getFilteredRows()
+        if visible is None: hidden = set()
+        else:
+            hidden = set(range(len(self.rows)))
+            hidden.difference_update(visible)
+
+        for pos in self.hiddenRows - hidden:
+            self._showRow(pos, True)
+        for pos in hidden - self.hiddenRows:
+            self._showRow(pos, False)
+        self.hiddenRows = hidden
+
+    def _showRow(self, position, show):
+        widgets = list(self.cells[position+1])
+        if self.action is not None:
+            widgets.append(self.rightColumn[position+1])
+        for widg in widgets:
+            if show: widg.grid()
+            else: widg.grid_remove()
+
+    def _createSearchBox(self):
+        self.searchBox = Entry(self, relief=FLAT, borderwidth=1, highlightbackground='black', highlightthickness=1)
+        self.searchBox.grid(row=2, column=0, columnspan=2, sticky=E+W)
+        self.searchBox.bind("<KeyRelease>", self._scheduleSearch)
+
+    # waits for typing to stop, before searching
+    def _scheduleSearch(self, event=None):
+        if self.searchId is not None:
+            self.after_cancel(self.searchId)
+        self.searchId = self.after(self.SEARCH_SPEED, self._search)
+
+    def _search(self):
+        self.searchId = None
+        self.setFilter(None, self.searchBox.get())
 
     def _hideEntryBoxes(self):
         if self.addRowEntries is None or len(self.entries) == 0:
@@ -14931,6 +17327,310 @@ class SimpleTable(ScrollPane):
         '''Reset the scroll region to encompass the inner frame'''
         self.canvas.configure(scrollregion=self.canvas.bbox("all"))
 
+# a SimpleTable that only creates widgets for the rows that can be seen
+# the data is kept in the table's lists, and a pool of cells is reused to show
+# whichever rows have been scrolled to, so the number of widgets doesn't grow with the data
+class VirtualTable(SimpleTable):
+
+    def __init__(self, parent, title, data, *args, **opts):
+        # the first row of data being shown
+        self.top = 0
+        # the number of rows that fit in the table
+        self.pageRows = 1
+        # the selected cells, as (row, column) tuples
+        self.selectedCells = set()
+        self.drawId = None
+        # the positions of the rows matching the filters, None if there are no filters
+        self.visibleRows = None
+        self.filterDirty = False
+        # the position of the row drawn in each row of the pool
+        self.drawnRows = []
+
+        super(VirtualTable, self).__init__(parent, title, data, *args, **opts)
+
+        # the canvas doesn't scroll vertically, the pool of cells gets new data instead
+        self.canvas.config(yscrollcommand="")
+        self.vscrollbar.config(command=self._yview)
+        self.canvas.bind("<Configure>", lambda e: self._scheduleDraw(), add="+")
+        self._scheduleDraw()
+
+    def destroy(self):
+        if self.drawId is not None:
+            self.after_cancel(self.drawId)
+            self.drawId = None
+        super(VirtualTable, self).destroy()
+
+    def _addRow(self, rowData):
+        # the first row is the header
+        if len(self.cells) == 0:
+            super(VirtualTable, self)._addRow(rowData)
+        elif self.numColumns == 0:
+            raise Exception("No columns to add to.")
+        else:
+            if len(rowData) > self.numColumns:
+                gui.warn("New data has more columns (%s) than the table (%s), some columns will be discarded.", len(rowData), self.numColumns)
+            row = self._padRow(rowData)
+            self.rows.append(row)
+            self._indexRow(row)
+            self._applyFilter()
+
+    def _createCell(self, rowNum, cellNum, val):
+        lab = super(VirtualTable, self)._createCell(rowNum, cellNum, val)
+        lab.value = val
+        return lab
+
+    def _actionRow(self, row):
+        return self.drawnRows[row]
+
+    # the filtered rows are worked out when the table is next drawn
+    def _applyFilter(self, reset=False):
+        self.filterDirty = True
+        self._scheduleDraw()
+
+    # the number of rows that can be scrolled through
+    def _getViewCount(self):
+        return len(self.rows) if self.visibleRows is None else len(self.visibleRows)
+
+    # draws the visible rows, once any pending changes have been made
+    def _scheduleDraw(self):
+        if self.drawId is None:
+            self.drawId = self.after_idle(self._draw)
+
+    def _draw(self):
+        self.drawId = None
+        if self.filterDirty:
+            self.visibleRows = self._getFilteredRows()
+            self.filterDirty = False
+        count = self._getViewCount()
+
+        # make sure there are enough cells to fill the table
+        self.pageRows = max(self._getVisibleHeight() // self._getRowHeight(), 1)
+        self._resizePool(min(count, self.pageRows + 1))
+        self.top = max(min(self.top, count - self.pageRows), 0)
+
+        # the pool has a spare row, for partly visible rows, blank it when scrolled to the end
+        blank = [None] * self.numColumns
+        self.drawnRows = []
+        changed = []
+        for pos in range(1, len(self.cells)):
+            viewPos = self.top + pos - 1
+            if viewPos < count:
+                rowNum = viewPos if self.visibleRows is None else self.visibleRows[viewPos]
+                values = self.rows[rowNum]
+            else:
+                rowNum, values = len(self.rows), blank
+            self.drawnRows.append(rowNum)
+            for colNum, cell in enumerate(self.cells[pos]):
+                cell.gridPos = "%d-%d" % (rowNum, colNum)
+                if cell.value != values[colNum]:
+                    cell.value = values[colNum]
+                    cell.config(text=self._cellText(cell.value))
+                selected = (rowNum, colNum) in self.selectedCells
+                if selected != cell.selected:
+                    cell.selected = selected
+                    changed.append(cell)
+        self._styleCells(changed)
+
+        if count <= self.pageRows:
+            self.vscrollbar.set(0.0, 1.0)
+        else:
+            total = float(count)
+            self.vscrollbar.set(self.top / total, (self.top + self.pageRows) / total)
+
+    # the height available for rows of data
+    def _getVisibleHeight(self):
+        height = self.canvas.winfo_height()
+        if height <= 1:
+            height = self.canvas.winfo_reqheight()
+        if len(self.cells) > 0:
+            height -= max([cell.winfo_reqheight() for cell in self.cells[0]] +
+                            [widg.winfo_reqheight() for widg in self.rightColumn[:1]])
+        if len(self.entries) > 0:
+            height -= max(self.entries[0].lab.winfo_reqheight(), self.ent_but.lab.winfo_reqheight())
+        return height
+
+    def _getRowHeight(self):
+        if len(self.cells) > 1:
+            return max([self.cells[1][0].winfo_reqheight()] +
+                        [widg.winfo_reqheight() for widg in self.rightColumn[1:2]])
+        return self.fonts["dataFont"].metrics("linespace") + 2
+
+    # adds or removes rows of cells, so the pool is the specified size
+    def _resizePool(self, size):
+        if len(self.cells) == 0 or len(self.cells) - 1 == size:
+            return
+
+        hasEntries = len(self.entries) > 0
+        if hasEntries: self._hideEntryBoxes()
+        while len(self.cells) - 1 < size:
+            rowNum = len(self.cells)
+            self.cells.append([self._createCell(rowNum, cellNum, "") for cellNum in range(self.numColumns)])
+            self._createActions(rowNum)
+
+        while len(self.cells) - 1 > size:
+            for cell in self.cells.pop():
+                cell.destroy()
+            if self.action is not None:
+                self.rightColumn.pop().destroy()
+        if hasEntries: self._showEntryBoxes()
+
+    # scrolling changes which rows are drawn, rather than moving the canvas
+    def yscroll(self, direction, value=None):
+        if self.vDisabled:
+            return
+        count = self._getViewCount()
+        if value == "units":
+            top = self.top + direction
+        elif value == "pages":
+            top = self.top + direction * self.pageRows
+        else:
+            top = int(round(direction * count))
+
+        top = max(min(top, count - self.pageRows), 0)
+        if top != self.top:
+            self.top = top
+            self._scheduleDraw()
+
+    # called by the scrollbar
+    def _yview(self, *args):
+        if args[0] == "moveto":
+            self.yscroll(float(args[1]))
+        elif args[0] == "scroll":
+            self.yscroll(int(args[1]), args[2])
+
+    def replaceRow(self, rowNum, data):
+        if rowNum < 0 or rowNum >= len(self.rows):
+            raise Exception("Invalid row number.")
+        self._unindexRow(self.rows[rowNum])
+        self.rows[rowNum] = self._padRow(data)
+        self._indexRow(self.rows[rowNum])
+        self._applyFilter()
+
+    def deleteRow(self, position, pauseUpdate=False, callFunction=False):
+        if position < 0 or position >= len(self.rows):
+            raise Exception("Invalid row number.")
+        self._unindexRow(self.rows[position])
+        del self.rows[position]
+        self.selectedCells = set((row if row < position else row - 1, col)
+                                    for row, col in self.selectedCells if row != position)
+        self._applyFilter()
+        if self.changeFunction is not None and callFunction:
+            self.changeFunction()
+
+    def deleteAllRows(self, deleteHeader=False):
+        self.rows = []
+        self.indexes = {}
+        self.selectedCells = set()
+        self.top = 0
+        if deleteHeader:
+            self.headers = []
+            self._destroyCells()
+        self._destroyEntryBoxes()
+        self._applyFilter()
+        self.numColumns = -1
+
+    def _destroyCells(self):
+        for row in self.cells:
+            for cell in row:
+                cell.destroy()
+        for widg in self.rightColumn:
+            widg.destroy()
+        self.cells = []
+        self.rightColumn = []
+
+    def _destroyEntryBoxes(self):
+        if len(self.entries) > 0:
+            for e in self.entries:
+                e.lab.destroy()
+            self.ent_but.lab.destroy()
+        self.entries = []
+        self.entryProps = []
+
+    # rebuilds all the widgets, after the columns have changed
+    def _rebuildCells(self, entryProps):
+        self._destroyCells()
+        self._destroyEntryBoxes()
+        self._addRow(self.headers)
+        self._showEntryBoxes()
+        for pos, props in enumerate(entryProps[:len(self.entries)]):
+            if props['disabled']: self.disableEntry(pos)
+        self._applyFilter()
+
+    def addColumn(self, columnNumber, data, callFunction=False):
+        if columnNumber < 0 or columnNumber > self.numColumns:
+            raise Exception("Invalid column number.")
+        self._insertColumnData(columnNumber, data)
+        self.numColumns += 1
+        self.selectedCells = set((row, col if col < columnNumber else col + 1)
+                                    for row, col in self.selectedCells)
+        entryProps = self.entryProps
+        entryProps.insert(columnNumber, {'disabled':False})
+        self._rebuildCells(entryProps)
+        if self.changeFunction is not None and callFunction:
+            self.changeFunction()
+
+    def deleteColumn(self, columnNumber, callFunction=False):
+        if columnNumber < 0 or columnNumber >= self.numColumns:
+            raise Exception("Invalid column number: %s.", columnNumber)
+        self._deleteColumnData(columnNumber)
+        self.numColumns -= 1
+        self.selectedCells = set((row, col if col < columnNumber else col - 1)
+                                    for row, col in self.selectedCells if col != columnNumber)
+        entryProps = self.entryProps
+        if len(entryProps) > columnNumber: del entryProps[columnNumber]
+        self._rebuildCells(entryProps)
+        if self.changeFunction is not None and callFunction:
+            self.changeFunction()
+
+    def sort(self, columnNumber, descending=False):
+        order = self._sortData(columnNumber, descending)
+        if len(self.selectedCells) > 0:
+            positions = [0] * len(order)
+            for newPos, oldPos in enumerate(order):
+                positions[oldPos] = newPos
+            self.selectedCells = set((positions[row], col) for row, col in self.selectedCells)
+        self._applyFilter()
+
+    def _updateCell(self):
+        super(VirtualTable, self)._updateCell()
+        self._scheduleDraw()
+
+    def _toggleCellSelection(self, cell):
+        rowNum, colNum = [int(pos) for pos in cell.gridPos.split("-")]
+        # the spare row of the pool can be blank
+        if rowNum >= len(self.rows): return
+        if cell.selected: self.selectedCells.discard((rowNum, colNum))
+        else: self.selectedCells.add((rowNum, colNum))
+        cell.toggleSelection()
+
+    def selectColumn(self, columnNumber, highlight=None):
+        if columnNumber < 0 or columnNumber >= self.numColumns:
+            raise Exception("Invalid column number.")
+        elif highlight is None:
+            if (0, columnNumber) in self.selectedCells:
+                self.selectedCells = set([cell for cell in self.selectedCells if cell[1] != columnNumber])
+            else:
+                self.selectedCells.update(zip(range(len(self.rows)), repeat(columnNumber)))
+            self._scheduleDraw()
+        else:
+            # only the visible cells can be highlighted
+            self._styleCells([row[columnNumber] for row in self.cells[1:]], "over" if highlight else None)
+
+    def selectRow(self, rowNumber, highlight=None):
+        rowNumber = int(rowNumber)
+        if rowNumber < 0 or rowNumber >= len(self.rows):
+            raise Exception("Invalid row number.")
+        elif highlight is None:
+            cells = set((rowNumber, colNum) for colNum in range(self.numColumns))
+            if (rowNumber, 0) in self.selectedCells: self.selectedCells -= cells
+            else: self.selectedCells |= cells
+            self._scheduleDraw()
+        elif rowNumber in self.drawnRows:
+            self._styleCells(self.cells[self.drawnRows.index(rowNumber) + 1], "over" if highlight else None)
+
+    def getSelectedCells(self):
+        return ["%d-%d" % cell for cell in sorted(self.selectedCells)]
+
 ##########################
 # MicroBit Simulator
 ##########################
@@ -15042,7 +17742,7 @@ class CopyAndPaste():
                     self.canCut = self.canCopy = True
                 if not self.widget.showingDefault and widget.index(END) > 0:
                     self.canSelect = True
-            elif self.widgetType in ["ScrolledText", "Text", "AjText", "AjScrolledText"]:
+            elif self.widgetType in ["ScrolledText", "Text", "AjText", "AjScrolledText", "AjFileView"]:
                 if widget.tag_ranges("sel"):
                     self.canCut = self.canCopy = True
                     self.canFont = True
@@ -15164,6 +17864,81 @@ class PauseCallFunction():
             self.widg.cmd_id = self.tracer.trace('w', self.widg.cmd)
             gui.trace("callFunction resumed")
 
+#####################################
+# class to share the frames of an animated GIF
+#####################################
+class AnimationFrames(object):
+    """ the frames of an animated GIF, shared by all labels showing it
+        the number of frames & their delays are read from the file up front,
+        each frame is only decoded once, the first time it's needed """
+
+    # used when a frame doesn't specify a delay
+    DEFAULT_DELAY = 150
+
+    def __init__(self, path):
+        self.path = path
+        self.modTime = os.path.getmtime(path)
+        self.delays = AnimationFrames.readDelays(path)
+        self.count = len(self.delays)
+        self.pics = [None] * self.count
+        # the number of labels showing these frames
+        self.refs = 0
+
+    def frame(self, pos):
+        pic = self.pics[pos]
+        if pic is None:
+            pic = PhotoImage(file=self.path, format="gif - {0}".format(pos))
+            self.pics[pos] = pic
+        return pic
+
+    def delay(self, pos):
+        return self.delays[pos] or AnimationFrames.DEFAULT_DELAY
+
+    @staticmethod
+    def readDelays(path):
+        """ walks the blocks in a GIF file, without decoding any frames
+            returns a list of each frame's delay, in milliseconds - 0 if not set """
+        with open(path, "rb") as f:
+            data = bytearray(f.read())
+        if data[:3] != bytearray(b"GIF"):
+            return []
+
+        delays = []
+        delay = 0
+        try:
+            # skip the header, screen descriptor & global colour table
+            pos = 13
+            if data[10] & 0x80: pos += 3 << ((data[10] & 7) + 1)
+
+            while True:
+                isFrame = data[pos] == 0x2C
+                if isFrame:
+                    # image descriptor, local colour table & LZW code size
+                    flags = data[pos+9]
+                    pos += 11
+                    if flags & 0x80: pos += 3 << ((flags & 7) + 1)
+                elif data[pos] == 0x21:
+                    # graphic control extension holds the delay, in 1/100ths of a second
+                    if data[pos+1] == 0xF9:
+                        delay = (data[pos+4] | data[pos+5] << 8) * 10
+                    pos += 2
+                else:
+                    # trailer
+                    break
+
+                # skip the data sub-blocks
+                while data[pos]:
+                    pos += data[pos] + 1
+                pos += 1
+
+                if isFrame:
+                    delays.append(delay)
+                    delay = 0
+        except IndexError:
+            pass # truncated file, tk will show what it can
+
+        return delays
+
 #####################################
 # classes to work with image maps
 #####################################
@@ -0,0 +1,238 @@
+# Scales PPM/PGM image data to arbitrary sizes
+#
+# Used by appJar to resize images, as tkinter's PhotoImage
+# only supports zooming & subsampling by whole numbers.
+#
+# Pixels are read from binary PPM (P6) or PGM (P5) data, the same
+# formats used to get decoded JPEGs and PNGs into tkinter.
+# Two methods are supported:
+#   nearest  - picks the pixel closest to the centre of each new pixel
+#   smooth   - averages boxes of pixels when shrinking by 2 or more,
+#              then does bilinear interpolation to reach the final size
+#
+# A mask of transparent pixels can be scaled alongside the image,
+# it's always scaled using the nearest method.
+#
+# If numpy is installed it's used, otherwise pure python is used.
+# Both give identical results.
+
+from operator import itemgetter
+try: import numpy
+except ImportError: numpy = None
+
+# fixed point precision of the bilinear weights
+SCALE_BITS = 8
+SCALE_ONE = 1 << SCALE_BITS
+SCALE_ROUND = SCALE_ONE >> 1
+
+
+def readPpm(data):
+    """ parses the header of binary PPM or PGM data
+        returns a tuple of (width, height, channels, offset of the first pixel) """
+    fields = []
+    pos = 0
+    while len(fields) < 4:
+        # skip whitespace & comments
+        while data[pos:pos+1].isspace() or data[pos:pos+1] == b"#":
+            if data[pos:pos+1] == b"#":
+                while data[pos:pos+1] not in (b"\n", b"\r", b""):
+                    pos += 1
+            pos += 1
+        start = pos
+        while pos < len(data) and not data[pos:pos+1].isspace():
+            pos += 1
+        if start == pos:
+            raise ValueError("Invalid PPM data, header is incomplete")
+        fields.append(bytes(data[start:pos]))
+
+    if fields[0] == b"P6": channels = 3
+    elif fields[0] == b"P5": channels = 1
+    else: raise ValueError("Invalid PPM data, only P5 & P6 are supported")
+    if int(fields[3]) != 255:
+        raise ValueError("Invalid PPM data, only 8 bit images are supported")
+
+    # a single whitespace character follows the header
+    return int(fields[1]), int(fields[2]), channels, pos + 1
+
+
+def makePpm(width, height, channels, pixels):
+    """ builds binary PPM or PGM data from a buffer of pixels """
+    header = ("P%d\n%d %d\n255\n" % (6 if channels == 3 else 5, width, height)).encode("ascii")
+    return b"".join((header, bytes(pixels)))
+
+
+def scalePpm(data, width, height, smooth=True, mask=None):
+    """ scales binary PPM or PGM data to the specified size
+
+        data   - the PPM data, as bytes
+        smooth - use box & bilinear filtering, otherwise nearest neighbour
+        mask   - an optional bytearray, with a 1 for each transparent pixel
+
+        returns a tuple of (the new PPM data, the new mask or None) """
+    if width < 1 or height < 1:
+        raise ValueError("Invalid size: %dx%d" % (width, height))
+
+    srcWidth, srcHeight, channels, offset = readPpm(data)
+    pixels = memoryview(data)[offset:offset + srcWidth * srcHeight * channels]
+    xs = _nearest(srcWidth, width)
+    ys = _nearest(srcHeight, height)
+
+    if numpy is not None:
+        src = numpy.frombuffer(pixels, dtype=numpy.uint8).reshape(srcHeight, srcWidth, channels)
+        if smooth:
+            out = _smoothArray(src, width, height)
+        else:
+            out = src[ys][:, xs]
+        out = numpy.ascontiguousarray(out).tobytes()
+        if mask is not None:
+            mask = numpy.frombuffer(bytes(mask), dtype=numpy.uint8).reshape(srcHeight, srcWidth)
+            mask = bytearray(numpy.ascontiguousarray(mask[ys][:, xs]).tobytes())
+    else:
+        pixels = bytearray(pixels)
+        if smooth:
+            out = _smooth(pixels, srcWidth, srcHeight, channels, width, height)
+        else:
+            out = _sample(pixels, srcWidth, channels, xs, ys)
+        if mask is not None:
+            mask = _sample(mask, srcWidth, 1, xs, ys)
+
+    return makePpm(width, height, channels, out), mask
+
+
+def maskToRuns(mask, width):
+    """ returns the runs of transparent pixels in a mask, as (start, end, y),
+        where end is the pixel after the run """
+    runs = []
+    for y in range(0, len(mask) // width):
+        row = y * width
+        start = mask.find(b"\x01", row, row + width)
+        while start != -1:
+            end = mask.find(b"\x00", start, row + width)
+            if end == -1: end = row + width
+            runs.append((start - row, end - row, y))
+            start = mask.find(b"\x01", end, row + width)
+    return runs
+
+
+def runsToMask(runs, width, height):
+    """ builds a mask from a list of runs of transparent pixels, as (start, end, y) """
+    mask = bytearray(width * height)
+    for start, end, y in runs:
+        mask[y * width + start:y * width + end] = b"\x01" * (end - start)
+    return mask
+
+
+# the source position nearest to the centre of each new position
+def _nearest(srcSize, size):
+    return [((2 * i + 1) * srcSize) // (2 * size) for i in range(size)]
+
+
+# the source positions either side of the centre of each new position,
+# and their fixed point weights
+def _bilinear(srcSize, size):
+    taps = []
+    for i in range(size):
+        # centre of the new position, in 1/(2*size) of a source position
+        pos = (2 * i + 1) * srcSize - size
+        if pos <= 0:
+            taps.append((0, 0, SCALE_ONE, 0))
+            continue
+        first = pos // (2 * size)
+        weight = ((pos % (2 * size)) * SCALE_ONE) // (2 * size)
+        if first >= srcSize - 1:
+            taps.append((srcSize - 1, srcSize - 1, SCALE_ONE, 0))
+        else:
+            taps.append((first, first + 1, SCALE_ONE - weight, weight))
+    return taps
+
+
+# nearest neighbour scaling, a row at a time, reusing repeated rows
+def _sample(pixels, srcWidth, channels, xs, ys):
+    stride = srcWidth * channels
+    indexes = [x * channels + c for x in xs for c in range(channels)]
+    if len(indexes) == 1:
+        pick = lambda row: (row[indexes[0]],)
+    else:
+        pick = itemgetter(*indexes)
+
+    rows = []
+    lastY = None
+    for y in ys:
+        if y != lastY:
+            start = y * stride
+            row = bytearray(pick(pixels[start:start + stride]))
+            lastY = y
+        rows.append(row)
+    return bytearray().join(rows)
+
+
+# averages boxes of xStep * yStep pixels
+def _box(pixels, srcWidth, srcHeight, channels, xStep, yStep):
+    width, height = srcWidth // xStep, srcHeight // yStep
+    stride = srcWidth * channels
+    span = xStep * channels
+    starts = [x * span + c for x in range(width) for c in range(channels)]
+
+    rows = []
+    for y in range(height):
+        block = []
+        for start in range(y * yStep * stride, (y + 1) * yStep * stride, stride):
+            row = pixels[start:start + stride]
+            block.append([sum(row[i:i + span:channels]) // xStep for i in starts])
+        if yStep == 1:
+            rows.append(bytearray(block[0]))
+        else:
+            rows.append(bytearray([sum(column) // yStep for column in zip(*block)]))
+    return bytearray().join(rows), width, height
+
+
+# box filter when shrinking, then bilinear interpolation
+def _smooth(pixels, srcWidth, srcHeight, channels, width, height):
+    xStep, yStep = max(srcWidth // width, 1), max(srcHeight // height, 1)
+    if xStep > 1 or yStep > 1:
+        pixels, srcWidth, srcHeight = _box(pixels, srcWidth, srcHeight, channels, xStep, yStep)
+
+    stride = srcWidth * channels
+    xTaps = [(a * channels + c, b * channels + c, wa, wb)
+                for a, b, wa, wb in _bilinear(srcWidth, width) for c in range(channels)]
+
+    # scale each source row horizontally, the first time it's needed
+    scaled = {}
+    def scaleRow(y):
+        row = scaled.get(y)
+        if row is None:
+            src = pixels[y * stride:(y + 1) * stride]
+            row = [(src[a] * wa + src[b] * wb + SCALE_ROUND) >> SCALE_BITS for a, b, wa, wb in xTaps]
+            scaled[y] = row
+        return row
+
+    rows = []
+    for a, b, wa, wb in _bilinear(srcHeight, height):
+        if wb == 0:
+            rows.append(bytearray(scaleRow(a)))
+        else:
+            rows.append(bytearray([(p * wa + q * wb + SCALE_ROUND) >> SCALE_BITS
+                                    for p, q in zip(scaleRow(a), scaleRow(b))]))
+        # rows above a are never needed again
+        for y in [y for y in scaled if y < a]:
+            del scaled[y]
+    return bytearray().join(rows)
+
+
+# numpy version of _box & _smooth
+def _smoothArray(src, width, height):
+    srcHeight, srcWidth = src.shape[:2]
+    xStep, yStep = max(srcWidth // width, 1), max(srcHeight // height, 1)
+    src = src.astype(numpy.int32)
+    if xStep > 1 or yStep > 1:
+        boxWidth, boxHeight = srcWidth // xStep, srcHeight // yStep
+        src = src[:boxHeight * yStep, :boxWidth * xStep]
+        src = src.reshape(boxHeight * yStep, boxWidth, xStep, -1).sum(axis=2) // xStep
+        src = src.reshape(boxHeight, yStep, boxWidth, -1).sum(axis=1) // yStep
+        srcHeight, srcWidth = boxHeight, boxWidth
+
+    a, b, wa, wb = [numpy.array(t) for t in zip(*_bilinear(srcWidth, width))]
+    rows = (src[:, a] * wa[:, None] + src[:, b] * wb[:, None] + SCALE_ROUND) >> SCALE_BITS
+    a, b, wa, wb = [numpy.array(t) for t in zip(*_bilinear(srcHeight, height))]
+    out = (rows[a] * wa[:, None, None] + rows[b] * wb[:, None, None] + SCALE_ROUND) >> SCALE_BITS
+    return out.astype(numpy.uint8)
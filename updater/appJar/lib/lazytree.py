@@ -0,0 +1,388 @@
+# Reads tree data on demand, a few nodes at a time
+#
+# Used by appJar's lazy trees, so that only the parts of a tree
+# being shown are ever read.
+#
+# Two sources are supported:
+#   XmlSource      - reads the elements of an XML document
+#   CallbackSource - calls a function to get the children of a node
+#
+# XML can be read from text, a file or a stream. Streams that can't seek
+# are copied to a temporary file first, a chunk at a time.
+#
+# Nothing in an XML document is parsed up front. The position of each
+# element is recorded as it's read, so that its children can be read
+# later, by parsing from that position to the end of the element.
+# Only the children of the elements being shown are held in memory,
+# however big the document is.
+#
+# expat is used directly, rather than ElementTree's iterparse(),
+# as it reports the position of each element.
+#
+# Documents are saved by copying the unchanged parts a chunk at a time,
+# and only writing out the text that's been edited.
+
+import os
+import re
+import codecs
+import tempfile
+import xml.parsers.expat
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+# how many bytes are parsed at a time
+CHUNK_SIZE = 1 << 16
+
+# the encoding in an XML declaration
+DECLARED_ENCODING = re.compile(r"""\s*<\?xml[^>]*\sencoding\s*=\s*["']([^"']+)["']""")
+
+
+# raised by the parser's handlers, to stop parsing
+class _Done(Exception):
+    pass
+
+
+def openXml(data):
+    """ makes an XmlSource from XML text or bytes, a file name, or a stream """
+    if hasattr(data, "read"):
+        try: seekable = data.seekable()
+        except AttributeError: seekable = hasattr(data, "seek")
+        if seekable and isinstance(data.read(0), bytes):
+            return XmlSource(data)
+        else:
+            return XmlSource(_spool(data))
+    elif isinstance(data, bytes):
+        if b"<" in data: return XmlSource(BytesIO(data))
+        else: return XmlSource(open(data, "rb"))
+    elif "<" in data:
+        return XmlSource(BytesIO(data.encode(_getTextEncoding(data), "xmlcharrefreplace")))
+    else:
+        return XmlSource(open(data, "rb"))
+
+
+# text is encoded as its declaration says, so the declaration is still right when it's saved
+def _getTextEncoding(text):
+    match = DECLARED_ENCODING.match(text)
+    return "utf-8" if match is None else match.group(1)
+
+
+# copies a stream to a temporary file, so it can be read from anywhere
+def _spool(stream):
+    spool = tempfile.TemporaryFile()
+    data = stream.read(CHUNK_SIZE)
+    encoding = None
+    while data:
+        if not isinstance(data, bytes):
+            if encoding is None: encoding = _getTextEncoding(data)
+            data = data.encode(encoding, "xmlcharrefreplace")
+        spool.write(data)
+        data = stream.read(CHUNK_SIZE)
+    return spool
+
+
+def saveDom(node, fileName):
+    """ saves a minidom node to a file, as UTF-8, without building all the text first """
+    with codecs.open(fileName, "w", "utf-8") as out:
+        # documents write their own declaration
+        if node.nodeType == node.DOCUMENT_NODE:
+            node.writexml(out, encoding="utf-8")
+        else:
+            out.write('<?xml version="1.0" encoding="utf-8"?>')
+            node.writexml(out)
+
+
+class XmlNode(object):
+    """ an element, or a run of text, in an XML document """
+
+    def __init__(self, tag, attrib, offset):
+        # the element's name, or None for text
+        self.tag = tag
+        self.attrib = attrib
+        self.text = None
+        # where the node starts
+        self.offset = offset
+        # where the element's end tag starts, or where the text ends
+        self.close = None
+        # True if the element has nothing between its tags
+        self.empty = True
+        # True if the element has child elements, or text
+        self.expandable = False
+
+
+class XmlSource(object):
+    """ an XML document, read from a seekable binary stream """
+
+    def __init__(self, stream, encoding=None):
+        self.stream = stream
+        # overrides the encoding declared by the document
+        self.encoding = encoding
+        self.declared = None
+        # edited text nodes, by their offset
+        self.edits = {}
+        # everything before the root element, fed to the parser before each element
+        self.prolog = b""
+        self.root = self._readRoot()
+
+    def getEncoding(self):
+        return self.encoding or self.declared or "utf-8"
+
+    def _makeParser(self):
+        parser = xml.parsers.expat.ParserCreate(self.encoding)
+        parser.XmlDeclHandler = self._decl
+        return parser
+
+    def _decl(self, version, encoding, standalone):
+        if encoding: self.declared = encoding
+
+    # reads bytes from the stream, from start up to end, a chunk at a time
+    def _read(self, start, end=None):
+        while end is None or start < end:
+            self.stream.seek(start)
+            size = CHUNK_SIZE if end is None else min(CHUNK_SIZE, end - start)
+            data = self.stream.read(size)
+            if not data: break
+            start += len(data)
+            yield data
+
+    # parses up to the start of the root element
+    def _readRoot(self):
+        parser = self._makeParser()
+        found = []
+        def start(tag, attrib):
+            found.append(XmlNode(tag, attrib, parser.CurrentByteIndex))
+            raise _Done()
+        parser.StartElementHandler = start
+
+        try:
+            for data in self._read(0):
+                parser.Parse(data, False)
+            parser.Parse(b"", True)
+        except _Done:
+            pass
+
+        root = found[0]
+        # there's no way to know, without reading the whole document
+        root.expandable = True
+        self.stream.seek(0)
+        self.prolog = self.stream.read(root.offset)
+        return root
+
+    def getChildren(self, node):
+        """ generates the child elements, and runs of text, of an element
+            the document is only parsed as far as the children taken """
+        if node.tag is None or self.stream.closed: return
+        parser = self._makeParser()
+        # positions in the parser are after the prolog
+        base = node.offset - len(self.prolog)
+        state = {"depth": 0, "child": None, "textStart": None, "expandable": False}
+        text = []
+        found = []
+
+        # makes a node from any text before the next tag
+        def flushText(pos):
+            if state["textStart"] is not None:
+                value = "".join(text)
+                if value.strip():
+                    textNode = self.edits.get(state["textStart"])
+                    if textNode is None:
+                        textNode = XmlNode(None, {}, state["textStart"])
+                        textNode.text = value
+                        textNode.close = pos
+                    found.append(textNode)
+                state["textStart"] = None
+                del text[:]
+
+        def start(tag, attrib):
+            pos = parser.CurrentByteIndex + base
+            state["depth"] += 1
+            if state["depth"] == 2:
+                flushText(pos)
+                node.empty = False
+                state["child"] = XmlNode(tag, attrib, pos)
+            elif state["depth"] == 3:
+                state["child"].empty = False
+                state["child"].expandable = True
+                # nothing else is needed from inside the child, until it ends
+                parser.StartElementHandler = deepStart
+                parser.EndElementHandler = deepEnd
+                parser.CharacterDataHandler = None
+
+        def deepStart(tag, attrib):
+            state["depth"] += 1
+
+        def deepEnd(tag):
+            if state["depth"] == 2:
+                parser.StartElementHandler = start
+                parser.EndElementHandler = end
+                parser.CharacterDataHandler = chars
+                end(tag)
+            else:
+                state["depth"] -= 1
+
+        def end(tag):
+            pos = parser.CurrentByteIndex + base
+            state["depth"] -= 1
+            if state["depth"] == 1:
+                state["child"].close = pos
+                found.append(state["child"])
+                state["child"] = None
+                state["expandable"] = True
+            elif state["depth"] == 0:
+                flushText(pos)
+                node.close = pos
+                node.expandable = state["expandable"]
+                raise _Done()
+
+        # comments & processing instructions end a run of text
+        # so editing the text can't remove them
+        def markup(*args):
+            if state["depth"] == 1:
+                flushText(parser.CurrentByteIndex + base)
+                node.empty = False
+            elif state["depth"] == 2:
+                state["child"].empty = False
+
+        def chars(data):
+            if state["depth"] == 1:
+                if state["textStart"] is None:
+                    state["textStart"] = parser.CurrentByteIndex + base
+                text.append(data)
+                node.empty = False
+                if data.strip(): state["expandable"] = True
+            elif state["depth"] == 2:
+                state["child"].empty = False
+                if data.strip(): state["child"].expandable = True
+
+        parser.StartElementHandler = start
+        parser.EndElementHandler = end
+        parser.CharacterDataHandler = chars
+        parser.CommentHandler = markup
+        parser.ProcessingInstructionHandler = markup
+
+        try:
+            parser.Parse(self.prolog, False)
+            for data in self._read(node.offset):
+                parser.Parse(data, False)
+                for child in found: yield child
+                del found[:]
+            parser.Parse(b"", True)
+        except _Done:
+            pass
+        for child in found: yield child
+
+    def getText(self, node):
+        if node.tag is None: return node.text
+        else: return node.tag
+
+    def getAttributes(self, node):
+        return node.attrib
+
+    def isExpandable(self, node):
+        return node.expandable and not self.stream.closed
+
+    def isEditable(self, node):
+        return node.tag is None
+
+    def setText(self, node, text):
+        """ changes a run of text, the change is kept until the document is written """
+        node.text = text
+        self.edits[node.offset] = node
+
+    def getEnd(self, node):
+        """ returns the position just after an element or run of text """
+        if node.close is None:
+            # reading all the children finds the end tag
+            for child in self.getChildren(node): pass
+        if node.tag is None:
+            return node.close
+
+        # elements like <tag/> end where the end tag would start
+        if node.empty and node.close >= 2:
+            self.stream.seek(node.close - 2)
+            if self.stream.read(2) == b"/>":
+                return node.close
+
+        pos = node.close
+        for data in self._read(node.close):
+            found = data.find(b">")
+            if found != -1:
+                return pos + found + 1
+            pos += len(data)
+        return pos
+
+    def write(self, out, node=None):
+        """ writes an element, or the whole document, to a binary stream
+            unchanged parts are copied a chunk at a time """
+        if node is None:
+            pos, end = 0, None
+        else:
+            pos, end = node.offset, self.getEnd(node)
+        edits = sorted([e for e in self.edits.values() if e.offset >= pos and (end is None or e.close <= end)],
+                        key=lambda e: e.offset)
+
+        encoding = self.getEncoding()
+        for edit in edits:
+            for data in self._read(pos, edit.offset):
+                out.write(data)
+            out.write(escape(edit.text).encode(encoding, "xmlcharrefreplace"))
+            pos = edit.close
+        for data in self._read(pos, end):
+            out.write(data)
+
+    def getXml(self, node):
+        """ returns an element as XML text, including any changes """
+        out = BytesIO()
+        self.write(out, node)
+        return out.getvalue().decode(self.getEncoding())
+
+    def save(self, fileName):
+        """ saves the document, including any changes, to a file
+            it can't be saved over the file it's being read from """
+        name = getattr(self.stream, "name", None)
+        # temporary files are named by their file descriptor
+        if name is not None and not isinstance(name, int) and \
+                os.path.normcase(os.path.abspath(name)) == os.path.normcase(os.path.abspath(fileName)):
+            raise Exception("Can't save the XML over the file it's being read from: " + fileName)
+        with open(fileName, "wb") as out:
+            self.write(out)
+
+    def close(self):
+        self.stream.close()
+
+
+class CallbackSource(object):
+    """ a tree read from a function, that's passed a node & returns its children
+        each node is shown as text, and used as its id """
+
+    def __init__(self, root, getChildren):
+        self.root = root
+        self.func = getChildren
+
+    def getChildren(self, node):
+        return self.func(node) or []
+
+    def getText(self, node):
+        return "%s" % (node,)
+
+    def getAttributes(self, node):
+        return {"id": node}
+
+    # there's no way to know, without calling the function
+    def isExpandable(self, node):
+        return True
+
+    def isEditable(self, node):
+        return False
+
+    def setText(self, node, text):
+        pass
+
+    def getXml(self, node):
+        return None
+
+    def save(self, fileName):
+        raise Exception("Can't save a tree read from a function as XML")
+
+    # there's nothing to close, but no more children are read
+    def close(self):
+        self.func = lambda node: None
@@ -0,0 +1,107 @@
+# Finds lines in large files, without reading them into memory
+#
+# Used by appJar's file views, to show a few lines at a time
+# from files that are too big to load into a text area.
+#
+# The file is memory mapped, and split into blocks of BLOCK_SIZE bytes.
+# Only the number of lines before each block is kept, so the index
+# stays small, however many lines there are.
+# To find a line, its block is found with a bisect, then the newlines
+# in that block are searched.
+#
+# Counting the blocks can take a few seconds for files of several GB,
+# so it's done a few blocks at a time by update(), or all at once by
+# build(), which is safe to run on a worker thread.
+
+import os
+import mmap
+from bisect import bisect_left
+
+# how many bytes are counted at a time
+BLOCK_SIZE = 1 << 16
+
+
+class LineIndex(object):
+    """ an index of the lines in a file """
+
+    def __init__(self, fileName):
+        self.fileName = fileName
+        self.file = open(fileName, "rb")
+        self.size = os.fstat(self.file.fileno()).st_size
+        # empty files can't be mapped
+        if self.size > 0:
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self.data = b""
+        # the number of newlines before each block, and after the last counted block
+        self.blockLines = [0]
+        # how many bytes have been counted
+        self.counted = 0
+        self.closed = False
+
+    def close(self):
+        """ stops any counting, and closes the file """
+        self.closed = True
+        if self.size > 0:
+            self.data.close()
+        self.file.close()
+
+    def update(self, blocks=16):
+        """ counts the lines in the next few blocks
+            returns True if there are more blocks to count """
+        for i in range(blocks):
+            if self.counted >= self.size:
+                break
+            end = min(self.counted + BLOCK_SIZE, self.size)
+            self.blockLines.append(self.blockLines[-1] + self.data[self.counted:end].count(b"\n"))
+            self.counted = end
+        return self.counted < self.size
+
+    def build(self):
+        """ counts the lines in the rest of the file, stopping if the file is closed """
+        try:
+            while not self.closed and self.update(256):
+                pass
+        except ValueError:
+            # the file was closed while counting
+            if not self.closed: raise
+
+    def isComplete(self):
+        return self.counted >= self.size
+
+    def countLines(self, estimate=False):
+        """ returns the number of lines counted so far
+            or, if estimate is True, a guess at the number of lines in the whole file """
+        lines = self.blockLines[-1]
+        if self.isComplete():
+            # the last line doesn't always end with a newline
+            if self.size > 0 and self.data[self.size - 1:self.size] != b"\n":
+                lines += 1
+            return lines
+        elif estimate and self.counted > 0:
+            return max(lines, lines * self.size // self.counted)
+        else:
+            return lines
+
+    def getOffset(self, line):
+        """ returns the position in the file of the start of the line
+            lines past those counted so far start after the last counted line """
+        if line > self.blockLines[-1]:
+            if self.isComplete(): return self.size
+            line = self.blockLines[-1]
+        if line <= 0:
+            return 0
+
+        # the block holding the newline before the line
+        block = bisect_left(self.blockLines, line) - 1
+        pos = block * BLOCK_SIZE - 1
+        for i in range(line - self.blockLines[block]):
+            pos = self.data.find(b"\n", pos + 1)
+        return pos + 1
+
+    def getLines(self, first, count):
+        """ returns the bytes of count lines, starting from line first
+            only lines in the counted blocks are returned """
+        start = self.getOffset(first)
+        end = self.getOffset(first + count)
+        return self.data[start:end]
@@ -1,4 +1,6 @@
 import array, sys
+try: import numpy
+except ImportError: numpy = None
 # NanoJPEG -- KeyJ's Tiny Baseline JPEG Decoder
 # version 1.1 (2010-03-05)
 # by Martin J. Fiedler <martin.fiedler@gmx.net>
@@ -177,6 +179,10 @@ NJ_USE_WIN32 = 0
 
 NJ_CHROMA_FILTER = 1
 
+# use NumPy (when it can be imported) to run the IDCT a whole MCU row at a
+# time, and to do the YCbCr->RGB conversion for the whole image at once
+NJ_USE_NUMPY = numpy is not None
+
 
 ###############################################################################
 ## EXAMPLE PROGRAM                                                           ##
@@ -271,6 +277,7 @@ class nj_component_t(object):
         self.dctabsel = 0
         self.dcpred = 0
         self.pixels = None
+        self.coefs = None # dequantized blocks of the current MCU row (NumPy path only)
 
 # typedef struct _nj_ctx {
 #     nj_result_t error;
@@ -310,9 +317,9 @@ class nj_context_t(object):
         self.qtavail = 0
         self.qtab = [[0] * 64, [0] * 64, [0] * 64, [0] * 64]
         # nj_vlc_code_t vlctab[4][65536] = None
-        self.vlctab = []
-        for n in range(4):
-            self.vlctab.append([nj_vlc_code_t() for i in range(65536)])
+        # stored as a pair of byte arrays (bits, code) per table, rather than
+        # 65536 nj_vlc_code_t objects per table
+        self.vlctab = [(bytearray(65536), bytearray(65536)) for n in range(4)]
         self.buf = 0
         self.bufbits = 0
         self.block = [0] * 64
@@ -332,6 +339,13 @@ def njClip(x):
     if x > 0xFF: return 0xFF
     return x
 
+# njClipTab: precomputed njClip(), indexed by (x & NJ_CLIP_MASK).
+# It is exact for -384 <= x < 640, which covers every value the IDCT, the
+# chroma filter and the colour conversion produce for valid data - anything
+# further out can only come from a corrupt file, and simply wraps around.
+NJ_CLIP_MASK = 1023
+njClipTab = bytearray([njClip(x if x < 640 else x - 1024) for x in range(1024)])
+
 W1 = 2841
 W2 = 2676
 W3 = 2408
@@ -348,15 +362,7 @@ def njRowIDCT(blk, p):
     x6 = blk[p + 5]
     x7 = blk[p + 3]
     if (not (x1 | x2 | x3 | x4 | x5 | x6 | x7)):
-        v = blk[p + 0] << 3
-        blk[p + 0] = v
-        blk[p + 1] = v
-        blk[p + 2] = v
-        blk[p + 3] = v
-        blk[p + 4] = v
-        blk[p + 5] = v
-        blk[p + 6] = v
-        blk[p + 7] = v
+        blk[p:p + 8] = [blk[p + 0] << 3] * 8
         return
     x0 = (blk[p + 0] << 11) + 128
     x8 = W7 * (x4 + x5)
@@ -380,18 +386,12 @@ def njRowIDCT(blk, p):
     x0 -= x2
     x2 = (181 * (x4 + x5) + 128) >> 8
     x4 = (181 * (x4 - x5) + 128) >> 8
-    blk[p + 0] = (x7 + x1) >> 8
-    blk[p + 1] = (x3 + x2) >> 8
-    blk[p + 2] = (x0 + x4) >> 8
-    blk[p + 3] = (x8 + x6) >> 8
-    blk[p + 4] = (x8 - x6) >> 8
-    blk[p + 5] = (x0 - x4) >> 8
-    blk[p + 6] = (x3 - x2) >> 8
-    blk[p + 7] = (x7 - x1) >> 8
+    blk[p:p + 8] = [(x7 + x1) >> 8, (x3 + x2) >> 8, (x0 + x4) >> 8, (x8 + x6) >> 8,
+        (x8 - x6) >> 8, (x0 - x4) >> 8, (x3 - x2) >> 8, (x7 - x1) >> 8]
 
 
 #blk was a char *, but we need to use an array and an index instead.
-#sout is an extra parameter: it is the string what we need to modify,
+#sout is an extra parameter: it is the bytearray what we need to modify,
 #and out is the position inside sout (index)
 def njColIDCT(blk, p, sout, out, stride):
     x1 = blk[p + 8*4] << 8
@@ -402,12 +402,7 @@ def njColIDCT(blk, p, sout, out, stride):
     x6 = blk[p + 8*5]
     x7 = blk[p + 8*3]
     if (not (x1 | x2 | x3 | x4 | x5 | x6 | x7)):
-        x1 = njClip(((blk[p + 0] + 32) >> 6) + 128)
-        x0 = 8
-        while x0:
-            sout[out] = x1
-            out += stride
-            x0 -= 1
+        sout[out:out + (stride << 3):stride] = bytearray((njClipTab[(((blk[p + 0] + 32) >> 6) + 128) & NJ_CLIP_MASK],)) * 8
         return
 
     x0 = (blk[p + 0] << 8) + 8192
@@ -432,21 +427,88 @@ def njColIDCT(blk, p, sout, out, stride):
     x0 -= x2
     x2 = (181 * (x4 + x5) + 128) >> 8
     x4 = (181 * (x4 - x5) + 128) >> 8
-    sout[out] = njClip(((x7 + x1) >> 14) + 128)
-    out += stride
-    sout[out] = njClip(((x3 + x2) >> 14) + 128)
-    out += stride
-    sout[out] = njClip(((x0 + x4) >> 14) + 128)
-    out += stride
-    sout[out] = njClip(((x8 + x6) >> 14) + 128)
-    out += stride
-    sout[out] = njClip(((x8 - x6) >> 14) + 128)
-    out += stride
-    sout[out] = njClip(((x0 - x4) >> 14) + 128)
-    out += stride
-    sout[out] = njClip(((x3 - x2) >> 14) + 128)
-    out += stride
-    sout[out] = njClip(((x7 - x1) >> 14) + 128)
+    clip = njClipTab
+    sout[out:out + (stride << 3):stride] = bytearray((
+        clip[(((x7 + x1) >> 14) + 128) & NJ_CLIP_MASK],
+        clip[(((x3 + x2) >> 14) + 128) & NJ_CLIP_MASK],
+        clip[(((x0 + x4) >> 14) + 128) & NJ_CLIP_MASK],
+        clip[(((x8 + x6) >> 14) + 128) & NJ_CLIP_MASK],
+        clip[(((x8 - x6) >> 14) + 128) & NJ_CLIP_MASK],
+        clip[(((x0 - x4) >> 14) + 128) & NJ_CLIP_MASK],
+        clip[(((x3 - x2) >> 14) + 128) & NJ_CLIP_MASK],
+        clip[(((x7 - x1) >> 14) + 128) & NJ_CLIP_MASK]))
+
+
+# NumPy versions of njRowIDCT()/njColIDCT(): the same integer arithmetic,
+# applied to a whole batch of blocks (an int64 array of shape (n, 8, 8)) at
+# once. The shortcut for blocks without AC coefficients isn't needed here,
+# the full formula gives identical results for them.
+def njRowIDCTArray(blk):
+    x1 = blk[:, :, 4] << 11
+    x2 = blk[:, :, 6]
+    x3 = blk[:, :, 2]
+    x4 = blk[:, :, 1]
+    x5 = blk[:, :, 7]
+    x6 = blk[:, :, 5]
+    x7 = blk[:, :, 3]
+    x0 = (blk[:, :, 0] << 11) + 128
+    x8 = W7 * (x4 + x5)
+    x4 = x8 + (W1 - W7) * x4
+    x5 = x8 - (W1 + W7) * x5
+    x8 = W3 * (x6 + x7)
+    x6 = x8 - (W3 - W5) * x6
+    x7 = x8 - (W3 + W5) * x7
+    x8 = x0 + x1
+    x0 = x0 - x1
+    x1 = W6 * (x3 + x2)
+    x2 = x1 - (W2 + W6) * x2
+    x3 = x1 + (W2 - W6) * x3
+    x1 = x4 + x6
+    x4 = x4 - x6
+    x6 = x5 + x7
+    x5 = x5 - x7
+    x7 = x8 + x3
+    x8 = x8 - x3
+    x3 = x0 + x2
+    x0 = x0 - x2
+    x2 = (181 * (x4 + x5) + 128) >> 8
+    x4 = (181 * (x4 - x5) + 128) >> 8
+    return numpy.stack((x7 + x1, x3 + x2, x0 + x4, x8 + x6,
+        x8 - x6, x0 - x4, x3 - x2, x7 - x1), axis=2) >> 8
+
+def njColIDCTArray(blk):
+    x1 = blk[:, 4, :] << 8
+    x2 = blk[:, 6, :]
+    x3 = blk[:, 2, :]
+    x4 = blk[:, 1, :]
+    x5 = blk[:, 7, :]
+    x6 = blk[:, 5, :]
+    x7 = blk[:, 3, :]
+    x0 = (blk[:, 0, :] << 8) + 8192
+    x8 = W7 * (x4 + x5) + 4
+    x4 = (x8 + (W1 - W7) * x4) >> 3
+    x5 = (x8 - (W1 + W7) * x5) >> 3
+    x8 = W3 * (x6 + x7) + 4
+    x6 = (x8 - (W3 - W5) * x6) >> 3
+    x7 = (x8 - (W3 + W5) * x7) >> 3
+    x8 = x0 + x1
+    x0 = x0 - x1
+    x1 = W6 * (x3 + x2) + 4
+    x2 = (x1 - (W2 + W6) * x2) >> 3
+    x3 = (x1 + (W2 - W6) * x3) >> 3
+    x1 = x4 + x6
+    x4 = x4 - x6
+    x6 = x5 + x7
+    x5 = x5 - x7
+    x7 = x8 + x3
+    x8 = x8 - x3
+    x3 = x0 + x2
+    x0 = x0 - x2
+    x2 = (181 * (x4 + x5) + 128) >> 8
+    x4 = (181 * (x4 - x5) + 128) >> 8
+    out = numpy.stack((x7 + x1, x3 + x2, x0 + x4, x8 + x6,
+        x8 - x6, x0 - x4, x3 - x2, x7 - x1), axis=1)
+    return numpy.frombuffer(njClipTab, dtype=numpy.uint8)[((out >> 14) + 128) & NJ_CLIP_MASK]
 
 
 def njShowBits(bits):
@@ -567,10 +629,10 @@ def njDecodeSOF():
         c.stride = nj.mbwidth * nj.mbsizex * c.ssx // ssxmax
         if (((c.width < 3) and (c.ssx != ssxmax)) or ((c.height < 3) and (c.ssy != ssymax))):
                 raise Exception(NJ_UNSUPPORTED)
-        c.pixels = [0] * (c.stride * (nj.mbheight * nj.mbsizey * c.ssy // ssymax))
+        c.pixels = bytearray(c.stride * (nj.mbheight * nj.mbsizey * c.ssy // ssymax))
         i += 1
     if (nj.ncomp == 3):
-        nj.rgb = [0] * (nj.width * nj.height * nj.ncomp)
+        nj.rgb = bytearray(nj.width * nj.height * nj.ncomp)
     njSkip(nj.length)
 
 def njDecodeDHT():
@@ -598,19 +660,15 @@ def njDecodeDHT():
             remain -= currcnt << (16 - codelen)
             if (remain < 0):
                 raise Exception(NJ_SYNTAX_ERROR)
+            vlcbits, vlccode = nj.vlctab[i]
             for ii in range(currcnt):
                 code = nj.spos[nj.pos + ii]
-                j = spread
-                while j:
-                    nj.vlctab[i][vlc].bits = codelen
-                    nj.vlctab[i][vlc].code = code
-                    vlc += 1
-                    j -= 1
+                vlcbits[vlc:vlc + spread] = bytearray((codelen,)) * spread
+                vlccode[vlc:vlc + spread] = bytearray((code,)) * spread
+                vlc += spread
             njSkip(currcnt)
-        while remain:
-            remain -= 1
-            nj.vlctab[i][vlc].bits = 0
-            vlc += 1
+        if remain:
+            nj.vlctab[i][0][vlc:vlc + remain] = bytearray(remain)
     if (nj.length):
         raise Exception(NJ_SYNTAX_ERROR)
 
@@ -637,11 +695,11 @@ def njDecodeDRI():
 #code is an array with one element, since we need to return the code to the caller
 def njGetVLC(vlc, code):
     value = njShowBits(16)
-    bits = vlc[value].bits
+    bits = vlc[0][value]
     if not bits:
         raise Exception(NJ_SYNTAX_ERROR)
     njSkipBits(bits)
-    value = vlc[value].code
+    value = vlc[1][value]
     if code: code[0] = value
     bits = value & 15
     if not bits: return 0
@@ -652,31 +710,50 @@ def njGetVLC(vlc, code):
 
 #sout is a new parameter, because we need to modify the passed in array, so
 #out is now just the index in out
+#when c.coefs is a list (NumPy path), the dequantized block is appended to it
+#instead, and the IDCT is done later by njFlushMCURow()
 def njDecodeBlock(c, sout, out):
     code = [0]
     value = 0
     coef = 0
-    for i in range(len(nj.block)):
-        nj.block[i] = 0
+    nj.block = blk = [0] * 64
+    qtab = nj.qtab[c.qtsel]
+    actab = nj.vlctab[c.actabsel]
     c.dcpred += njGetVLC(nj.vlctab[c.dctabsel], None)
-    nj.block[0] = c.dcpred * nj.qtab[c.qtsel][0]
+    blk[0] = c.dcpred * qtab[0]
     while True: # do {
-        value = njGetVLC(nj.vlctab[c.actabsel], code);
+        value = njGetVLC(actab, code);
         if not code[0]: break  # EOB
         if (not (code[0] & 0x0F) and (code[0] != 0xF0)):
             raise Exception(NJ_SYNTAX_ERROR)
         coef += (code[0] >> 4) + 1
         if coef > 63:
             raise Exception(NJ_SYNTAX_ERROR)
-        nj.block[njZZ[coef]] = value * nj.qtab[c.qtsel][coef]
+        blk[njZZ[coef]] = value * qtab[coef]
         # } while (coef < 63);
         if coef >= 63: break
-    coef = 0
-    while coef < 64:
-        njRowIDCT(nj.block, coef)
-        coef += 8
+    if c.coefs is not None:
+        c.coefs.append(blk)
+        return
+    for coef in range(0, 64, 8):
+        njRowIDCT(blk, coef)
+    stride = c.stride
     for coef in range(8):
-        njColIDCT(nj.block, coef, sout, out + coef, c.stride)
+        njColIDCT(blk, coef, sout, out + coef, stride)
+
+#NumPy path: run the IDCT over all the blocks decoded for MCU row mby, and
+#copy the results into place in each component's pixels
+def njFlushMCURow(mby):
+    for i in range(nj.ncomp):
+        c = nj.comp[i]
+        blk = numpy.array(c.coefs, dtype=numpy.int64).reshape(-1, 8, 8)
+        blk = njColIDCTArray(njRowIDCTArray(blk))
+        # blocks were decoded in (mbx, sby, sbx) order
+        blk = blk.reshape(nj.mbwidth, c.ssy, c.ssx, 8, 8).transpose(1, 3, 0, 2, 4)
+        rows = c.ssy << 3
+        pixels = numpy.frombuffer(c.pixels, dtype=numpy.uint8).reshape(-1, c.stride)
+        pixels[mby * rows:(mby + 1) * rows] = blk.reshape(rows, c.stride)
+        c.coefs = []
 
 def njDecodeScan():
     rstcount = nj.rstinterval
@@ -704,6 +781,8 @@ def njDecodeScan():
     njSkip(nj.length)
     mbx = 0
     mby = 0
+    for i in range(nj.ncomp):
+        nj.comp[i].coefs = [] if NJ_USE_NUMPY else None
     while True:
         i = 0
         while (i < nj.ncomp):
@@ -720,6 +799,7 @@ def njDecodeScan():
             i += 1
         mbx += 1
         if mbx >= nj.mbwidth:
+            if NJ_USE_NUMPY: njFlushMCURow(mby)
             mbx = 0
             mby += 1
             if mby >= nj.mbheight: break
@@ -752,58 +832,78 @@ CF2B = -11
 def CF(x):
     return njClip(((x) + 64) >> 7)
 
+# the upsampling filters work a whole line at a time, looking the results of
+# CF() up in njClipTab
+
 def njUpsampleH(c):
-    xmax = c.width - 3
-    out = [0] * ((c.width * c.height) << 1)
+    clip = njClipTab
+    w = c.width
+    xmax = w - 3
+    out = bytearray((c.width * c.height) << 1)
+    pixels = c.pixels
     lin = 0
     lout = 0
-    y = c.height
-    while y:
-        out[lout + 0] = CF(CF2A * c.pixels[lin + 0] + CF2B * c.pixels[lin + 1])
-        out[lout + 1] = CF(CF3X * c.pixels[lin + 0] + CF3Y * c.pixels[lin + 1] + CF3Z * c.pixels[lin + 2])
-        out[lout + 2] = CF(CF3A * c.pixels[lin + 0] + CF3B * c.pixels[lin + 1] + CF3C * c.pixels[lin + 2])
-        for x in range(xmax):
-            out[lout + (x << 1) + 3] = CF(CF4A * c.pixels[lin + x] + CF4B * c.pixels[lin + x + 1] + CF4C * c.pixels[lin + x + 2] + CF4D * c.pixels[lin + x + 3])
-            out[lout + (x << 1) + 4] = CF(CF4D * c.pixels[lin + x] + CF4C * c.pixels[lin + x + 1] + CF4B * c.pixels[lin + x + 2] + CF4A * c.pixels[lin + x + 3])
+    for y in range(c.height):
+        p0, p1, p2 = pixels[lin], pixels[lin + 1], pixels[lin + 2]
+        out[lout:lout + 3] = bytearray((
+            clip[((CF2A * p0 + CF2B * p1 + 64) >> 7) & NJ_CLIP_MASK],
+            clip[((CF3X * p0 + CF3Y * p1 + CF3Z * p2 + 64) >> 7) & NJ_CLIP_MASK],
+            clip[((CF3A * p0 + CF3B * p1 + CF3C * p2 + 64) >> 7) & NJ_CLIP_MASK]))
+        line = pixels[lin:lin + w]
+        taps = list(zip(line, line[1:], line[2:], line[3:]))
+        out[lout + 3:lout + 3 + (xmax << 1):2] = bytearray([
+            clip[((CF4A * a + CF4B * b + CF4C * d + CF4D * e + 64) >> 7) & NJ_CLIP_MASK]
+            for a, b, d, e in taps])
+        out[lout + 4:lout + 4 + (xmax << 1):2] = bytearray([
+            clip[((CF4D * a + CF4C * b + CF4B * d + CF4A * e + 64) >> 7) & NJ_CLIP_MASK]
+            for a, b, d, e in taps])
         lin += c.stride
-        lout += c.width << 1
-        out[lout - 3] = CF(CF3A * c.pixels[lin - 1] + CF3B * c.pixels[lin - 2] + CF3C * c.pixels[lin - 3])
-        out[lout - 2] = CF(CF3X * c.pixels[lin - 1] + CF3Y * c.pixels[lin - 2] + CF3Z * c.pixels[lin - 3])
-        out[lout - 1] = CF(CF2A * c.pixels[lin - 1] + CF2B * c.pixels[lin - 2])
-        y -= 1
+        lout += w << 1
+        p1, p2, p3 = pixels[lin - 1], pixels[lin - 2], pixels[lin - 3]
+        out[lout - 3:lout] = bytearray((
+            clip[((CF3A * p1 + CF3B * p2 + CF3C * p3 + 64) >> 7) & NJ_CLIP_MASK],
+            clip[((CF3X * p1 + CF3Y * p2 + CF3Z * p3 + 64) >> 7) & NJ_CLIP_MASK],
+            clip[((CF2A * p1 + CF2B * p2 + 64) >> 7) & NJ_CLIP_MASK]))
     c.width <<= 1
     c.stride = c.width
     c.pixels = out
 
+# filter 2, 3 or 4 lines of pixels into a new line, used by njUpsampleV()
+def njFilter2(k0, k1, l0, l1):
+    clip = njClipTab
+    return bytearray([clip[((k0 * a + k1 * b + 64) >> 7) & NJ_CLIP_MASK]
+        for a, b in zip(l0, l1)])
+
+def njFilter3(k0, k1, k2, l0, l1, l2):
+    clip = njClipTab
+    return bytearray([clip[((k0 * a + k1 * b + k2 * d + 64) >> 7) & NJ_CLIP_MASK]
+        for a, b, d in zip(l0, l1, l2)])
+
+def njFilter4(k0, k1, k2, k3, l0, l1, l2, l3):
+    clip = njClipTab
+    return bytearray([clip[((k0 * a + k1 * b + k2 * d + k3 * e + 64) >> 7) & NJ_CLIP_MASK]
+        for a, b, d, e in zip(l0, l1, l2, l3)])
+
 def njUpsampleV(c):
     w = c.width
     s1 = c.stride
-    s2 = s1 + s1
-    out = [0] * ((c.width * c.height) << 1)
-    for x in range(w):
-        cin = x
-        cout = x
-        out[cout] = CF(CF2A * c.pixels[cin] + CF2B * c.pixels[cin + s1])
-        cout += w
-        out[cout] = CF(CF3X * c.pixels[cin] + CF3Y * c.pixels[cin + s1] + CF3Z * c.pixels[cin + s2])
+    rows = [c.pixels[y * s1:y * s1 + w] for y in range(c.height)]
+    out = bytearray((c.width * c.height) << 1)
+    out[0:w] = njFilter2(CF2A, CF2B, rows[0], rows[1])
+    out[w:2 * w] = njFilter3(CF3X, CF3Y, CF3Z, rows[0], rows[1], rows[2])
+    out[2 * w:3 * w] = njFilter3(CF3A, CF3B, CF3C, rows[0], rows[1], rows[2])
+    cout = 3 * w
+    for y in range(c.height - 3):
+        r0, r1, r2, r3 = rows[y:y + 4]
+        out[cout:cout + w] = njFilter4(CF4A, CF4B, CF4C, CF4D, r0, r1, r2, r3)
         cout += w
-        out[cout] = CF(CF3A * c.pixels[cin] + CF3B * c.pixels[cin + s1] + CF3C * c.pixels[cin + s2])
+        out[cout:cout + w] = njFilter4(CF4D, CF4C, CF4B, CF4A, r0, r1, r2, r3)
         cout += w
-        cin += s1
-        y = c.height - 3
-        while y:
-            out[cout] = CF(CF4A * c.pixels[cin - s1] + CF4B * c.pixels[cin] + CF4C * c.pixels[cin + s1] + CF4D * c.pixels[cin + s2])
-            cout += w
-            out[cout] = CF(CF4D * c.pixels[cin - s1] + CF4C * c.pixels[cin] + CF4B * c.pixels[cin + s1] + CF4A * c.pixels[cin + s2])
-            cout += w
-            cin += s1
-            y -= 1
-        cin += s1
-        out[cout] = CF(CF3A * c.pixels[cin] + CF3B * c.pixels[cin - s1] + CF3C * c.pixels[cin - s2])
-        cout += w
-        out[cout] = CF(CF3X * c.pixels[cin] + CF3Y * c.pixels[cin - s1] + CF3Z * c.pixels[cin - s2])
-        cout += w
-        out[cout] = CF(CF2A * c.pixels[cin] + CF2B * c.pixels[cin - s1])
+    out[cout:cout + w] = njFilter3(CF3A, CF3B, CF3C, rows[-1], rows[-2], rows[-3])
+    cout += w
+    out[cout:cout + w] = njFilter3(CF3X, CF3Y, CF3Z, rows[-1], rows[-2], rows[-3])
+    cout += w
+    out[cout:cout + w] = njFilter2(CF2A, CF2B, rows[-1], rows[-2])
     c.height <<= 1
     c.stride = c.width
     c.pixels = out
@@ -849,51 +949,73 @@ def njConvert():
             return
     if nj.ncomp == 3:
         # convert to RGB
+        if NJ_USE_NUMPY:
+            njConvertArray()
+            return
+        clip = njClipTab
+        w = nj.width
         prgb = 0
         py  = 0
         pcb = 0
         pcr = 0
-        yy = nj.height
-        #print( 'nj.width: %s, nj.height: %s, strides: %s, %s, %s, lengths: %s, %s, %s, first few bytes: %s, %s, %s' % \
-        #    (nj.width, nj.height, nj.comp[0].stride, nj.comp[1].stride, nj.comp[2].stride,
-        #    len(nj.comp[0].pixels), len(nj.comp[1].pixels), len(nj.comp[2].pixels),
-        #    nj.comp[0].pixels[0], nj.comp[0].pixels[1], nj.comp[0].pixels[2]))
-        while yy:
-            for x in range(nj.width):
-                y = nj.comp[0].pixels[py + x] << 8
-                # print 'len(nj.comp): %s, len(nj.comp[1].pixels): %s, pcb + x: %s, yy: %s, x: %s' % \
-                #     (len(nj.comp), len(nj.comp[1].pixels), pcb + x, yy, x)
-                cb = nj.comp[1].pixels[pcb + x] - 128
-                cr = nj.comp[2].pixels[pcr + x] - 128
-                nj.rgb[prgb] = njClip((y            + 359 * cr + 128) >> 8)
-                prgb += 1
-                nj.rgb[prgb] = njClip((y -  88 * cb - 183 * cr + 128) >> 8)
-                prgb += 1
-                nj.rgb[prgb] = njClip((y + 454 * cb            + 128) >> 8)
-                prgb += 1
+        for yy in range(nj.height):
+            Y = nj.comp[0].pixels[py:py + w]
+            Cb = nj.comp[1].pixels[pcb:pcb + w]
+            Cr = nj.comp[2].pixels[pcr:pcr + w]
+            nj.rgb[prgb:prgb + 3 * w:3] = bytearray([clip[(y + njCrR[cr]) & NJ_CLIP_MASK]
+                for y, cr in zip(Y, Cr)])
+            nj.rgb[prgb + 1:prgb + 3 * w:3] = bytearray([clip[(y + ((njCbG[cb] + njCrG[cr]) >> 8)) & NJ_CLIP_MASK]
+                for y, cb, cr in zip(Y, Cb, Cr)])
+            nj.rgb[prgb + 2:prgb + 3 * w:3] = bytearray([clip[(y + njCbB[cb]) & NJ_CLIP_MASK]
+                for y, cb in zip(Y, Cb)])
+            prgb += 3 * w
             py += nj.comp[0].stride
             pcb += nj.comp[1].stride
             pcr += nj.comp[2].stride
-            yy -= 1
     elif (nj.comp[0].width != nj.comp[0].stride):
         # grayscale -> only remove stride
-        # unsigned char *pin = &nj.comp[0].pixels[nj.comp[0].stride];
-        # unsigned char *pout = &nj.comp[0].pixels[nj.comp[0].width];
-        # int y;
-        # for (y = nj.comp[0].height - 1;  y;  --y) {
-        #     njCopyMem(pout, pin, nj.comp[0].width);
-        #     pin += nj.comp[0].stride;
-        #     pout += nj.comp[0].width;
-        # }
-        # nj.comp[0].stride = nj.comp[0].width;
-        pass
+        c = nj.comp[0]
+        pixels = bytearray(c.width * c.height)
+        for y in range(c.height):
+            pixels[y * c.width:(y + 1) * c.width] = c.pixels[y * c.stride:y * c.stride + c.width]
+        c.pixels = pixels
+        c.stride = c.width
+
+# YCbCr -> RGB lookup tables, the chroma terms of:
+#   R = (Y<<8            + 359 * Cr + 128) >> 8
+#   G = (Y<<8 -  88 * Cb - 183 * Cr + 128) >> 8
+#   B = (Y<<8 + 454 * Cb            + 128) >> 8
+# as Y<<8 is a multiple of 256, R and B are Y plus a table entry. G has to
+# add its two terms before the shift, to give exactly the same results.
+njCrR = [(359 * (i - 128) + 128) >> 8 for i in range(256)]
+njCbB = [(454 * (i - 128) + 128) >> 8 for i in range(256)]
+njCbG = [-88 * (i - 128) for i in range(256)]
+njCrG = [-183 * (i - 128) + 128 for i in range(256)]
+
+# NumPy version of the RGB conversion in njConvert()
+def njConvertArray():
+    planes = []
+    for i in range(3):
+        c = nj.comp[i]
+        pixels = numpy.frombuffer(c.pixels, dtype=numpy.uint8).reshape(-1, c.stride)
+        planes.append(pixels[:nj.height, :nj.width].astype(numpy.int32))
+    y, cb, cr = planes
+    clip = numpy.frombuffer(njClipTab, dtype=numpy.uint8)
+    rgb = numpy.frombuffer(nj.rgb, dtype=numpy.uint8).reshape(nj.height, nj.width, 3)
+    rgb[:, :, 0] = clip[(y + numpy.take(njCrR, cr)) & NJ_CLIP_MASK]
+    rgb[:, :, 1] = clip[(y + ((numpy.take(njCbG, cb) + numpy.take(njCrG, cr)) >> 8)) & NJ_CLIP_MASK]
+    rgb[:, :, 2] = clip[(y + numpy.take(njCbB, cb)) & NJ_CLIP_MASK]
 
 def njInit():
     # njFillMem(&nj, 0, sizeof(nj_context_t));
     nj.init()
 
 def njDone():
-    pass
+    # release the decoded image, keep the tables for the next njDecode()
+    nj.rgb = None
+    for c in nj.comp:
+        c.pixels = None
+        c.coefs = None
 
 def njDecode(jpeg, size):
     njDone()
@@ -936,3 +1058,25 @@ def njGetImageSize():
     return nj.width * nj.height * nj.ncomp
 
 #endif // _NJ_INCLUDE_HEADER_ONLY
+
+
+# benchmark: decode each JPEG given on the command line, and report the
+# decoding speed in ms/megapixel, with and without NumPy (if available)
+#     python -m appJar.lib.nanojpeg small.jpg medium.jpg large.jpg
+if __name__ == "__main__":
+    import time
+    modes = [False, True] if numpy is not None else [False]
+    for path in sys.argv[1:]:
+        with open(path, "rb") as inFile:
+            buf = array.array(str('B'), inFile.read())
+        for NJ_USE_NUMPY in modes:
+            start = time.time()
+            njInit()
+            result = njDecode(buf, len(buf))
+            elapsed = time.time() - start
+            if result != NJ_OK:
+                print("%s: error %d" % (path, result))
+                break
+            mp = njGetWidth() * njGetHeight() / 1000000.0
+            print("%s (%dx%d, %s): %.0f ms/MP" % (path, njGetWidth(), njGetHeight(),
+                "numpy" if NJ_USE_NUMPY else "pure python", elapsed * 1000 / mp))
@@ -170,6 +170,13 @@ try:
 except ImportError:
     pass
 
+try:
+    # When available, NumPy is used to speed up undoing the sub
+    # filter (see `class pngfilters`).
+    import numpy
+except ImportError:
+    numpy = None
+
 
 __all__ = ['Image', 'Reader', 'Writer', 'write_chunks', 'from_array']
 
@@ -194,7 +201,11 @@ def isarray(x):
     return isinstance(x, array)
 
 def tostring(row):
-    return row.tostring()
+    try:
+        return row.tobytes()
+    except AttributeError:
+        # Python 2
+        return row.tostring()
 
 def interleave_planes(ipixels, apixels, ipsize, apsize):
     """
@@ -1292,7 +1303,7 @@ class _readable:
     def read(self, n):
         r = self.buf[self.offset:self.offset+n]
         if isarray(r):
-            r = r.tostring()
+            r = tostring(r)
         self.offset += n
         return r
 
@@ -1309,6 +1320,11 @@ class Reader:
     PNG decoder in pure Python.
     """
 
+    # The number of scanlines :meth:`read` decompresses at a time.
+    decompress_rows = 8
+    # The number of compressed bytes :meth:`read` passes to zlib at a time.
+    decompress_input = 2**14
+
     def __init__(self, _guess=None, **kw):
         """
         Create a PNG decoder object.
@@ -1455,72 +1471,15 @@ class Reader:
         fu = max(1, self.psize)
 
         # For the first line of a pass, synthesize a dummy previous
-        # line.  An alternative approach would be to observe that on the
-        # first line 'up' is the same as 'null', 'paeth' is the same
-        # as 'sub', with only 'average' requiring any special case.
+        # line.  Observe that on the first line 'up' is the same as
+        # 'null' and 'paeth' is the same as 'sub', so only 'average'
+        # needs it.
         if not previous:
-            previous = array(str('B'), [0]*len(scanline))
-
-        def sub():
-            """Undo sub filter."""
-
-            ai = 0
-            # Loop starts at index fu.  Observe that the initial part
-            # of the result is already filled in correctly with
-            # scanline.
-            for i in range(fu, len(result)):
-                x = scanline[i]
-                a = result[ai]
-                result[i] = (x + a) & 0xff
-                ai += 1
-
-        def up():
-            """Undo up filter."""
-
-            for i in range(len(result)):
-                x = scanline[i]
-                b = previous[i]
-                result[i] = (x + b) & 0xff
-
-        def average():
-            """Undo average filter."""
-
-            ai = -fu
-            for i in range(len(result)):
-                x = scanline[i]
-                if ai < 0:
-                    a = 0
-                else:
-                    a = result[ai]
-                b = previous[i]
-                result[i] = (x + ((a + b) >> 1)) & 0xff
-                ai += 1
-
-        def paeth():
-            """Undo Paeth filter."""
-
-            # Also used for ci.
-            ai = -fu
-            for i in range(len(result)):
-                x = scanline[i]
-                if ai < 0:
-                    a = c = 0
-                else:
-                    a = result[ai]
-                    c = previous[ai]
-                b = previous[i]
-                p = a + b - c
-                pa = abs(p - a)
-                pb = abs(p - b)
-                pc = abs(p - c)
-                if pa <= pb and pa <= pc:
-                    pr = a
-                elif pb <= pc:
-                    pr = b
-                else:
-                    pr = c
-                result[i] = (x + pr) & 0xff
-                ai += 1
+            if filter_type == 2:
+                return result
+            if filter_type == 4:
+                filter_type = 1
+            previous = array(str('B'), [0])*len(scanline)
 
         # Call appropriate filter algorithm.  Note that 0 has already
         # been dealt with.
@@ -1535,6 +1494,9 @@ class Reader:
         """
         Read raw pixel data, undo filters, deinterlace, and flatten.
         Return in flat row flat pixel format.
+
+        `raw` is either an array of all the raw bytes, or an iterable
+        that yields them in chunks of arbitrary size.
         """
 
         # Values per row (of the target image)
@@ -1544,8 +1506,25 @@ class Reader:
         # writes to the output array randomly (well, not quite), so the
         # entire output array must be in memory.
         fmt = 'BH'[self.bitdepth > 8]
-        a = array(str(fmt), [0]*vpr*self.height)
-        source_offset = 0
+        a = array(str(fmt), [0])*vpr*self.height
+
+        # The raw bytes are only needed a scanline at a time, so
+        # consume them as they arrive.
+        if isarray(raw):
+            raw = [raw]
+        raw = iter(raw)
+        buf = array(str('B'))
+        def readraw(n):
+            """Remove and return the next `n` raw bytes."""
+            while len(buf) < n:
+                try:
+                    buf.extend(next(raw))
+                except StopIteration:
+                    raise FormatError(
+                      'Wrong size for decompressed IDAT chunk.')
+            row = buf[:n]
+            del buf[:n]
+            return row
 
         for xstart, ystart, xstep, ystep in _adam7:
             if xstart >= self.width:
@@ -1559,10 +1538,8 @@ class Reader:
             # Row size in bytes for this pass.
             row_size = int(math.ceil(self.psize * ppr))
             for y in range(ystart, self.height, ystep):
-                filter_type = raw[source_offset]
-                source_offset += 1
-                scanline = raw[source_offset:source_offset+row_size]
-                source_offset += row_size
+                filter_type = readraw(1)[0]
+                scanline = readraw(row_size)
                 recon = self.undo_filter(filter_type, scanline, recon)
                 # Convert so that there is one element per pixel value
                 flat = self.serialtoflat(recon, ppr)
@@ -1655,12 +1632,15 @@ class Reader:
         recon = None
         for some in raw:
             a.extend(some)
-            while len(a) >= rb + 1:
-                filter_type = a[0]
-                scanline = a[1:rb+1]
-                del a[:rb+1]
+            # Take all the complete rows, then discard them in one go.
+            i = 0
+            while len(a) - i >= rb + 1:
+                filter_type = a[i]
+                scanline = a[i+1:i+rb+1]
+                i += rb + 1
                 recon = self.undo_filter(filter_type, scanline, recon)
                 yield recon
+            del a[:i]
         if len(a) != 0:
             # :file:format We get here with a file format error:
             # when the available bytes (after decompressing) do not
@@ -1857,7 +1837,10 @@ class Reader:
         Read the PNG file and decode it.  Returns (`width`, `height`,
         `pixels`, `metadata`).
 
-        May use excessive memory.
+        For straightlaced images `pixels` is decoded incrementally, as
+        it is iterated, using only a few scanlines of working memory.
+        Interlaced images are deinterlaced into a whole image array
+        first (the first Adam7 pass already spans the whole image).
 
         `pixels` are returned in boxed row flat pixel format.
 
@@ -1888,23 +1871,26 @@ class Reader:
             be an iterator that yields the ``IDAT`` chunk data.
             """
 
-            # Currently, with no max_length parameter to decompress,
-            # this routine will do one yield per IDAT chunk: Not very
-            # incremental.
+            # Limit each yield to a few scanlines, so that a large
+            # IDAT chunk is not decompressed in one go.
+            max_length = max(self.decompress_rows * (self.row_bytes + 1),
+                             2**16)
             d = zlib.decompressobj()
-            # Each IDAT chunk is passed to the decompressor, then any
-            # remaining state is decompressed out.
-            for data in idat:
-                # :todo: add a max_length argument here to limit output
-                # size.
-                yield array(str('B'), d.decompress(data))
+            # Each IDAT chunk is passed to the decompressor a slice at a
+            # time, so that unconsumed_tail never copies a large chunk,
+            # then any remaining state is decompressed out.
+            for chunk in idat:
+                for start in range(0, len(chunk), self.decompress_input):
+                    data = chunk[start:start + self.decompress_input]
+                    while data:
+                        yield array(str('B'), d.decompress(data, max_length))
+                        data = d.unconsumed_tail
             yield array(str('B'), d.flush())
 
         self.preamble(lenient=lenient)
         raw = iterdecomp(iteridat())
 
         if self.interlace:
-            raw = array(str('B'), itertools.chain(*raw))
             arraycode = 'BH'[self.bitdepth>8]
             # Like :meth:`group` but producing an array.array object for
             # each row.
@@ -2248,70 +2234,103 @@ def isinteger(x):
 try:
     pngfilters
 except NameError:
+    # Bit masks used by undo_filter_up, for each row length.
+    _up_masks = {}
+
     class pngfilters(object):
+        # Each filter works on one byte "lane" of the filter unit at a
+        # time (every filter_unit'th byte), which lets the loops carry
+        # the byte to the left in a local variable, rather than indexing
+        # back into result.  Within a row, average and paeth depend on
+        # the result to the left, so they can't be vectorised; sub can,
+        # as a running sum modulo 256, and up is a plain bytewise add.
+
         def undo_filter_sub(filter_unit, scanline, previous, result):
             """Undo sub filter."""
 
-            ai = 0
-            # Loops starts at index fu.  Observe that the initial part
-            # of the result is already filled in correctly with
-            # scanline.
-            for i in range(filter_unit, len(result)):
-                x = scanline[i]
-                a = result[ai]
-                result[i] = (x + a) & 0xff
-                ai += 1
+            fu = filter_unit
+            if numpy is not None and len(result) % fu == 0:
+                lanes = numpy.frombuffer(scanline,
+                  dtype=numpy.uint8).reshape(-1, fu)
+                result[:] = array(str('B'),
+                  lanes.cumsum(axis=0, dtype=numpy.uint8).tobytes())
+                return
+            accumulate = getattr(itertools, 'accumulate', None)
+            for k in range(fu):
+                if accumulate:
+                    out = map((0xff).__and__, accumulate(scanline[k::fu]))
+                else:
+                    a = 0
+                    out = []
+                    append = out.append
+                    for x in scanline[k::fu]:
+                        a = (x + a) & 0xff
+                        append(a)
+                result[k::fu] = array(str('B'), out)
         undo_filter_sub = staticmethod(undo_filter_sub)
 
         def undo_filter_up(filter_unit, scanline, previous, result):
             """Undo up filter."""
 
-            for i in range(len(result)):
-                x = scanline[i]
-                b = previous[i]
-                result[i] = (x + b) & 0xff
+            n = len(result)
+            if not hasattr(int, 'from_bytes'):
+                # Python 2
+                result[:] = array(str('B'),
+                  [(x + b) & 0xff for x, b in zip(scanline, previous)])
+                return
+            # Add all the bytes at once, as one big integer: add the
+            # low 7 bits of each byte, so there's no carry into the
+            # next byte, then put the top bits back with xor.
+            if n not in _up_masks:
+                _up_masks[n] = (int.from_bytes(b'\x7f' * n, 'big'),
+                                int.from_bytes(b'\x80' * n, 'big'))
+            low, high = _up_masks[n]
+            x = int.from_bytes(scanline, 'big')
+            b = int.from_bytes(previous, 'big')
+            x = ((x & low) + (b & low)) ^ ((x ^ b) & high)
+            result[:] = array(str('B'), x.to_bytes(n, 'big'))
         undo_filter_up = staticmethod(undo_filter_up)
 
         def undo_filter_average(filter_unit, scanline, previous, result):
-            """Undo up filter."""
+            """Undo average filter."""
 
-            ai = -filter_unit
-            for i in range(len(result)):
-                x = scanline[i]
-                if ai < 0:
-                    a = 0
-                else:
-                    a = result[ai]
-                b = previous[i]
-                result[i] = (x + ((a + b) >> 1)) & 0xff
-                ai += 1
+            fu = filter_unit
+            for k in range(fu):
+                a = 0
+                out = []
+                append = out.append
+                for x, b in zip(scanline[k::fu], previous[k::fu]):
+                    a = (x + ((a + b) >> 1)) & 0xff
+                    append(a)
+                result[k::fu] = array(str('B'), out)
         undo_filter_average = staticmethod(undo_filter_average)
 
         def undo_filter_paeth(filter_unit, scanline, previous, result):
             """Undo Paeth filter."""
 
-            # Also used for ci.
-            ai = -filter_unit
-            for i in range(len(result)):
-                x = scanline[i]
-                if ai < 0:
-                    a = c = 0
-                else:
-                    a = result[ai]
-                    c = previous[ai]
-                b = previous[i]
-                p = a + b - c
-                pa = abs(p - a)
-                pb = abs(p - b)
-                pc = abs(p - c)
-                if pa <= pb and pa <= pc:
-                    pr = a
-                elif pb <= pc:
-                    pr = b
-                else:
-                    pr = c
-                result[i] = (x + pr) & 0xff
-                ai += 1
+            fu = filter_unit
+            for k in range(fu):
+                # a, b and c are the left, up and up-left bytes.
+                a = c = 0
+                out = []
+                append = out.append
+                for x, b in zip(scanline[k::fu], previous[k::fu]):
+                    # p = a + b - c, so pa = |p - a| = |b - c| and so on
+                    pa = b - c
+                    pb = a - c
+                    pc = pa + pb
+                    if pa < 0: pa = -pa
+                    if pb < 0: pb = -pb
+                    if pc < 0: pc = -pc
+                    if pa <= pb and pa <= pc:
+                        a = (x + a) & 0xff
+                    elif pb <= pc:
+                        a = (x + b) & 0xff
+                    else:
+                        a = (x + c) & 0xff
+                    c = b
+                    append(a)
+                result[k::fu] = array(str('B'), out)
         undo_filter_paeth = staticmethod(undo_filter_paeth)
 
         def convert_la_to_rgba(row, result):
@@ -2543,6 +2562,27 @@ def _add_common_options(parser):
                       help="zlib compression level (0-9)")
     return parser
 
+def _benchmark(length=30000, repeat=20):
+    """
+    Time Reader.undo_filter on random scanlines, for each filter type
+    and filter unit, and print the throughput in MB/s.
+    """
+    import random
+    import time
+    rand = random.Random(0)
+    reader = Reader(bytes=b'')
+    previous = array(str('B'), [rand.randrange(256) for i in range(length)])
+    line = array(str('B'), [rand.randrange(256) for i in range(length)])
+    print("%d byte scanlines, using %s" % (length, pngfilters.__name__))
+    for filter_type, name in enumerate(['sub', 'up', 'average', 'paeth'], 1):
+        for fu in (1, 3, 4, 6):
+            reader.psize = fu
+            start = time.time()
+            for i in range(repeat):
+                reader.undo_filter(filter_type, array(str('B'), line), previous)
+            elapsed = time.time() - start
+            print("%-8s unit %d: %7.1f MB/s" % (name, fu, length * repeat / elapsed / 1e6))
+
 def _main(argv):
     """
     Run the PNG encoder with options from the command line.
@@ -2559,10 +2599,17 @@ def _main(argv):
     parser.add_option("-a", "--alpha",
                       action="store", type="string", metavar="pgmfile",
                       help="alpha channel transparency (RGBA)")
+    parser.add_option('--benchmark', default=False,
+                      action='store_true',
+                      help='time undoing each filter type, in MB/s')
     _add_common_options(parser)
 
     (options, args) = parser.parse_args(args=argv[1:])
 
+    if options.benchmark:
+        _benchmark()
+        return
+
     # Convert options
     if options.transparent is not None:
         options.transparent = color_triple(options.transparent)
@@ -3,6 +3,7 @@
 # in nothing but pure python. Can use RGBA images, but alpha is opaque or transparent only.
 # v0.75 - Example code and module seperated out, speed optimisation of the convert function
 
+import re
 from array import *
 try:
     # for Python2
@@ -63,19 +64,81 @@ class PhotoImage(PhotoImage):
 
 class PngImageTk(object):
     """A png image loaded and placed into a tkinter.PhotoImage object"""
+
+    # number of rows decoded and written to the PhotoImage at a time
+    bandHeight = 32
+    # images with more pixels than this should be written to the PhotoImage a band at a time,
+    # rather than being decoded into PPM data with toPpm()
+    maxPpmPixels = 1 << 22
+
+    # runs of 100% transparent pixels, in a row of alpha values
+    transparentRun = re.compile(b"\x00+")
+
     def __init__(self, filename):
-        # Read image, create list of pixel RGB or RGBA values
+        # Read image, create an iterator of pixel RGB or RGBA values
         r = png.Reader(filename)
         # Try to use RGB8 load if no alpha chanel otherwise use alpha (RGBA8)
         try:
             self.w, self.h, self.pixels, self.meta = r.asRGB8()
         except :
             self.w, self.h, self.pixels, self.meta = r.asRGBA8()
-        self.pixeldata = list(self.pixels) #pixeldata has each row of the image as an array
+        # pixeldata yields each row of the image as an array, decoding as it goes
+        self.pixeldata = self.pixels
         self.x = 0
         self.y = 0
         self.image = PhotoImage(width=self.w, height=self.h) #use photoimage as temporary oject to write to canvas
 
+    # Decode a png file into binary PPM data, without using tkinter, so it can
+    # be done on a worker thread. Returns the PPM data, and a list of the
+    # runs of 100% transparent pixels, see getTransparentRuns()
+    # The whole image is held in memory, use getSize() to check it's not too big
+    @staticmethod
+    def toPpm(filename):
+        r = png.Reader(filename)
+        try:
+            w, h, pixels, meta = r.asRGB8()
+        except :
+            w, h, pixels, meta = r.asRGBA8()
+        alpha = meta["alpha"]
+
+        ppm = bytearray(("P6\n%d %d\n255\n" % (w, h)).encode("ascii"))
+        transparent = []
+        for y, row in enumerate(pixels):
+            if alpha is True:
+                transparent.extend(PngImageTk.getTransparentRuns(row[3::4], y))
+                del row[3::4] #remove alpha bits
+            ppm.extend(row)
+        return bytes(ppm), transparent
+
+    # Returns the width & height of a png file, only reading its header
+    @staticmethod
+    def getSize(filename):
+        r = png.Reader(filename)
+        try:
+            r.preamble()
+            return r.width, r.height
+        finally:
+            r.file.close()
+
+    # Returns the runs of 100% transparent pixels in row y, as (start, end, y),
+    # where end is the pixel after the run
+    @staticmethod
+    def getTransparentRuns(alphas, y):
+        return [(m.start(), m.end(), y) for m in PngImageTk.transparentRun.finditer(bytearray(alphas))]
+
+    # Makes each run of pixels transparent, by copying a blank image over them
+    # which is much quicker than setting the transparency of each pixel
+    @staticmethod
+    def setTransparent(photo, runs):
+        if len(runs) == 0: return
+        # a new image is fully transparent, it's repeated to fill each run
+        blank = photo.tk.call("image", "create", "photo", "-width", 1, "-height", 1)
+        try:
+            for x1, x2, y in runs:
+                photo.tk.call(photo.name, "copy", blank, "-to", x1, y, x2, y + 1, "-compositingrule", "set")
+        finally:
+            photo.tk.call("image", "delete", blank)
+
     # Print meta data for image
     def __str__(self):
         rep = "Width:", self.width, "\n"
@@ -91,50 +154,38 @@ class PngImageTk(object):
 
     # Convert pixeldata into a PhotoImage object
     def convert(self):
-        alphapixels = []
-        if self.meta["alpha"] is True:
-            values = 4
-            a_append = alphapixels.append
-        else:
-            values = 3
-
-        pixelrows = []
-
-        # Possible optimisation by minimising re-evaluation of dot notation in loops
-        p_append = pixelrows.append
-        pixeldata = self.pixeldata
-        chunks = self.chunks
+        for y in self.iterconvert():
+            pass
+
+    # Convert pixeldata into the PhotoImage, a band of rows at a time
+    # yields the number of rows written so far, after each band
+    def iterconvert(self):
         alpha = self.meta["alpha"]
-        x = self.x
+        # a whole row as a Tcl list of colours
+        rowFormat = "{" + "#%02x%02x%02x " * self.w + "}"
+
         y = self.y
-        w = self.w
-        h = self.h
-        put = self.image.put
-        transSet = self.image.transSet
-
-        for row in pixeldata:
-            row = row.tolist() #convert from array to list
-            chunked = chunks(row, values) #RGB/RGBA format = 3/4 values
-
-            for item in chunked:
-                if alpha is True:
-                    # if 100% transparent, remember this pixel so we can make it transparent later
-                    if item[3] == 0:
-                        a_append((x, y))
-                    del item[-1] #remove alpha bit
-
-                    # Increment position, used for tracking coordinates of transparent pixels
-                    x += 1
-                    if x == w:
-                        y += 1
-                        x = 0
-
-            p_append(["#%02x%02x%02x" % tuple(item) for item in chunked])
-
-        pixelrows = tuple(tuple(x) for x in pixelrows) #convert our list of lists into a tuple of tuples
-        put(pixelrows,(0,0, w,h)) #pixels are finally written to the PhotoImage
-
-        # If we have alphapixels, set each stored coordinate to transparent
-        if alphapixels:
-            for item in alphapixels:
-                transSet(item[0],item[1], "True")
+        band = []
+        for row in self.pixeldata:
+            if alpha is True:
+                # if 100% transparent, remember these pixels so we can make them transparent later
+                runs = self.getTransparentRuns(row[3::4], y + len(band))
+                del row[3::4] #remove alpha bits
+            else:
+                runs = []
+            band.append((rowFormat % tuple(row), runs))
+
+            if len(band) == self.bandHeight:
+                y = self._putBand(band, y)
+                band = []
+                yield y
+        if band:
+            y = self._putBand(band, y)
+            yield y
+        self.y = y
+
+    # write the rows in band to the PhotoImage, starting at row y
+    def _putBand(self, band, y):
+        self.image.put(" ".join(row for row, runs in band), (0, y))
+        self.setTransparent(self.image, [run for row, runs in band for run in runs])
+        return y + len(band)
@@ -0,0 +1,94 @@
+# Benchmarks AutoEntry keystroke latency, against the size of its vocabulary
+#
+# Each keystroke is timed from the text changing to the list box of
+# suggestions being redrawn. The worst keystroke, while typing a word, is
+# shown for each size and each matching mode.
+#
+# With no display, only the lookup of the suggestions is timed.
+#
+# Run with: python updater/appJar/tests/bench_autoentry.py
+
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from appJar import gui
+from appJar.appjar import AutoCompleteWords, WIDGET_NAMES, TclError
+
+SIZES = (1000, 10000, 100000, 1000000)
+MODES = ("prefix", "substring", "fuzzy")
+TYPED = "mirosu"
+SYLLABLES = ["ka", "lo", "mi", "ne", "ro", "su", "ta", "vi", "xo", "ze"]
+
+
+def makeWords(count):
+    rand = random.Random(count)
+    return ["".join(rand.choice(SYLLABLES) for i in range(rand.randint(2, 6))) + str(i)
+                for i in range(count)]
+
+
+# the slowest of typing each letter of TYPED, in milliseconds
+# prepare(text) gets ready to type the text's last letter, press(text) types it
+def worstKeystroke(prepare, press, repeat=5):
+    worst = 0
+    for length in range(1, len(TYPED) + 1):
+        best = None
+        for i in range(repeat):
+            prepare(TYPED[:length])
+            start = time.perf_counter()
+            press(TYPED[:length])
+            took = time.perf_counter() - start
+            best = took if best is None else min(best, took)
+        worst = max(worst, best)
+    return worst * 1000
+
+
+def lookups():
+    print("lookup only:")
+    for size in SIZES:
+        words = AutoCompleteWords(makeWords(size))
+        times = []
+        for mode in MODES:
+            words.setMode(mode)
+            times.append(worstKeystroke(lambda text: None, words.getMatches))
+        print("  %8d words: " % size + ", ".join("%s %.3fms" % (m, t) for m, t in zip(MODES, times)))
+
+
+def keystrokes():
+    try:
+        app = gui("AutoEntry benchmark", handleArgs=False)
+    except TclError:
+        print("no display, keystrokes not timed")
+        return
+
+    app.addAutoEntry("words", [])
+    entry = app.widgetManager.get(WIDGET_NAMES.Entry, "words")
+
+    def prepare(text):
+        entry.var.set(text[:-1])
+        app.topLevel.update_idletasks()
+
+    def press(text):
+        entry.insert("end", text[-1])
+        app.topLevel.update_idletasks()
+
+    def run(name=None):
+        print("keystrokes, including redrawing the suggestions:")
+        for size in SIZES:
+            app.changeAutoEntry("words", makeWords(size))
+            times = []
+            for mode in MODES:
+                app.setAutoEntryMode("words", mode)
+                times.append(worstKeystroke(prepare, press))
+            print("  %8d words: " % size + ", ".join("%s %.3fms" % (m, t) for m, t in zip(MODES, times)))
+        app.stop()
+
+    app.setStartFunction(run)
+    app.go()
+
+
+if __name__ == "__main__":
+    lookups()
+    keystrokes()
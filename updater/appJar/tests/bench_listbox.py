@@ -0,0 +1,57 @@
+# Benchmarks list boxes holding 100k items
+#
+# A normal list box is timed filling, updating & changing items, then a
+# virtual list box is timed filling & scrolling. Each step includes
+# redrawing the list box.
+#
+# Needs a display. Run with:
+#   python updater/appJar/tests/bench_listbox.py [items]
+
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from appJar import gui
+from appJar.appjar import WIDGET_NAMES
+
+
+def main(count=100000):
+    items = ["file_%06d.py" % i for i in range(count)]
+    # 10 items changed in the middle, 10 removed near the end
+    changed = items[:count // 2] + ["new_%d" % i for i in range(10)] + items[count // 2 + 10:count - 20] + items[count - 10:]
+    rand = random.Random(1)
+    lookups = [rand.choice(items) for i in range(200)]
+
+    app = gui("List box benchmark", "400x400", handleArgs=False)
+
+    # times a step, including redrawing the list box
+    def timed(step, func, *args):
+        start = time.time()
+        func(*args)
+        app.topLevel.update_idletasks()
+        print("%-40s %8.1fms" % (step, (time.time() - start) * 1000))
+
+    def run(name=None):
+        print("%d items" % count)
+        timed("addListBox", app.addListBox, "plain", items)
+        timed("updateListBox, 20 changes", app.updateListBox, "plain", changed)
+        timed("addListItems, 1000 items", app.addListItems, "plain", items[:1000])
+        timed("setListItemBg, 200 items", lambda: [app.setListItemBg("plain", item, "red") for item in lookups])
+        timed("selectListItem, 200 items", lambda: [app.selectListItem("plain", item, callFunction=False) for item in lookups])
+        timed("removeListItem, 200 items", lambda: [app.removeListItem("plain", item) for item in lookups])
+
+        timed("addVirtualListBox", app.addVirtualListBox, "virtual", items)
+        lb = app.widgetManager.get(WIDGET_NAMES.ListBox, "virtual")
+        timed("scroll through 100 pages", lambda: [(lb.yview("scroll", 1, "pages"), app.topLevel.update_idletasks()) for i in range(100)])
+        timed("jump to 100 positions", lambda: [(lb.see(rand.randrange(count)), app.topLevel.update_idletasks()) for i in range(100)])
+        timed("selectListItemAtPos, 200 positions", lambda: [app.selectListItemAtPos("virtual", rand.randrange(count)) for i in range(200)])
+        app.stop()
+
+    app.setStartFunction(run)
+    app.go()
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,66 @@
+# Benchmarks filling a table with addTableRow(), against importTable()
+#
+# addTableRow() goes through the event queue, so only a few rows are added
+# with it, and the time for the full file is worked out from their rate.
+# importTable() and exportTable() are timed on the full file.
+#
+# Needs a display. Run with:
+#   python updater/appJar/tests/bench_table.py [rows] [addTableRow rows]
+
+import os
+import sys
+import csv
+import time
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from appJar import gui
+
+
+# runs the event loop until done() returns True, returns the seconds taken
+def waitFor(app, done, start):
+    while not done():
+        app.topLevel.update()
+    return time.time() - start
+
+
+def main(rows=100000, addRows=20):
+    headers = ["id", "name", "score"]
+    path = os.path.join(tempfile.mkdtemp(), "table.csv")
+    with gui._openTableFile(path, "w") as f:
+        writer = csv.writer(f)
+        writer.writerow(headers)
+        writer.writerows([i, "name %d" % i, i * 0.5] for i in range(rows))
+
+    app = gui("Table benchmark", "600x400", handleArgs=False)
+    app.addTable("rows", [headers], virtual=True)
+    app.addTable("import", [headers], virtual=True)
+
+    def run(name=None):
+        start = time.time()
+        for i in range(addRows):
+            app.addTableRow("rows", [i, "name %d" % i, i * 0.5])
+        took = waitFor(app, lambda: app.getTableRowCount("rows") == addRows, start)
+        print("addTableRow: %d rows in %.2fs, %.1f rows/s, %d rows would take %.0fs"
+                % (addRows, took, addRows / took, rows, rows * took / addRows))
+
+        start = time.time()
+        app.importTable("import", path)
+        first = time.time() - start
+        took = waitFor(app, lambda: app.getTableRowCount("import") == rows, start)
+        print("importTable: %d rows in %.2fs, %.0f rows/s, first batch shown after %.0fms"
+                % (rows, took, rows / took, first * 1000))
+
+        start = time.time()
+        app.exportTable("import", path)
+        print("exportTable: %d rows in %.2fs" % (rows, time.time() - start))
+
+        os.remove(path)
+        app.stop()
+
+    app.setStartFunction(run)
+    app.go()
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,209 @@
+# Tests for appJar's lazy tree sources, lib/lazytree.py
+#
+# Documents are saved, then read back, to check they keep their text,
+# changes and encoding. The children of elements are read, to check
+# they're found a page at a time. Lazy trees are shown in a real window,
+# those tests are skipped without a display.
+#
+# Run with: python -m pytest updater/appJar/tests
+
+import io
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from itertools import islice
+from xml.dom.minidom import parse, parseString
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from appJar.lib import lazytree
+from appJar.appjar import gui, TclError
+
+XML = u"<people><person id='1'><name>Zoë</name></person><person id='2'><name>Renée</name></person></people>"
+LATIN1 = u"<?xml version='1.0' encoding='ISO-8859-1'?>\n" + XML
+
+
+class SaveDomTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.fileName = os.path.join(self.dir, "saved.xml")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def testDocument(self):
+        lazytree.saveDom(parseString(LATIN1.encode("latin-1")), self.fileName)
+        with open(self.fileName, "rb") as f:
+            data = f.read()
+        # a single declaration, that matches the file's encoding
+        self.assertEqual(data.count(b"<?xml"), 1)
+        self.assertTrue(data.startswith(b'<?xml version="1.0" encoding="utf-8"?>'))
+        self.assertEqual(parse(self.fileName).toxml(), parseString(XML.encode("utf-8")).toxml())
+
+    def testElement(self):
+        person = parseString(XML.encode("utf-8")).getElementsByTagName("person")[1]
+        lazytree.saveDom(person, self.fileName)
+        self.assertEqual(parse(self.fileName).documentElement.toxml(), person.toxml())
+
+
+class XmlSourceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.fileName = os.path.join(self.dir, "saved.xml")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    # changes the text of the second name, then saves & reads back the document
+    def saveAndRead(self, source):
+        people = list(source.getChildren(source.root))
+        name = list(source.getChildren(people[1]))[0]
+        text = list(source.getChildren(name))[0]
+        self.assertEqual(source.getText(text), u"Renée")
+        source.setText(text, u"Renée & Élise")
+        source.save(self.fileName)
+        source.close()
+        return parse(self.fileName)
+
+    def testDeclaredText(self):
+        for data in (LATIN1, io.StringIO(LATIN1)):
+            doc = self.saveAndRead(lazytree.openXml(data))
+            with open(self.fileName, "rb") as f:
+                self.assertEqual(f.read(), LATIN1.replace(u"Renée</", u"Renée &amp; Élise</").encode("latin-1"))
+            names = [n.firstChild.data for n in doc.getElementsByTagName("name")]
+            self.assertEqual(names, [u"Zoë", u"Renée & Élise"])
+
+    def testUndeclaredText(self):
+        for data in (XML, io.StringIO(XML), XML.encode("utf-8"), io.BytesIO(XML.encode("utf-8"))):
+            doc = self.saveAndRead(lazytree.openXml(data))
+            names = [n.firstChild.data for n in doc.getElementsByTagName("name")]
+            self.assertEqual(names, [u"Zoë", u"Renée & Élise"])
+
+    def testClose(self):
+        with io.open(self.fileName, "w", encoding="utf-8") as f:
+            f.write(XML)
+        source = lazytree.openXml(self.fileName)
+        source.close()
+        self.assertTrue(source.stream.closed)
+        self.assertEqual(list(source.getChildren(source.root)), [])
+        self.assertFalse(source.isExpandable(source.root))
+
+
+# a stream that counts the bytes read from it
+class CountingStream(io.BytesIO):
+    bytesRead = 0
+    def read(self, size=-1):
+        data = io.BytesIO.read(self, size)
+        self.bytesRead += len(data)
+        return data
+
+
+class GetChildrenTest(unittest.TestCase):
+
+    def children(self, source, node):
+        return [source.getText(child) for child in source.getChildren(node)]
+
+    def testNesting(self):
+        source = lazytree.openXml(u"<root><a><b>text</b><c/></a><e/>tail</root>")
+        a, e, tail = list(source.getChildren(source.root))
+        self.assertEqual([source.getText(n) for n in (a, e, tail)], ["a", "e", "tail"])
+        self.assertEqual([a.expandable, e.expandable], [True, False])
+        self.assertTrue(e.empty)
+        self.assertEqual(source.getXml(e), u"<e/>")
+
+        b, c = list(source.getChildren(a))
+        self.assertEqual(self.children(source, b), ["text"])
+        self.assertEqual(self.children(source, c), [])
+        self.assertEqual(source.getXml(a), u"<a><b>text</b><c/></a>")
+
+    def testMarkup(self):
+        # comments & processing instructions split the text, so aren't lost when it's edited
+        source = lazytree.openXml(u"<root>one<!-- note -->two<?pi data?>three</root>")
+        one, two, three = list(source.getChildren(source.root))
+        self.assertEqual([source.getText(n) for n in (one, two, three)], ["one", "two", "three"])
+        source.setText(two, u"2")
+        self.assertEqual(source.getXml(source.root), u"<root>one<!-- note -->2<?pi data?>three</root>")
+
+    def testPaging(self):
+        count = 10000
+        data = ("<root>" + "".join("<a i='%d'><b/></a>" % i for i in range(count)) + "</root>").encode("utf-8")
+        stream = CountingStream(data)
+        source = lazytree.XmlSource(stream)
+
+        # the first few children only need the first chunk
+        stream.bytesRead = 0
+        first = list(islice(source.getChildren(source.root), 5))
+        self.assertEqual([n.attrib["i"] for n in first], ["0", "1", "2", "3", "4"])
+        self.assertLessEqual(stream.bytesRead, lazytree.CHUNK_SIZE)
+
+        children = list(source.getChildren(source.root))
+        self.assertEqual([n.attrib["i"] for n in children], [str(i) for i in range(count)])
+        self.assertTrue(all(n.expandable and not n.empty for n in children))
+
+
+class LazyTreeNodeTest(unittest.TestCase):
+
+    # there can only be one gui, so it's shared by the tests
+    @classmethod
+    def setUpClass(cls):
+        try:
+            cls.app = gui("Lazy tree", handleArgs=False)
+        except TclError:
+            gui.instantiated = False
+            raise unittest.SkipTest("no display")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.app.topLevel.destroy()
+        gui.instantiated = False
+
+    def texts(self, node):
+        return [child.item.GetText() for child in node.children]
+
+    def testPaging(self):
+        count = 450
+        tree = self.app.addLazyTree("paging", "<root>" + "<a/>" * count + "</root>")
+        tree.expand()
+        pageSize = tree.PAGE_SIZE
+        self.assertEqual(len(tree.children), pageSize + 1)
+        self.assertIs(tree.children[-1], tree.moreNode)
+
+        # expanding the "..." node shows the next page
+        while tree.moreNode is not None:
+            tree.moreNode.expand()
+        self.assertEqual(self.texts(tree), ["a"] * count)
+
+    def testEviction(self):
+        count = 30
+        tree = self.app.addLazyTree("eviction", "<root>" + "".join("<a><b>%d</b></a>" % i for i in range(count)) + "</root>")
+        tree.expand()
+        branches = tree.children
+        for branch in branches:
+            branch.expand()
+            branch.collapse()
+
+        # only the most recently collapsed branches keep their children
+        kept = [len(branch.children) > 0 for branch in branches]
+        self.assertEqual(kept, [False] * (count - tree.CACHE_SIZE) + [True] * tree.CACHE_SIZE)
+
+        # cleared branches read their children again
+        branches[0].expand()
+        self.assertEqual(self.texts(branches[0]), ["b"])
+        self.assertEqual(self.texts(branches[0].children[0]), [])
+        branches[0].children[0].expand()
+        self.assertEqual(self.texts(branches[0].children[0]), ["0"])
+
+    def testClear(self):
+        tree = self.app.addLazyTree("clear", "<root><a/><b/></root>")
+        tree.expand()
+        self.app.clearTree("clear")
+        self.assertTrue(tree.item.IsExpandable())
+        tree.update()
+        self.assertEqual(self.texts(tree), ["a", "b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,225 @@
+# Tests for appJar's PNG decoder, lib/png.py
+#
+# The unfiltering is checked against a plain implementation of the
+# PNG spec, for every filter type, filter unit and bit depth.
+#
+# Run with: python -m pytest updater/appJar/tests
+
+import os
+import io
+import sys
+import zlib
+import random
+import shutil
+import struct
+import tempfile
+import unittest
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from appJar.lib import png
+from appJar.lib import tkinter_png
+from appJar.lib import imagescale
+
+
+# (colour type, bit depth) pairs allowed by the spec, and their channels
+FORMATS = [(0, 1), (0, 2), (0, 4), (0, 8), (0, 16),
+           (2, 8), (2, 16),
+           (3, 1), (3, 2), (3, 4), (3, 8),
+           (4, 8), (4, 16),
+           (6, 8), (6, 16)]
+CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+
+
+# undoes a filter, one byte at a time, as written in the spec
+def referenceUnfilter(filterType, fu, line, prev):
+    out = bytearray(len(line))
+    for i, x in enumerate(line):
+        a = out[i - fu] if i >= fu else 0
+        b = prev[i] if prev else 0
+        c = prev[i - fu] if prev and i >= fu else 0
+        if filterType == 0: p = 0
+        elif filterType == 1: p = a
+        elif filterType == 2: p = b
+        elif filterType == 3: p = (a + b) >> 1
+        else:
+            pa, pb, pc = abs(b - c), abs(a - c), abs(a + b - 2 * c)
+            if pa <= pb and pa <= pc: p = a
+            elif pb <= pc: p = b
+            else: p = c
+        out[i] = (x + p) & 0xff
+    return out
+
+
+# packs a row of samples into bytes, as stored in a PNG
+def packRow(samples, bitdepth):
+    if bitdepth == 16:
+        return bytearray(struct.pack("!%dH" % len(samples), *samples))
+    if bitdepth == 8:
+        return bytearray(samples)
+    perByte = 8 // bitdepth
+    out = bytearray()
+    for i in range(0, len(samples), perByte):
+        byte = 0
+        group = samples[i:i + perByte]
+        for s in group:
+            byte = (byte << bitdepth) | s
+        out.append(byte << (bitdepth * (perByte - len(group))))
+    return out
+
+
+def makePng(width, height, colourType, bitdepth, filteredRows, plte=None):
+    ihdr = struct.pack("!2I5B", width, height, bitdepth, colourType, 0, 0, 0)
+    chunks = [(b"IHDR", ihdr)]
+    if plte is not None:
+        chunks.append((b"PLTE", plte))
+    chunks.append((b"IDAT", zlib.compress(b"".join(bytes(r) for r in filteredRows))))
+    chunks.append((b"IEND", b""))
+    out = io.BytesIO()
+    png.write_chunks(out, chunks)
+    return out.getvalue()
+
+
+class UnfilterTest(unittest.TestCase):
+
+    def testFilterUnits(self):
+        rand = random.Random(1)
+        reader = png.Reader(bytes=b"")
+        for filterType in range(5):
+            for fu in (1, 2, 3, 4, 6, 8):
+                reader.psize = fu
+                for length in (fu, 7 * fu, 100 * fu + fu):
+                    line = bytearray(rand.randrange(256) for i in range(length))
+                    prev = bytearray(rand.randrange(256) for i in range(length))
+                    for previous in (None, prev):
+                        expected = referenceUnfilter(filterType, fu, line, previous)
+                        got = reader.undo_filter(filterType, png.array(str("B"), line),
+                                    None if previous is None else png.array(str("B"), previous))
+                        self.assertEqual(bytearray(got), expected,
+                            "filter %d, unit %d, length %d" % (filterType, fu, length))
+
+    def testBitDepths(self):
+        rand = random.Random(2)
+        width, height = 13, 5
+        for colourType, bitdepth in FORMATS:
+            channels = CHANNELS[colourType]
+            fu = max(1, channels * bitdepth // 8)
+            plte = None
+            if colourType == 3:
+                plte = bytes(bytearray(rand.randrange(256) for i in range(3 << bitdepth)))
+            for filterType in range(5):
+                rows = [[rand.randrange(1 << bitdepth) for i in range(width * channels)]
+                            for y in range(height)]
+                filtered = []
+                prev = None
+                for row in rows:
+                    line = packRow(row, bitdepth)
+                    filtered.append(png.filter_scanline(filterType, line, fu, prev))
+                    # the encoder and the reference decoder should agree
+                    self.assertEqual(referenceUnfilter(filterType, fu, filtered[-1][1:], prev), line)
+                    prev = line
+
+                data = makePng(width, height, colourType, bitdepth, filtered, plte)
+                w, h, pixels, meta = png.Reader(bytes=data).read()
+                self.assertEqual([list(r) for r in pixels], rows,
+                    "colour type %d, bit depth %d, filter %d" % (colourType, bitdepth, filterType))
+
+    def testInterlaced(self):
+        rand = random.Random(3)
+        for bitdepth in (8, 16):
+            rows = [[rand.randrange(1 << bitdepth) for i in range(17 * 3)] for y in range(11)]
+            out = io.BytesIO()
+            png.Writer(17, 11, bitdepth=bitdepth, interlace=True).write(out, rows)
+            w, h, pixels, meta = png.Reader(bytes=out.getvalue()).read()
+            self.assertEqual([list(r) for r in pixels], rows)
+
+
+class MemoryTest(unittest.TestCase):
+
+    def testLargeImage(self):
+        # a 10000x10000 greyscale image, in a single IDAT chunk
+        width = height = 10000
+        row = b"\0" + bytes(bytearray(range(256))) * (width // 256) + bytes(bytearray(width % 256))
+        compressor = zlib.compressobj()
+        idat = b"".join([compressor.compress(row) for y in range(height)] + [compressor.flush()])
+        out = io.BytesIO()
+        png.write_chunks(out, [(b"IHDR", struct.pack("!2I5B", width, height, 8, 0, 0, 0, 0)),
+                               (b"IDAT", idat), (b"IEND", b"")])
+        data = out.getvalue()
+
+        tracemalloc.start()
+        try:
+            w, h, pixels, meta = png.Reader(bytes=data).read()
+            count = 0
+            for pixelRow in pixels:
+                count += 1
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        self.assertEqual(count, height)
+        self.assertEqual(bytes(bytearray(pixelRow)), row[1:])
+        # the compressed chunk is read whole, the rest is a few bands of scanlines
+        self.assertLess(peak - len(idat), 48 * len(row))
+
+    def testPhotoImageBands(self):
+        # a 4000x128 greyscale image, written to a stand-in for the PhotoImage
+        width, height = 4000, 128
+        rows = [bytearray([y]) * width for y in range(height)]
+        out = io.BytesIO()
+        png.Writer(width, height, greyscale=True).write(out, rows)
+
+        class Image(object):
+            puts = []
+            def put(self, data, to):
+                self.puts.append((len(data), to))
+
+        image = tkinter_png.PngImageTk.__new__(tkinter_png.PngImageTk)
+        image.w, image.h, image.pixels, image.meta = png.Reader(bytes=out.getvalue()).asRGB8()
+        image.pixeldata = image.pixels
+        image.x = image.y = 0
+        image.image = Image()
+
+        tracemalloc.start()
+        try:
+            image.convert()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        self.assertEqual([to for size, to in Image.puts], [(0, y) for y in range(0, height, image.bandHeight)])
+        # each band is held twice, as rows and as the joined text
+        bandSize = Image.puts[0][0]
+        self.assertLess(peak, 3 * bandSize)
+
+
+class TransparencyTest(unittest.TestCase):
+
+    def testRuns(self):
+        # a 10x3 image, with transparent runs at the ends and middle of the rows
+        alphas = [[0, 0, 255, 255, 0, 0, 0, 255, 255, 0],
+                  [255] * 10,
+                  [0] * 10]
+        rows = [[v for a in row for v in (1, 2, 3, a)] for row in alphas]
+        out = io.BytesIO()
+        png.Writer(10, 3, alpha=True).write(out, rows)
+        path = os.path.join(tempfile.mkdtemp(), "runs.png")
+        with open(path, "wb") as f:
+            f.write(out.getvalue())
+
+        try:
+            self.assertEqual(tkinter_png.PngImageTk.getSize(path), (10, 3))
+            data, runs = tkinter_png.PngImageTk.toPpm(path)
+        finally:
+            shutil.rmtree(os.path.dirname(path))
+        self.assertEqual(data, b"P6\n10 3\n255\n" + b"\x01\x02\x03" * 30)
+        self.assertEqual(runs, [(0, 2, 0), (4, 7, 0), (9, 10, 0), (0, 10, 2)])
+
+        # and the scaler's masks give back the same runs
+        mask = imagescale.runsToMask(runs, 10, 3)
+        self.assertEqual(mask, bytearray(1 - a // 255 for row in alphas for a in row))
+        self.assertEqual(imagescale.maskToRuns(mask, 10), runs)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+# Tests for the indexes used to filter tables, TableIndex in appjar.py
+#
+# Each index is built from a column, then rows are removed & added, to
+# check the keys it builds match the keys it looks up.
+#
+# Run with: python -m pytest updater/appJar/tests
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from appJar.appjar import TableIndex
+
+NAN = float("nan")
+
+
+class TableIndexTest(unittest.TestCase):
+
+    # the table uses id(row) as the row id, here the rows are numbered from 1
+    def build(self, values):
+        index = TableIndex()
+        index.buildTexts(range(1, len(values) + 1), values)
+        index.buildKeys(range(1, len(values) + 1), values)
+        return index
+
+    def testNumbers(self):
+        index = self.build([3, 1.5, 2, 1.5])
+        self.assertEqual(index.range(1, 2), set([2, 3, 4]))
+        index.remove(2, 1.5)
+        index.add(5, 1)
+        self.assertEqual(index.range(1, 2), set([3, 4, 5]))
+        self.assertEqual(index.search("1"), set([4, 5]))
+
+    def testNaN(self):
+        # NaN is keyed as text, so it's not in a range of numbers
+        index = self.build([1, NAN, 3])
+        self.assertEqual(index.range(0, 5), set([1, 3]))
+        self.assertEqual(index.range("a", "z"), set([2]))
+
+        # removing the row, then replacing it, looks up the same key that was built
+        index.remove(2, NAN)
+        self.assertEqual(index.range("a", "z"), set())
+        index.add(2, NAN)
+        index.remove(3, 3)
+        index.add(3, 4)
+        self.assertEqual(index.range(0, 5), set([1, 3]))
+        self.assertEqual(index.range("a", "z"), set([2]))
+        self.assertEqual(index.search("nan"), set([2]))
+
+
+if __name__ == "__main__":
+    unittest.main()
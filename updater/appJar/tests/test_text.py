@@ -0,0 +1,60 @@
+# Tests for appJar's text areas, TextParent in appjar.py
+#
+# Text is added to a real Text widget, to check which lines get tagged as
+# changed. Needs a display, the tests are skipped without one.
+#
+# Run with: python -m pytest updater/appJar/tests
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from appJar.appjar import AjText, Tk, TclError, END
+
+
+class TrackChangesTest(unittest.TestCase):
+
+    def setUp(self):
+        try:
+            self.root = Tk()
+        except TclError:
+            self.skipTest("no display")
+        self.root.withdraw()
+        self.text = AjText(self.root)
+        self.text.insert(END, "one\ntwo\n")
+
+    def tearDown(self):
+        self.text.destroy()
+        self.root.destroy()
+
+    def tagged(self, tag):
+        return [index for index in ("1.0", "2.0", "3.0", "3.4") if tag in self.text.tag_names(index)]
+
+    def testAppend(self):
+        self.text.trackChanges()
+        self.text.insert(END, "three")
+        self.assertEqual(self.text.get("3.0", "3.end"), "three")
+        self.assertEqual(self.tagged("AJ_CHANGED"), ["3.0", "3.4"])
+
+    def testInsert(self):
+        self.text.trackChanges()
+        self.text.insert("1.0", "zero ")
+        self.assertEqual(self.tagged("AJ_CHANGED"), ["1.0"])
+        self.assertEqual(self.text.mark_names().count("AJ_EDIT"), 0)
+
+    def testHighlightAppend(self):
+        self.text.addHighlight("found", "three")
+        self.text._highlight()
+        self.assertEqual(self.tagged("AJ_UNHIGHLIGHTED"), [])
+
+        # appended text waits to be searched, then gets highlighted
+        self.text.insert(END, "three")
+        self.assertEqual(self.tagged("AJ_UNHIGHLIGHTED"), ["3.0", "3.4"])
+        self.text._highlight()
+        self.assertEqual(self.tagged("AJ_UNHIGHLIGHTED"), [])
+        self.assertEqual(self.tagged("found"), ["3.0", "3.4"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -109,7 +109,7 @@ with gui("更新助手", "600x550", font={'size': 10, 'family': 'Microsoft YaHei
     app.setPadding([20, 0])
     current_row += 1
     tips = "\n提示: 点击更新按钮, 将会自动从 GitHub 下载最新版本覆盖如上所示的已添加文件"
-    app.text("result", value=tips, scroll=True, height=7, font=10, row=current_row, colspan=4, sticky="ew")
+    app.text("result", value=tips, scroll=True, log=1000, height=7, font=10, row=current_row, colspan=4, sticky="ew")
 
     current_row += 1
     app.label(" ", row=current_row, colspan=4)